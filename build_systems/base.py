@@ -1,10 +1,23 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from build_systems.licenses import LicensePool
 
 
 class BuildSystemBase(ABC):
     """Abstract base class for all build systems."""
 
+    # Options that only change how a test runs, never how its testbench is built
+    RUN_ONLY_OPTIONS = frozenset(
+        {"seed", "verbosity", "runtime_args", "prebuilt", "log_name", "timeout", "inactivity_timeout"}
+    )
+
+    # Per-test settings that control the tester itself rather than the simulation;
+    # ``runtime_args`` reach the simulator verbatim through the run options
+    TIMEOUT_SETTINGS = ("timeout", "inactivity_timeout")
+    TESTER_SETTINGS = TIMEOUT_SETTINGS + ("memory", "files", "runtime_args")
+
     def __init__(self, config: Dict[str, Any]):
         """Initialize the build system with configuration.
 
@@ -12,6 +25,19 @@ class BuildSystemBase(ABC):
             config: Dictionary containing build system configuration
         """
         self.config = config
+        # Simulator whose license pools compiles and runs use by default
+        self.simulator: Optional[str] = config.get("simulator")
+        self.licenses = LicensePool(config)
+        # Regression workers share one build system, so the last result is per thread
+        self._local = threading.local()
+
+    @property
+    def last_result(self) -> Optional[Any]:
+        """The CommandResult of the last command this thread ran, if any."""
+        return getattr(self._local, "result", None)
+
+    def _set_last_result(self, result: Optional[Any]) -> None:
+        self._local.result = result
 
     @abstractmethod
     def build(self, testbench: str, options: Optional[Dict[str, Any]] = None) -> bool:
@@ -40,6 +66,116 @@ class BuildSystemBase(ABC):
         """
         pass
 
+    def needs_build(self, testbench: str) -> bool:
+        """Check whether the testbench has a build step separate from running a test.
+
+        Regressions build such testbenches once up front and then run every test
+        with the ``prebuilt`` option set, so ``run`` does not compile again.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            bool: True if the testbench should be built before its tests run
+        """
+        return True
+
+    def get_build_options(self, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get the subset of run options that affects the build of a testbench.
+
+        Tests whose build options are equal can share a single build.
+
+        Args:
+            options: Run options of a test
+
+        Returns:
+            Dict[str, Any]: Options to pass to ``build``
+        """
+        return {key: value for key, value in (options or {}).items() if key not in self.RUN_ONLY_OPTIONS}
+
+    def get_build_fingerprint(self, testbench: str) -> Optional[str]:
+        """Get the fingerprint of the build tests of a testbench currently run on.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[str]: Fingerprint of the last successful build, or None if unknown
+        """
+        return None
+
+    def get_dependencies(self, testbench: str) -> Optional[List[str]]:
+        """Get the files and directories the build of a testbench reads.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[List[str]]: Configured source files, include directories and
+                build scripts, or None if the build system cannot tell
+        """
+        return None
+
+    def get_coverage_database(self, testbench: str, test: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Get the coverage database a test run writes.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            options: Run options of the test
+
+        Returns:
+            Optional[str]: Path of the database, or None if the run collects no
+                coverage or the build system does not know where it goes
+        """
+        return None
+
+    def get_timeouts(
+        self, testbench: str, test: str, options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Get the time limits of a test run.
+
+        Each limit is looked up in the run options, then in
+        ``testbenches.<tb>.tests.<test>``, then in ``testbenches.<tb>`` and finally
+        in the top-level ``test_timeout`` and ``inactivity_timeout`` settings.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            options: Run options, which may set ``timeout`` and ``inactivity_timeout``
+
+        Returns:
+            Tuple[Optional[float], Optional[float]]: Wall-clock limit and the limit
+                on time without output, in seconds; None (or 0) means no limit
+        """
+        tb_config = self.config.get("testbenches", {}).get(testbench) or {}
+        tests = tb_config.get("tests") or {}
+        test_config = (tests.get(test) if isinstance(tests, dict) else None) or {}
+        defaults = {"timeout": self.config.get("test_timeout"), "inactivity_timeout": self.config.get("inactivity_timeout")}
+
+        limits = []
+        for key in self.TIMEOUT_SETTINGS:
+            for source in (options or {}, test_config, tb_config, defaults):
+                if source.get(key) is not None:
+                    limits.append(float(source[key]) or None)
+                    break
+            else:
+                limits.append(None)
+        return limits[0], limits[1]
+
+    def get_licenses(self, testbench: str, *phases: str, coverage: bool = False) -> List[str]:
+        """Get the license features a command must hold a token of while it runs.
+
+        Args:
+            testbench: Name of the testbench
+            *phases: Build phases the command performs ("build", "run")
+            coverage: Whether coverage collection is enabled
+
+        Returns:
+            List[str]: License pools to take a token from (see ``LicensePool``)
+        """
+        return self.licenses.features(testbench, phases, coverage, simulator=self.simulator)
+
     @abstractmethod
     def clean(self, testbench: str) -> bool:
         """Clean the testbench.
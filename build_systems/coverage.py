@@ -0,0 +1,260 @@
+"""Coverage databases of single test runs and their merge into one database per regression."""
+
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from build_systems import process
+from build_systems.state import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+# Per simulator: the suffix of the coverage database a test run writes to
+# $(COVERAGE_DB), where in it the merge tool finds the database, and the
+# command merging "{inputs}" into "{output}"
+TOOLS: Dict[str, Dict[str, Any]] = {
+    "vcs": {
+        "suffix": ".vdb",
+        "database": "{path}",
+        "merge_command": ["urg", "-full64", "-noreport", "-dir", "{inputs}", "-dbname", "{output}"],
+    },
+    "questa": {
+        "suffix": ".ucdb",
+        "database": "{path}",
+        "merge_command": ["vcover", "merge", "-out", "{output}", "{inputs}"],
+    },
+    "xcelium": {
+        "suffix": "",
+        "database": "{path}/tester/run",
+        "merge_command": ["imc", "-execcmd", "merge {inputs} -out {output} -overwrite"],
+    },
+}
+
+
+def get_coverage_settings(config: Dict[str, Any], simulator: Optional[str] = None) -> Dict[str, Any]:
+    """Get the coverage settings, the ``coverage`` section over the simulator's defaults.
+
+    Args:
+        config: Tester configuration
+        simulator: Simulator the databases are written by
+
+    Returns:
+        Dict[str, Any]: ``suffix``, ``database`` and ``merge_command`` plus the
+            other settings of the ``coverage`` section
+    """
+    settings = {"suffix": "", "database": "{path}", "merge_command": None}
+    settings.update(TOOLS.get(str(simulator or "").lower(), {}))
+    settings.update(config.get("coverage") or {})
+    return settings
+
+
+class CoverageMerger:
+    """Merges the coverage databases of a regression while its tests still run.
+
+    Databases are merged in a tree: as soon as ``fan_in`` databases of the same
+    level are there, one merge combines them into a database of the next
+    level, with up to ``parallel`` merges at once. When the regression ends,
+    only the few databases left on each level remain to be merged, so the
+    final database is ready shortly after the last test instead of after one
+    long serial merge of every database.
+
+    The ``coverage`` config section sets the merge::
+
+        coverage:
+          merge: true          # false: leave the per-test databases alone
+          merge_command: [urg, -full64, -noreport, -dir, "{inputs}", -dbname, "{output}"]
+          fan_in: 8            # databases combined by one merge
+          parallel: 4          # merges running at once
+          work_dir: /scratch   # intermediate databases; default: the state dir
+
+    Databases a merge failed on are listed in ``unmerged``; intermediate ones
+    among them are kept in an ``unmerged_*`` directory of ``work_dir``.
+
+    ``merge_command`` defaults to the simulator's merge tool (see ``TOOLS``).
+    An argument that is exactly ``{inputs}`` becomes one argument per input
+    database; elsewhere ``{inputs}`` is replaced by the space separated inputs.
+    """
+
+    def __init__(self, config: Dict[str, Any], simulator: Optional[str] = None):
+        """Read the merge settings.
+
+        Args:
+            config: Tester configuration
+            simulator: Simulator whose merge tool is used by default
+
+        Raises:
+            ValueError: If there is no merge command for the simulator
+        """
+        settings = get_coverage_settings(config, simulator)
+        command = settings.get("merge_command")
+        if not command:
+            raise ValueError(f"No coverage merge command for simulator '{simulator}', set coverage.merge_command")
+        self.merge_command: List[str] = shlex.split(command) if isinstance(command, str) else [str(arg) for arg in command]
+        self.fan_in = max(2, int(settings.get("fan_in", 8)))
+        self.parallel = max(1, int(settings.get("parallel", 2)))
+        self.suffix = settings.get("suffix") or ""
+        self.work_root = settings.get("work_dir") or os.path.join(get_state_dir(config), "coverage")
+        self.log_tail_lines = int(config.get("log_tail_lines", 20))
+        self.unmerged: List[str] = []
+        self._cond = threading.Condition()
+        self._levels: List[List[str]] = []
+        self._running = 0
+        self._count = 0
+        self._work_dir: Optional[str] = None
+        self._unmerged_dir: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add(self, database: str) -> None:
+        """Add the coverage database of a finished test; merges start as soon as enough are there."""
+        with self._cond:
+            self._add(0, database)
+
+    def _add(self, level: int, database: str) -> None:
+        """Queue a database on a level of the tree; call with the lock held."""
+        while len(self._levels) <= level:
+            self._levels.append([])
+        queue = self._levels[level]
+        queue.append(database)
+        if len(queue) >= self.fan_in:
+            inputs = queue[: self.fan_in]
+            del queue[: self.fan_in]
+            self._submit(inputs, level + 1)
+
+    def _submit(self, inputs: List[str], level: int) -> None:
+        if self._executor is None:
+            os.makedirs(self.work_root, exist_ok=True)
+            self._work_dir = tempfile.mkdtemp(prefix="merge_", dir=self.work_root)
+            self._executor = ThreadPoolExecutor(max_workers=self.parallel)
+        output = os.path.join(self._work_dir, f"level{level}_{self._count}{self.suffix}")
+        self._count += 1
+        self._running += 1
+        self._executor.submit(self._merge_level, inputs, output, level)
+
+    def _merge_level(self, inputs: List[str], output: str, level: int) -> None:
+        merged = False
+        try:
+            merged = self._merge(inputs, output)
+            if merged:
+                self._remove_intermediates(inputs)
+        finally:
+            with self._cond:
+                self._running -= 1
+                if merged:
+                    self._add(level, output)
+                else:
+                    self._keep_unmerged(inputs)
+                self._cond.notify_all()
+
+    def _merge(self, inputs: Sequence[str], output: str) -> bool:
+        """Run the merge command, returning True if it created ``output``."""
+        cmd = []
+        for arg in self.merge_command:
+            if arg == "{inputs}":
+                cmd.extend(inputs)
+            else:
+                cmd.append(arg.replace("{inputs}", " ".join(inputs)).replace("{output}", output))
+        start = time.monotonic()
+        try:
+            result = process.run_command(cmd, check=False, tail_lines=self.log_tail_lines)
+        except OSError as e:
+            logger.error(f"Failed to start coverage merge {cmd[0]}: {e}")
+            return False
+        if not result.success:
+            logger.error(f"Coverage merge of {len(inputs)} database(s) failed:\n{result.output}")
+            return False
+        logger.debug(f"Merged {len(inputs)} coverage database(s) into {output} in {time.monotonic() - start:.1f}s")
+        return True
+
+    def _keep_unmerged(self, databases: Sequence[str]) -> None:
+        """Record databases a merge failed on; call with the lock held.
+
+        Intermediate databases are moved out of the work directory, which is
+        removed when the merge ends, so the coverage they hold is not lost.
+        """
+        for database in databases:
+            if self._work_dir and os.path.dirname(database) == self._work_dir:
+                if self._unmerged_dir is None:
+                    self._unmerged_dir = tempfile.mkdtemp(prefix="unmerged_", dir=self.work_root)
+                kept = os.path.join(self._unmerged_dir, os.path.basename(database))
+                shutil.move(database, kept)
+                logger.warning(f"Kept intermediate coverage database {kept} that could not be merged")
+                database = kept
+            self.unmerged.append(database)
+
+    def _remove_intermediates(self, databases: Sequence[str]) -> None:
+        """Delete merged databases of earlier merges; the tests' own databases are kept."""
+        for database in databases:
+            if self._work_dir and os.path.dirname(database) == self._work_dir:
+                if os.path.isdir(database):
+                    shutil.rmtree(database, ignore_errors=True)
+                elif os.path.exists(database):
+                    os.remove(database)
+
+    def finish(self, output: str) -> Optional[str]:
+        """Merge every database added so far into one.
+
+        Args:
+            output: Path of the merged database, without the simulator's suffix
+
+        Returns:
+            Optional[str]: Path of the merged database, or None if there was
+                nothing to merge or the final merge failed
+        """
+        start = time.monotonic()
+        with self._cond:
+            pending = self._collapse()
+        try:
+            if not pending:
+                return None
+            output += self.suffix
+            if os.path.isdir(output):
+                shutil.rmtree(output)
+            elif os.path.exists(output):
+                os.remove(output)
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            if len(pending) == 1 and self._work_dir and os.path.dirname(pending[0]) == self._work_dir:
+                # Everything already ended up in one intermediate database
+                shutil.move(pending[0], output)
+            elif not self._merge(pending, output):
+                with self._cond:
+                    self._keep_unmerged(pending)
+                return None
+            logger.info(f"Merged coverage into {output}, {time.monotonic() - start:.0f}s after the last test")
+            return output
+        finally:
+            self._cleanup()
+
+    def _collapse(self) -> List[str]:
+        """Merge the queued databases until at most ``fan_in`` remain; call with the lock held."""
+        while True:
+            while self._running:
+                self._cond.wait()
+            pending = [database for level in self._levels for database in level]
+            self._levels = []
+            if len(pending) <= self.fan_in:
+                return pending
+            # More than one merge is still needed, run as many as possible at once
+            for database in pending:
+                self._add(0, database)
+
+    def abort(self) -> None:
+        """Drop the merge after a cancelled regression, once running merges have stopped."""
+        with self._cond:
+            while self._running:
+                self._cond.wait()
+            self._levels = []
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
@@ -1,16 +1,47 @@
+import copy
+import fnmatch
+import hashlib
 import importlib
+import json
 import logging
 import os
 import shutil
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import edalize
 
 from build_systems.base import BuildSystemBase
+from build_systems.fingerprint import BuildCache, expand_sources
+from build_systems.log_watch import create_log_watcher
+from build_systems.process import CommandError, run_command
+from build_systems.state import get_state_dir, write_atomic
 
 logger = logging.getLogger(__name__)
 
+# Records the hash of the EDAM a work directory was last configured with
+EDAM_STAMP = ".tester_edam_hash"
+
+# Per-test run directories inside a testbench work directory
+RUNS_DIR = "runs"
+
+# Entries of a testbench work directory that a run reads besides the compiled model:
+# the Makefile, the scripts and file lists it passes to the tool, and VPI/DPI libraries
+RUN_SCRIPTS = ("Makefile", "*.scr", "*.f", "*.tcl", "*.do", "*.ini", "*.so")
+
+# The compiled model of each tool, ``{name}`` being the testbench (the EDAM name)
+COMPILED_MODELS = {
+    "vcs": ("{name}", "{name}.daidir"),
+    "questa": ("work",),
+    "modelsim": ("work",),
+    "xcelium": ("xcelium.d", "INCA_libs"),
+    "verilator": ("obj_dir",),
+}
+
+# Tools whose Edalize Makefile takes plusargs through PLUSARGS rather than EXTRA_OPTIONS
+PLUSARG_VARIABLES = {"xcelium": "PLUSARGS", "modelsim": "PLUSARGS", "questa": "PLUSARGS"}
+
 
 class EdalizeIntegration(BuildSystemBase):
     """Build system implementation that uses Edalize for EDA tool interactions."""
@@ -24,6 +55,7 @@ class EdalizeIntegration(BuildSystemBase):
         super().__init__(config)
         self.work_root = config.get("work_root", os.path.join(os.getcwd(), "build"))
         self.tool = config.get("tool", "icarus")  # Default to Icarus for testing
+        self.simulator = self.simulator or self.tool
         self.parameters = config.get("parameters", {})
         self.files = config.get("files", [])
         self.testbenches = config.get("testbenches", {})
@@ -34,13 +66,24 @@ class EdalizeIntegration(BuildSystemBase):
             "questa": config.get("questa_options", {}),
             "xcelium": config.get("xcelium_options", {}),
         }
-
-    def _prepare_edalize_config(self, testbench: str, test: Optional[str] = None) -> Dict[str, Any]:
+        self.make_command = config.get("make_command", "make")
+        self.log_tail_lines = config.get("log_tail_lines", 100)
+        self.run_files = list(config.get("run_files", []))
+        self.build_cache = BuildCache(get_state_dir(config))
+
+        # Backends are reused within a process for as long as their EDAM is unchanged
+        self._backends: Dict[Tuple[str, Optional[str]], Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _prepare_edalize_config(
+        self, testbench: str, test: Optional[str] = None, options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Prepare the Edalize configuration for a testbench.
 
         Args:
             testbench: Name of the testbench
             test: Optional test name
+            options: Optional build options; ``debug`` adds the tool's debug flags
 
         Returns:
             Dict[str, Any]: Edalize configuration
@@ -63,7 +106,11 @@ class EdalizeIntegration(BuildSystemBase):
 
         # Add test-specific parameters if test is provided
         if test:
-            test_params = self.testbenches.get(testbench, {}).get("tests", {}).get(test, {})
+            test_params = {
+                name: value
+                for name, value in (self.testbenches.get(testbench, {}).get("tests", {}).get(test) or {}).items()
+                if name not in self.TESTER_SETTINGS
+            }
             if test_params:
                 # Special handling for UVM test name
                 if "uvm_testname" not in test_params and self.tool in ["vcs", "questa", "xcelium"]:
@@ -71,23 +118,110 @@ class EdalizeIntegration(BuildSystemBase):
 
                 edam["parameters"].update(test_params)
 
-        # Add tool-specific options
-        edam["tool_options"] = {self.tool: self.tool_options.get(self.tool, {})}
+        # Add tool-specific options, copied so debug flags never leak into the configuration
+        tool_options = copy.deepcopy(self.tool_options.get(self.tool, {}))
+        if options and options.get("debug"):
+            if self.tool == "vcs":
+                tool_options["debug"] = True
+            elif self.tool == "questa":
+                tool_options["vopt_args"] = "-debug"
+            elif self.tool == "xcelium":
+                tool_options["xrun_args"] = "-debug"
+        edam["tool_options"] = {self.tool: tool_options}
 
         return edam
 
-    def _get_edalize_backend(self, testbench: str, test: Optional[str] = None) -> Any:
+    def _edam_hash(self, edam: Dict[str, Any]) -> str:
+        """Hash an EDAM description together with the tool it is configured for.
+
+        Args:
+            edam: EDAM description
+
+        Returns:
+            str: Hex digest that is stable across processes
+        """
+        data = json.dumps({"tool": self.tool, "edam": edam}, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _configured_hash(self, testbench: str) -> Optional[str]:
+        """Get the EDAM hash the testbench work directory was last configured with."""
+        try:
+            with open(os.path.join(self.work_root, testbench, EDAM_STAMP), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _configure(self, backend: Any, testbench: str, edam_hash: str, force: bool = False) -> None:
+        """Configure the backend unless the work directory already matches its EDAM.
+
+        Args:
+            backend: Edalize backend
+            testbench: Name of the testbench
+            edam_hash: Hash of the backend's EDAM
+            force: Configure even if the EDAM is unchanged
+        """
+        with self._lock:
+            if not force and self._configured_hash(testbench) == edam_hash:
+                logger.debug(f"Testbench {testbench} is already configured")
+                return
+            logger.info(f"Configuring testbench {testbench} with {self.tool}")
+            backend.configure()
+            try:
+                write_atomic(os.path.join(self.work_root, testbench, EDAM_STAMP), edam_hash)
+            except OSError as e:
+                logger.warning(f"Failed to record configuration of testbench {testbench}: {e}")
+
+    def _get_edalize_backend(
+        self, testbench: str, test: Optional[str] = None, options: Optional[Dict[str, Any]] = None
+    ) -> Any:
         """Get an Edalize backend for the specified testbench and test.
 
         Args:
             testbench: Name of the testbench
             test: Optional test name
+            options: Optional build options
 
         Returns:
             Any: Configured Edalize backend
         """
-        edam = self._prepare_edalize_config(testbench, test)
+        return self._get_backend_and_hash(testbench, test, options)[0]
+
+    def _get_backend_and_hash(
+        self, testbench: str, test: Optional[str] = None, options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, str]:
+        """Get a backend and the hash of its EDAM, reusing the backend while the EDAM is unchanged.
+
+        Args:
+            testbench: Name of the testbench
+            test: Optional test name
+            options: Optional build options
+
+        Returns:
+            Tuple[Any, str]: The Edalize backend and its EDAM hash
+        """
+        edam = self._prepare_edalize_config(testbench, test, options)
+        edam_hash = self._edam_hash(edam)
+        key = (testbench, test)
+        with self._lock:
+            cached = self._backends.get(key)
+        if cached and cached[0] == edam_hash:
+            return cached[1], edam_hash
+
+        backend = self._create_backend(testbench, edam)
+        with self._lock:
+            self._backends[key] = (edam_hash, backend)
+        return backend, edam_hash
+
+    def _create_backend(self, testbench: str, edam: Dict[str, Any]) -> Any:
+        """Create a new Edalize backend.
+
+        Args:
+            testbench: Name of the testbench
+            edam: EDAM description
 
+        Returns:
+            Any: The Edalize backend
+        """
         # Create work directory
         work_dir = os.path.join(self.work_root, testbench)
         os.makedirs(work_dir, exist_ok=True)
@@ -109,6 +243,48 @@ class EdalizeIntegration(BuildSystemBase):
             logger.error(f"Failed to create Edalize backend: {e}")
             raise
 
+    def _get_build_fingerprint(self, testbench: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Fingerprint the inputs of a testbench build.
+
+        Covers the EDAM description (files, parameters, toplevel, tool options
+        including debug flags) and the content of every source file.
+
+        Args:
+            testbench: Name of the testbench
+            options: Build options
+
+        Returns:
+            str: The fingerprint
+        """
+        edam = self._prepare_edalize_config(testbench, options=options)
+        files = [f["name"] if isinstance(f, dict) else f for f in edam["files"]]
+        settings = {"edam": edam, "tool": self.tool}
+        return self.build_cache.fingerprint(settings, expand_sources(files))
+
+    def get_dependencies(self, testbench: str) -> Optional[List[str]]:
+        """Get the files the build of a testbench reads.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[List[str]]: The files of its EDAM description, or None if
+                it has none
+        """
+        edam = self._prepare_edalize_config(testbench)
+        return [f["name"] if isinstance(f, dict) else f for f in edam["files"]] or None
+
+    def get_build_fingerprint(self, testbench: str) -> Optional[str]:
+        """Get the fingerprint of the last successful build of a testbench.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[str]: The fingerprint, or None if the build is not tracked
+        """
+        return self.build_cache.current(testbench)
+
     def build(self, testbench: str, options: Optional[Dict[str, Any]] = None) -> bool:
         """Build the testbench using Edalize.
 
@@ -120,37 +296,161 @@ class EdalizeIntegration(BuildSystemBase):
             bool: True if build was successful, False otherwise
         """
         try:
-            backend = self._get_edalize_backend(testbench)
-
-            # Handle debug mode
-            if options and options.get("debug"):
-                if self.tool == "vcs":
-                    backend.tool_options["vcs"]["debug"] = True
-                elif self.tool == "questa":
-                    backend.tool_options["questa"]["vopt_args"] = "-debug"
-                elif self.tool == "xcelium":
-                    backend.tool_options["xcelium"]["xrun_args"] = "-debug"
+            # Debug flags are part of the EDAM, so toggling debug reconfigures
+            backend, edam_hash = self._get_backend_and_hash(testbench, options=options)
 
             # Clean build if requested
-            if options and not options.get("incremental", True):
+            clean_build = bool(options and not options.get("incremental", True))
+            if clean_build:
                 logger.info(f"Performing clean build for testbench {testbench}")
                 self.clean(testbench)
 
-            # Configure and build
-            logger.info(f"Configuring testbench {testbench} with {self.tool}")
-            backend.configure()
+            # Skip configure and compile entirely when nothing changed since the last successful build
+            fingerprint = self._get_build_fingerprint(testbench, options)
+            work_dir = os.path.join(self.work_root, testbench)
+            if not clean_build and os.path.isdir(work_dir) and self.build_cache.is_current(testbench, fingerprint):
+                logger.info(f"Testbench {testbench} is up to date, skipping build")
+                return True
+
+            # Configure only when the EDAM changed since the work directory was last configured
+            self._configure(backend, testbench, edam_hash, force=clean_build)
 
             logger.info(f"Building testbench {testbench} with {self.tool}")
-            backend.build()
+            licenses = self.get_licenses(testbench, "build", coverage=bool((options or {}).get("coverage")))
+            with self.licenses.hold(licenses) as held:
+                if not held:
+                    raise RuntimeError(f"Cancelled while waiting for license token(s) {', '.join(licenses)}")
+                backend.build()
 
+            self.build_cache.record(testbench, fingerprint)
             return True
         except Exception as e:
             logger.error(f"Failed to build testbench {testbench}: {e}")
+            self.build_cache.invalidate(testbench)
+            return False
+
+    def _get_run_dir(self, testbench: str, run_name: str) -> str:
+        """Get the directory a single test run executes in."""
+        return os.path.join(self.work_root, testbench, RUNS_DIR, run_name)
+
+    def _get_run_inputs(self, testbench: str) -> List[str]:
+        """Get the patterns of the work directory entries a run of the testbench needs.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            List[str]: Glob patterns: the run scripts, the compiled model of the
+                tool and the ``run_files`` of the configuration
+        """
+        models = COMPILED_MODELS.get(self.tool, ("{name}",))
+        return list(RUN_SCRIPTS) + [model.format(name=testbench) for model in models] + self.run_files
+
+    def _prepare_run_dir(self, testbench: str, run_name: str) -> str:
+        """Create a fresh run directory that shares the compiled model of the testbench.
+
+        Only the compiled model and the Makefile and scripts that start it are
+        symlinked from the testbench work directory, so the run reuses the
+        single compile while its logs, coverage database and other outputs
+        start out empty and stay separate from concurrently running tests.
+
+        Args:
+            testbench: Name of the testbench
+            run_name: Unique name of the run, e.g. ``<test>.<seed>``
+
+        Returns:
+            str: Path of the run directory
+        """
+        work_dir = os.path.abspath(os.path.join(self.work_root, testbench))
+        run_dir = self._get_run_dir(testbench, run_name)
+        if os.path.lexists(run_dir):
+            shutil.rmtree(run_dir)
+        os.makedirs(run_dir)
+
+        patterns = self._get_run_inputs(testbench)
+        for name in os.listdir(work_dir):
+            if name in (RUNS_DIR, EDAM_STAMP) or not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+                continue
+            os.symlink(os.path.join(work_dir, name), os.path.join(run_dir, name))
+        return run_dir
+
+    def _get_run_plusargs(self, testbench: str, test: str, options: Dict[str, Any]) -> List[str]:
+        """Collect the plusargs that select and configure a test at run time.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test to run
+            options: Run options (seed, verbosity, runtime_args)
+
+        Returns:
+            List[str]: Plusargs in the form ``+NAME=value``, followed by the
+                runtime arguments as given
+        """
+        runtime_args = [str(arg) for arg in options.get("runtime_args", [])]
+        run_options: Dict[str, Any] = {}
+        if self.tool in ["vcs", "questa", "xcelium"] and not any(arg.startswith("+UVM_TESTNAME=") for arg in runtime_args):
+            run_options["UVM_TESTNAME"] = test
+
+        # Test-specific parameters are passed to the shared compiled model at run time;
+        # the test's runtime_args arrive verbatim through the run options
+        for name, value in (self.testbenches.get(testbench, {}).get("tests", {}).get(test) or {}).items():
+            if name in self.TESTER_SETTINGS:
+                continue
+            run_options["UVM_TESTNAME" if name == "uvm_testname" else name] = value
+
+        # Handle seed
+        if "seed" in options:
+            if self.tool == "vcs":
+                run_options["ntb_random_seed"] = str(options["seed"])
+            elif self.tool == "questa":
+                run_options["sv_seed"] = str(options["seed"])
+            elif self.tool == "xcelium":
+                run_options["seed"] = str(options["seed"])
+
+        # Handle verbosity
+        if "verbosity" in options:
+            verbosity = options["verbosity"].upper()
+            if not verbosity.startswith("UVM_"):
+                verbosity = f"UVM_{verbosity}"
+            run_options["UVM_VERBOSITY"] = verbosity
+
+        return [f"+{name}={value}" for name, value in run_options.items()] + runtime_args
+
+    def _ensure_built(self, testbench: str, test: str, build_options: Dict[str, Any], prebuilt: bool) -> bool:
+        """Make sure the model a test runs on is compiled.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test about to run
+            build_options: Build options of the test
+            prebuilt: Whether the testbench was already built with these options
+
+        Returns:
+            bool: True if the compiled model is there, False otherwise
+        """
+        if not prebuilt:
+            if not self.build(testbench, build_options):
+                logger.error(f"Cannot run test {test}: building testbench {testbench} failed")
+                return False
+            return True
+
+        # The compiled model is shared, so the run uses the testbench-level EDAM
+        edam_hash = self._edam_hash(self._prepare_edalize_config(testbench, options=build_options))
+        if self.build_cache.current(testbench) is None or self._configured_hash(testbench) != edam_hash:
+            logger.error(f"Cannot run test {test}: testbench {testbench} is not built for its current configuration")
             return False
+        return True
 
     def run(self, testbench: str, test: str, options: Optional[Dict[str, Any]] = None) -> bool:
         """Run a specific test for the given testbench using Edalize.
 
+        The test runs in its own directory under ``<work_root>/<testbench>/runs``
+        on top of the model compiled by :meth:`build`, so tests of the same
+        testbench can run concurrently. Unless the ``prebuilt`` option is set,
+        the testbench is built first. The simulation is started through the
+        Makefile Edalize generated, in its own process group, with its output
+        streamed to ``run.log`` in the run directory.
+
         Args:
             testbench: Name of the testbench
             test: Name of the test to run
@@ -159,38 +459,52 @@ class EdalizeIntegration(BuildSystemBase):
         Returns:
             bool: True if test run was successful, False otherwise
         """
+        options = dict(options or {})
+        prebuilt = options.pop("prebuilt", False)
+        run_name = options.pop("log_name", None) or (f"{test}.{options['seed']}" if "seed" in options else test)
+        timeout, inactivity_timeout = self.get_timeouts(testbench, test, options)
+        self._set_last_result(None)
+
         try:
-            backend = self._get_edalize_backend(testbench, test)
-
-            # Handle run options
-            run_options = {}
-
-            # Handle seed
-            if options and "seed" in options:
-                if self.tool == "vcs":
-                    run_options["ntb_random_seed"] = str(options["seed"])
-                elif self.tool == "questa":
-                    run_options["sv_seed"] = str(options["seed"])
-                elif self.tool == "xcelium":
-                    run_options["seed"] = str(options["seed"])
-
-            # Handle verbosity
-            if options and "verbosity" in options:
-                verbosity = options["verbosity"].upper()
-                if not verbosity.startswith("UVM_"):
-                    verbosity = f"UVM_{verbosity}"
-                run_options["UVM_VERBOSITY"] = verbosity
-
-            # Configure if needed
-            if not os.path.exists(os.path.join(self.work_root, testbench, "Makefile")):
-                logger.info(f"Configuring testbench {testbench} with {self.tool}")
-                backend.configure()
+            if not self._ensure_built(testbench, test, self.get_build_options(options), prebuilt):
+                return False
 
-            # Run the test
-            logger.info(f"Running test {test} for testbench {testbench} with {self.tool}")
-            backend.run(run_options)
+            run_dir = self._prepare_run_dir(testbench, run_name)
+            plusargs = self._get_run_plusargs(testbench, test, options)
+            variable = PLUSARG_VARIABLES.get(self.tool)
+            if variable:
+                # These Makefiles add the leading "+" themselves
+                plusargs = [arg[1:] if arg.startswith("+") else arg for arg in plusargs]
+            cmd = [self.make_command, "run", f"{variable or 'EXTRA_OPTIONS'}={' '.join(plusargs)}"]
 
+            # Run the test
+            logger.info(f"Running test {test} for testbench {testbench} with {self.tool} in {run_dir}")
+            licenses = self.get_licenses(testbench, "run", coverage=bool(options.get("coverage")))
+            with self.licenses.hold(licenses) as held:
+                if not held:
+                    logger.error(f"Cancelled while waiting for license token(s) {', '.join(licenses)}")
+                    return False
+                result = run_command(
+                    cmd,
+                    check=True,
+                    cwd=run_dir,
+                    log_path=os.path.join(run_dir, "run.log"),
+                    echo=options.get("verbose", False),
+                    tail_lines=self.log_tail_lines,
+                    watcher=create_log_watcher(self.config.get("log_watch")),
+                    timeout=timeout,
+                    inactivity_timeout=inactivity_timeout,
+                )
+            self._set_last_result(result)
             return True
+        except CommandError as e:
+            self._set_last_result(e.result)
+            if e.result.abort_reason:
+                logger.error(f"Test {test} for testbench {testbench} aborted: {e.result.abort_reason}")
+            logger.error(f"Test {test} for testbench {testbench} failed (full log: {e.result.log_path}):")
+            for line in e.result.tail:
+                logger.error(line)
+            return False
         except Exception as e:
             logger.error(f"Failed to run test {test} for testbench {testbench}: {e}")
             return False
@@ -205,6 +519,7 @@ class EdalizeIntegration(BuildSystemBase):
             bool: True if clean was successful, False otherwise
         """
         work_dir = os.path.join(self.work_root, testbench)
+        self.build_cache.invalidate(testbench)
 
         try:
             if os.path.exists(work_dir):
@@ -0,0 +1,183 @@
+"""Content fingerprints that let unchanged testbenches skip compilation."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from build_systems.state import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+RACY_WINDOW = 2.0
+
+
+class FileHashCache:
+    """Content hashes of source files, keyed by their stat results.
+
+    A file is only read again when its size, mtime or inode changed since it
+    was last hashed, so fingerprinting a large unchanged source tree costs one
+    ``stat`` per file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Create the cache.
+
+        Args:
+            path: JSON file the cache is persisted in; None keeps it in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[Any]]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, List[Any]]:
+        # Loaded on first use so commands that never fingerprint do not read it
+        if self._entries is None:
+            self._entries = load_json(self.path, {}) if self.path else {}
+        return self._entries
+
+    def hash_file(self, path: str) -> Optional[str]:
+        """Get the SHA-256 of a file's content.
+
+        Args:
+            path: File to hash
+
+        Returns:
+            Optional[str]: Hex digest, or None if the file does not exist
+        """
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+
+        with self._lock:
+            entry = self._load().get(path)
+        if entry and entry[:3] == signature:
+            return entry[3]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        # A file modified within the timestamp granularity could change again without
+        # its stat changing, so very recent files are hashed but not cached
+        if time.time() - st.st_mtime > RACY_WINDOW:
+            with self._lock:
+                self._load()[path] = signature + [content_hash]
+                self._dirty = True
+        return content_hash
+
+    def save(self) -> None:
+        """Persist the cache if any hash was added or changed."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = dict(self._load())
+            self._dirty = False
+        try:
+            save_json(self.path, entries)
+        except OSError as e:
+            logger.warning(f"Failed to save file hash cache: {e}")
+
+
+def expand_sources(paths: Iterable[str], base_dir: str = ".") -> List[str]:
+    """Expand source paths and include directories into a list of files.
+
+    Directories contribute the files directly inside them (include directories
+    hold the headers a compile depends on). ``+incdir+`` prefixes are removed.
+
+    Args:
+        paths: Files and directories from the configuration
+        base_dir: Directory relative paths are resolved against
+
+    Returns:
+        List[str]: Files in configuration order, without duplicates
+    """
+    files: List[str] = []
+    seen = set()
+    for entry in paths:
+        for path in str(entry).replace("+incdir+", " ").split():
+            path = os.path.join(base_dir, path)
+            if os.path.isdir(path):
+                candidates = sorted(os.path.join(path, name) for name in os.listdir(path))
+                candidates = [c for c in candidates if os.path.isfile(c)]
+            else:
+                candidates = [path]
+            for candidate in candidates:
+                candidate = os.path.normpath(candidate)
+                if candidate not in seen:
+                    seen.add(candidate)
+                    files.append(candidate)
+    return files
+
+
+def compute_fingerprint(settings: Dict[str, Any], files: Iterable[str], hash_cache: FileHashCache) -> str:
+    """Fingerprint a build from its settings and the content of its sources.
+
+    Args:
+        settings: Everything besides file content that affects the build
+            (simulator, defines, build options, file lists, ...)
+        files: Source files whose content affects the build
+        hash_cache: Cache used to avoid re-reading unchanged files
+
+    Returns:
+        str: Hex digest identifying the build inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    for path in files:
+        digest.update(f"\0{path}\0{hash_cache.hash_file(path)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Remembers the fingerprint of the last successful build of each testbench."""
+
+    def __init__(self, state_dir: str):
+        """Create the cache.
+
+        Args:
+            state_dir: Tester state directory
+        """
+        self.directory = os.path.join(state_dir, "builds")
+        self.hash_cache = FileHashCache(os.path.join(state_dir, "file_hashes.json"))
+
+    def _record_path(self, testbench: str) -> str:
+        return os.path.join(self.directory, f"{testbench}.json")
+
+    def fingerprint(self, settings: Dict[str, Any], files: Iterable[str]) -> str:
+        """Compute a build fingerprint and persist any newly hashed files."""
+        fingerprint = compute_fingerprint(settings, files, self.hash_cache)
+        self.hash_cache.save()
+        return fingerprint
+
+    def current(self, testbench: str) -> Optional[str]:
+        """Get the fingerprint of the last successful build, if any."""
+        return load_json(self._record_path(testbench), {}).get("fingerprint")
+
+    def is_current(self, testbench: str, fingerprint: str) -> bool:
+        """Check whether ``fingerprint`` matches the last successful build."""
+        return self.current(testbench) == fingerprint
+
+    def record(self, testbench: str, fingerprint: str) -> None:
+        """Remember ``fingerprint`` as the last successful build."""
+        try:
+            save_json(self._record_path(testbench), {"fingerprint": fingerprint})
+        except OSError as e:
+            logger.warning(f"Failed to record build fingerprint of {testbench}: {e}")
+
+    def invalidate(self, testbench: str) -> None:
+        """Forget the last build, e.g. after it was cleaned or failed."""
+        try:
+            os.unlink(self._record_path(testbench))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,175 @@
+"""Simulator license tokens shared by every tester process using the same lock directory."""
+
+import fcntl
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from build_systems import process
+from build_systems.state import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+# Build phases that hold license tokens
+PHASES = ("build", "run")
+
+# Token files held by this process. flock on NFS is emulated with POSIX locks,
+# which do not exclude other threads of the same process, so those are kept
+# apart here.
+_held_lock = threading.Lock()
+_held: Set[str] = set()
+
+
+class LicensePool:
+    """Counted license tokens per simulator feature, such as ``vcs`` or ``vcs_cov``.
+
+    A pool of N tokens is N lock files in the lock directory; holding a token
+    means holding an exclusive ``flock`` on one of them. The kernel drops the
+    lock when its process exits, so tokens of crashed or killed processes are
+    never lost, and every tester on the host (or on every host mounting the
+    lock directory over NFS) shares the same tokens.
+
+    The ``licenses`` config section sets the pools and which features a
+    compile and a simulation hold::
+
+        licenses:
+          lock_dir: /nfs/tools/tester_licenses  # default: <state dir>/licenses
+          pools: {vcs: 20, vcs_cov: 4}
+          build: [vcs]
+          run: [vcs]
+          coverage: [vcs_cov]  # held in addition while coverage is enabled
+
+    ``build``, ``run`` and ``coverage`` can be overridden per testbench in
+    ``testbenches.<tb>.licenses``. Without them, the pool named after the
+    simulator and, with coverage, the ``<simulator>_cov`` pool are used.
+    Features without a pool are not limited.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """Read the license settings.
+
+        Args:
+            config: Tester configuration
+        """
+        self.settings = config.get("licenses") or {}
+        self.testbenches = config.get("testbenches") or {}
+        self.pools = {str(name): int(count) for name, count in (self.settings.get("pools") or {}).items()}
+        self.lock_dir = self.settings.get("lock_dir") or os.path.join(get_state_dir(config), "licenses")
+        self.poll_interval = float(self.settings.get("poll_interval", 1.0))
+        self._holder = f"{socket.gethostname()} {os.getpid()}\n".encode()
+
+    def features(
+        self, testbench: str, phases: Iterable[str], coverage: bool = False, simulator: Optional[str] = None
+    ) -> List[str]:
+        """Get the features a command has to hold a token of.
+
+        Args:
+            testbench: Name of the testbench
+            phases: Build phases the command performs ("build", "run")
+            coverage: Whether coverage collection is enabled
+            simulator: Simulator whose pools are used by default
+
+        Returns:
+            List[str]: Names of the pools to take a token from
+        """
+        tb_settings = (self.testbenches.get(testbench) or {}).get("licenses") or {}
+        defaults = {phase: [simulator] for phase in PHASES}
+        defaults["coverage"] = [f"{simulator}_cov"]
+
+        features: List[str] = []
+        for key in list(phases) + (["coverage"] if coverage else []):
+            value = tb_settings.get(key, self.settings.get(key, defaults.get(key)))
+            features.extend([value] if isinstance(value, str) else value or [])
+        return sorted({feature for feature in features if feature in self.pools})
+
+    @contextmanager
+    def hold(self, features: Iterable[str]) -> Iterator[bool]:
+        """Hold one token of each feature for the duration of the block.
+
+        Waits as long as needed for the tokens. Either every token is taken
+        or none, so a command waiting for one feature never sits on another.
+
+        Args:
+            features: Names of the pools to take a token from
+
+        Yields:
+            bool: True once the tokens are held; False if the regression was
+            cancelled while waiting, in which case the command must not start
+        """
+        features = sorted(feature for feature in set(features) if feature in self.pools)
+        tokens = self._wait(features) if features else []
+        if tokens is None:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            self._release(tokens)
+
+    def _wait(self, features: List[str]) -> Optional[List[Tuple[str, int]]]:
+        """Take the tokens, retrying until they are free or the regression is cancelled."""
+        start = time.monotonic()
+        waiting = False
+        while not process.is_cancelled():
+            tokens = self._try_acquire(features)
+            if tokens is not None:
+                if waiting:
+                    logger.info(f"Got license token(s) {', '.join(features)} after {time.monotonic() - start:.0f}s")
+                return tokens
+            if not waiting:
+                logger.info(f"Waiting for license token(s) {', '.join(features)}")
+                waiting = True
+            process.wait_cancelled(self.poll_interval)
+        return None
+
+    def _try_acquire(self, features: List[str]) -> Optional[List[Tuple[str, int]]]:
+        tokens = []
+        for feature in features:
+            token = self._try_token(feature)
+            if token is None:
+                self._release(tokens)
+                return None
+            tokens.append(token)
+        return tokens
+
+    def _try_token(self, feature: str) -> Optional[Tuple[str, int]]:
+        """Lock a free token file of a pool without blocking."""
+        os.makedirs(self.lock_dir, exist_ok=True)
+        count = self.pools[feature]
+        # Starting at a random token spreads concurrent waiters over the files
+        first = random.randrange(count) if count else 0
+        for index in range(count):
+            path = os.path.join(self.lock_dir, f"{feature}.{(first + index) % count}.lock")
+            with _held_lock:
+                if path in _held:
+                    continue
+                _held.add(path)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                with _held_lock:
+                    _held.discard(path)
+                continue
+            # Record the holder, to find out who uses a seat
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, self._holder, 0)
+            return path, fd
+        return None
+
+    @staticmethod
+    def _release(tokens: List[Tuple[str, int]]) -> None:
+        for path, fd in tokens:
+            try:
+                os.ftruncate(fd, 0)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+                with _held_lock:
+                    _held.discard(path)
@@ -0,0 +1,78 @@
+"""Watchers that abort simulations as soon as their output shows they failed."""
+
+import re
+from typing import Any, Dict, Iterable, Optional
+
+# Message lines such as "UVM_FATAL @ 10: ..." but not the "UVM_FATAL :    0"
+# lines of the report summary printed at the end of every UVM simulation
+DEFAULT_FATAL_PATTERNS = (r"UVM_FATAL(?!\s*:\s*\d)",)
+DEFAULT_ERROR_PATTERNS = (r"UVM_ERROR(?!\s*:\s*\d)",)
+
+
+class LogWatcher:
+    """Scans simulator output line by line for reasons to stop the simulation.
+
+    A line matching a fatal pattern aborts right away; lines matching an
+    error pattern abort once ``max_errors`` of them were seen. A watcher
+    keeps count across lines, so every simulation needs its own instance.
+    """
+
+    def __init__(
+        self,
+        fatal_patterns: Iterable[str] = DEFAULT_FATAL_PATTERNS,
+        error_patterns: Iterable[str] = DEFAULT_ERROR_PATTERNS,
+        max_errors: Optional[int] = None,
+    ):
+        """Create a watcher.
+
+        Args:
+            fatal_patterns: Regular expressions of lines that end the simulation
+            error_patterns: Regular expressions of error lines that are counted
+            max_errors: Number of error lines that ends the simulation; None or 0 never aborts on errors
+        """
+        self.fatal_re = self._compile(fatal_patterns)
+        self.error_re = self._compile(error_patterns)
+        self.max_errors = max_errors or None
+        self.errors = 0
+
+    @staticmethod
+    def _compile(patterns: Iterable[str]):
+        patterns = list(patterns or [])
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+
+    def feed(self, line: str) -> Optional[str]:
+        """Check one line of output.
+
+        Args:
+            line: Output line without its newline
+
+        Returns:
+            Optional[str]: Why the simulation must be aborted, or None to let it continue
+        """
+        if self.fatal_re is not None and self.fatal_re.search(line):
+            return f"Fatal message: {line.strip()}"
+        if self.error_re is not None and self.error_re.search(line):
+            self.errors += 1
+            if self.max_errors is not None and self.errors >= self.max_errors:
+                return f"Error limit of {self.max_errors} reached: {line.strip()}"
+        return None
+
+
+def create_log_watcher(settings: Optional[Dict[str, Any]]) -> Optional[LogWatcher]:
+    """Create a watcher from the ``log_watch`` configuration section.
+
+    Args:
+        settings: ``enabled`` (default True), ``fatal_patterns``,
+            ``error_patterns`` and ``max_errors``
+
+    Returns:
+        Optional[LogWatcher]: A new watcher, or None if watching is disabled
+    """
+    settings = settings or {}
+    if not settings.get("enabled", True):
+        return None
+    return LogWatcher(
+        fatal_patterns=settings.get("fatal_patterns", DEFAULT_FATAL_PATTERNS),
+        error_patterns=settings.get("error_patterns", DEFAULT_ERROR_PATTERNS),
+        max_errors=settings.get("max_errors"),
+    )
@@ -3,13 +3,25 @@ import os
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from build_systems.base import BuildSystemBase
+from build_systems.coverage import get_coverage_settings
+from build_systems.fingerprint import BuildCache, expand_sources
+from build_systems.log_watch import LogWatcher, create_log_watcher
+from build_systems.makefile.discovery import DiscoveryIndex
 from build_systems.makefile.templates import MakefileTemplateFactory
+from build_systems.process import CommandError, run_command
+from build_systems.state import get_state_dir
 
 logger = logging.getLogger(__name__)
 
+# Options that control the tester itself and must not be passed to make
+INTERNAL_OPTIONS = {"verbose", "prebuilt", "log_name"}
+
+# Make variables that only affect running a test and therefore not the build fingerprint
+RUN_VARIABLES = {"TEST", "SEED", "VERBOSITY", "RUNTIME_ARGS", "COVERAGE_DB"}
+
 
 class MakefileBuildSystem(BuildSystemBase):
     """Build system implementation that uses Makefiles."""
@@ -27,11 +39,19 @@ class MakefileBuildSystem(BuildSystemBase):
         self.use_custom_makefile = config.get("use_custom_makefile", True)
         self.template_config = config.get("template_config", {})
         self.generated_makefile_path = config.get("generated_makefile_path")
+        self.log_dir = config.get("log_dir", "logs")
+        self.log_tail_lines = config.get("log_tail_lines", 100)
+        self.build_cache = BuildCache(get_state_dir(config))
+        self.simulator = self.simulator or self.template_config.get("simulator")
 
         # Generate Makefile if needed
         if not self.use_custom_makefile:
             self._generate_makefile()
 
+        self.discovery = DiscoveryIndex(
+            self.make_command, self.makefile_path, os.path.join(get_state_dir(config), "discovery.json")
+        )
+
     def _generate_makefile(self) -> None:
         """Generate a Makefile from template."""
         if not self.generated_makefile_path:
@@ -48,49 +68,186 @@ class MakefileBuildSystem(BuildSystemBase):
 
             # Update makefile_path to use the generated makefile
             self.makefile_path = os.path.dirname(self.generated_makefile_path)
-            logger.info(f"Generated Makefile at {self.generated_makefile_path}")
         except Exception as e:
             logger.error(f"Failed to generate Makefile: {e}")
             raise
 
-    def _run_make_command(self, target: str, options: Optional[Dict[str, Any]] = None) -> bool:
+    def _get_log_path(self, target: str, options: Dict[str, Any]) -> str:
+        """Get the log file for a make invocation.
+
+        Args:
+            target: Make target being run
+            options: Make options of the invocation
+
+        Returns:
+            str: ``<log_dir>/<testbench>/<log_name>.log``
+        """
+        testbench = options.get("TESTBENCH", "_")
+        log_name = options.get("log_name") or target
+        return os.path.join(self.log_dir, testbench, f"{log_name}.log")
+
+    def _run_make_command(
+        self,
+        target: str,
+        options: Optional[Dict[str, Any]] = None,
+        watcher: Optional[LogWatcher] = None,
+        timeouts: Tuple[Optional[float], Optional[float]] = (None, None),
+        licenses: Sequence[str] = (),
+    ) -> bool:
         """Run a make command with the given target and options.
 
+        The output is streamed to a per-command log file; only its tail is kept
+        in memory and reported when the command fails.
+
         Args:
             target: Make target to run
             options: Additional make options as variable=value pairs
+            watcher: Optional log watcher that aborts the command on fatal output
+            timeouts: Wall-clock and inactivity limits in seconds (see ``get_timeouts``)
+            licenses: License features to hold a token of while make runs (see ``get_licenses``)
 
         Returns:
             bool: True if command was successful, False otherwise
         """
         cmd = [self.make_command, "-C", self.makefile_path, target]
 
-        if options:
-            for key, value in options.items():
+        options = options or {}
+        for key, value in options.items():
+            if key not in INTERNAL_OPTIONS:
                 cmd.append(f"{key}={value}")
 
         logger.debug(f"Running command: {' '.join(cmd)}")
+        log_path = self._get_log_path(target, options)
 
         try:
-            # Check if verbose mode is enabled
-            verbose = options.get("verbose", False)
+            # The output is echoed to the console in verbose mode. The command runs in
+            # its own process group so a cancelled regression can kill make together
+            # with the simulator it spawned. Waiting for a license does not count
+            # towards the timeouts.
+            with self.licenses.hold(licenses) as held:
+                if not held:
+                    logger.error(f"Cancelled while waiting for license token(s) {', '.join(licenses)}")
+                    self._set_last_result(None)
+                    return False
+                result = run_command(
+                    cmd,
+                    check=True,
+                    log_path=log_path,
+                    echo=options.get("verbose", False),
+                    tail_lines=self.log_tail_lines,
+                    watcher=watcher,
+                    timeout=timeouts[0],
+                    inactivity_timeout=timeouts[1],
+                )
+            self._set_last_result(result)
+            return True
+        except CommandError as e:
+            self._set_last_result(e.result)
+            if e.result.abort_reason:
+                logger.error(f"Make command aborted: {e.result.abort_reason}")
+            else:
+                logger.error(f"Make command failed: {e}")
+            # Always show the end of the output even in non-verbose mode
+            if e.result.tail:
+                logger.error(f"Output (last {len(e.result.tail)} lines, full log in {log_path}):\n{e.result.output}")
+            return False
+        except OSError as e:
+            logger.error(f"Failed to start make: {e}")
+            return False
+
+    def _get_build_fingerprint(self, testbench: str, target: str, options: Dict[str, Any]) -> Optional[str]:
+        """Fingerprint the inputs of a testbench build.
+
+        Covers the source and testbench files, include directories, defines,
+        simulator and build options from ``template_config``, the make variables
+        of the build and the content of every source file and of the Makefile.
+
+        Args:
+            testbench: Name of the testbench
+            target: Make target that builds it
+            options: Make options of the build
+
+        Returns:
+            Optional[str]: The fingerprint, or None if no source files are configured
+                and the build must therefore always run
+        """
+        template_config = self.template_config or {}
+        tb_config = template_config.get("testbenches", {}).get(testbench) or {}
+        sources, includes = self._get_sources(testbench)
+        if not sources:
+            return None
+
+        settings = {
+            "testbench": testbench,
+            "target": target,
+            "simulator": template_config.get("simulator"),
+            "defines": [template_config.get("defines"), tb_config.get("defines")],
+            "compile_flags": template_config.get("compile_flags"),
+            "build_options": template_config.get("build_options"),
+            "sources": sources,
+            "includes": includes,
+            "make": {key: value for key, value in options.items() if key not in INTERNAL_OPTIONS and key not in RUN_VARIABLES},
+        }
+        return self.build_cache.fingerprint(settings, expand_sources(sources + includes + [self._get_makefile()]))
+
+    def _get_build_dir(self, testbench: str) -> str:
+        """Get the directory the build of a testbench compiles into.
+
+        Set by ``build_dir`` in the testbench's ``targets`` entry or at the top
+        level, with ``{testbench}`` replaced and relative to the Makefile
+        directory; defaults to ``BUILD_DIR`` of the generated Makefile.
 
-            if verbose:
-                # Run with output displayed to console
-                result = subprocess.run(cmd, check=True)
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            str: Path of the build directory
+        """
+        build_dir = self.config.get("targets", {}).get(testbench, {}).get("build_dir") or self.config.get("build_dir")
+        if not build_dir:
+            if self.template_type.lower() == "riviera-pro":
+                build_dir = (self.template_config or {}).get("directories", {}).get("build", "build")
             else:
-                # Capture output (original behavior)
-                result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                build_dir = os.path.join("sim", "build", "{testbench}")
+        return os.path.join(self.makefile_path, build_dir.format(testbench=testbench))
 
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Make command failed: {e}")
-            # Always show error output even in non-verbose mode
-            if hasattr(e, "stdout") and e.stdout:
-                logger.error(f"Stdout: {e.stdout.decode('utf-8')}")
-            if hasattr(e, "stderr") and e.stderr:
-                logger.error(f"Stderr: {e.stderr.decode('utf-8')}")
-            return False
+    def _get_sources(self, testbench: str) -> Tuple[List[str], List[str]]:
+        """Get the source files and the include directories of a testbench from ``template_config``."""
+        template_config = self.template_config or {}
+        tb_config = template_config.get("testbenches", {}).get(testbench) or {}
+        sources = list(template_config.get("src_files", [])) + list(template_config.get("tb_files", []))
+        sources += list(tb_config.get("files", []))
+        includes = list(template_config.get("includes", [])) + list(tb_config.get("includes", []))
+        return sources, includes
+
+    def _get_makefile(self) -> str:
+        return self.generated_makefile_path or os.path.join(self.makefile_path, "Makefile")
+
+    def get_dependencies(self, testbench: str) -> Optional[List[str]]:
+        """Get the files and directories the build of a testbench reads.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[List[str]]: The source and testbench files, include directories
+                and the Makefile, or None if no source files are configured
+        """
+        sources, includes = self._get_sources(testbench)
+        if not sources:
+            return None
+        return sources + includes + [self._get_makefile()]
+
+    def get_build_fingerprint(self, testbench: str) -> Optional[str]:
+        """Get the fingerprint of the last successful build of a testbench.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            Optional[str]: The fingerprint, or None if the build is not tracked
+        """
+        return self.build_cache.current(testbench)
 
     def build(self, testbench: str, options: Optional[Dict[str, Any]] = None) -> bool:
         """Build the testbench using make.
@@ -104,13 +261,19 @@ class MakefileBuildSystem(BuildSystemBase):
         """
         build_options = options or {}
         build_options["TESTBENCH"] = testbench
+        build_options["log_name"] = "build"
 
         # Handle debug mode
         if "debug" in build_options:
             build_options["DEBUG"] = "1" if build_options.pop("debug") else "0"
 
+        # Handle coverage instrumentation
+        if "coverage" in build_options:
+            build_options["COVERAGE"] = "1" if build_options.pop("coverage") else "0"
+
         # Handle incremental build
-        if "incremental" in build_options and not build_options.pop("incremental"):
+        clean_build = "incremental" in build_options and not build_options.pop("incremental")
+        if clean_build:
             logger.info(f"Performing clean build for testbench {testbench}")
             self.clean(testbench)
 
@@ -128,13 +291,30 @@ class MakefileBuildSystem(BuildSystemBase):
             parts = custom_cmd.split()
             if len(parts) > 1 and parts[0].lower() == "make":
                 target = parts[1]
-                return self._run_make_command(target, build_options)
             else:
                 logger.error(f"Invalid build command format: {custom_cmd}")
                 return False
         else:
             # Use default "build" target
-            return self._run_make_command("build", build_options)
+            target = "build"
+
+        # Skip the compile entirely when nothing changed since the last successful build
+        fingerprint = self._get_build_fingerprint(testbench, target, build_options)
+        if fingerprint and not clean_build and self.build_cache.is_current(testbench, fingerprint):
+            build_dir = self._get_build_dir(testbench)
+            if os.path.isdir(build_dir):
+                logger.info(f"Testbench {testbench} is up to date, skipping build")
+                self._set_last_result(None)
+                return True
+            logger.info(f"Build directory {build_dir} of testbench {testbench} is gone, rebuilding")
+
+        licenses = self.get_licenses(testbench, "build", coverage=build_options.get("COVERAGE") == "1")
+        if not self._run_make_command(target, build_options, licenses=licenses):
+            self.build_cache.invalidate(testbench)
+            return False
+        if fingerprint:
+            self.build_cache.record(testbench, fingerprint)
+        return True
 
     def run(self, testbench: str, test: str, options: Optional[Dict[str, Any]] = None) -> bool:
         """Run a specific test for the given testbench using make.
@@ -150,6 +330,12 @@ class MakefileBuildSystem(BuildSystemBase):
         run_options = options or {}
         run_options["TESTBENCH"] = testbench
         run_options["TEST"] = test
+        prebuilt = run_options.pop("prebuilt", False)
+        log_name = run_options.pop("log_name", None)
+        timeouts = self.get_timeouts(testbench, test, run_options)
+        for key in self.TIMEOUT_SETTINGS:
+            run_options.pop(key, None)
+        self._set_last_result(None)
 
         # Handle debug mode
         if "debug" in run_options:
@@ -175,11 +361,18 @@ class MakefileBuildSystem(BuildSystemBase):
             runtime_args = run_options.pop("runtime_args")
             run_options["RUNTIME_ARGS"] = " ".join(runtime_args)
 
+        # Every seed of a test gets its own log file
+        if not log_name:
+            log_name = f"{test}.{run_options['SEED']}" if "SEED" in run_options else test
+
         # Check if testbench has a separate build command
         targets = self.config.get("targets", {})
         testbench_config = targets.get(testbench, {})
 
-        if "build_command" in testbench_config:
+        if prebuilt:
+            # The regression already built this testbench with the same build options
+            logger.debug(f"Using existing build of testbench {testbench}")
+        elif "build_command" in testbench_config:
             # If there's a build command, run build first
             logger.info(f"Building testbench {testbench} before running test")
             if not self.build(testbench, run_options):
@@ -189,6 +382,16 @@ class MakefileBuildSystem(BuildSystemBase):
             # No build command - assume run command handles both build and run
             logger.info(f"No separate build command for {testbench}, assuming run command handles build")
 
+        run_options["log_name"] = log_name
+        # Every run writes its own coverage database, for the regression to merge
+        run_options.update(self._get_coverage_variables(testbench, test, run_options))
+
+        # Stop the simulation as soon as its output shows it failed
+        watcher = create_log_watcher(self.config.get("log_watch"))
+        # A combined run command also compiles, so it needs the build licenses too
+        phases = ("run",) if prebuilt or "build_command" in testbench_config else ("build", "run")
+        licenses = self.get_licenses(testbench, *phases, coverage=run_options.get("COVERAGE") == "1")
+
         # Check if testbench has a custom run command
         if "run_command" in testbench_config:
             # Use the custom run command
@@ -200,13 +403,61 @@ class MakefileBuildSystem(BuildSystemBase):
             parts = custom_cmd.split()
             if len(parts) > 1 and parts[0].lower() == "make":
                 target = parts[1]
-                return self._run_make_command(target, run_options)
+                return self._run_make_command(target, run_options, watcher, timeouts, licenses)
             else:
                 logger.error(f"Invalid run command format: {custom_cmd}")
                 return False
         else:
             # Use default "run" target
-            return self._run_make_command("run", run_options)
+            return self._run_make_command("run", run_options, watcher, timeouts, licenses)
+
+    def _get_coverage_path(self, testbench: str, test: str, log_name: str) -> str:
+        """Get the ``COVERAGE_DB`` of a run, in the generated Makefile's ``$(RESULTS_DIR)/coverage``.
+
+        The results directory is ``coverage.results_dir``, by default the
+        ``sim/results`` directory next to the Makefile.
+        """
+        settings = get_coverage_settings(self.config, self.simulator)
+        results_dir = settings.get("results_dir") or os.path.join(self.makefile_path, "sim", "results")
+        return os.path.abspath(os.path.join(results_dir, testbench, test, "coverage", f"{log_name}{settings['suffix']}"))
+
+    def _get_coverage_variables(self, testbench: str, test: str, run_options: Dict[str, Any]) -> Dict[str, str]:
+        """Get the ``COVERAGE_DB`` make variable of a run that collects coverage."""
+        if run_options.get("COVERAGE") != "1":
+            return {}
+        return {"COVERAGE_DB": self._get_coverage_path(testbench, test, run_options["log_name"])}
+
+    def get_coverage_database(self, testbench: str, test: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Get the coverage database a test run writes.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            options: Run options of the test
+
+        Returns:
+            Optional[str]: Path of the database, or None without coverage
+        """
+        options = options or {}
+        if not options.get("coverage"):
+            return None
+        log_name = options.get("log_name") or (f"{test}.{options['seed']}" if "seed" in options else test)
+        path = self._get_coverage_path(testbench, test, log_name)
+        return get_coverage_settings(self.config, self.simulator)["database"].format(path=path)
+
+    def needs_build(self, testbench: str) -> bool:
+        """Check whether the testbench has a separate build command.
+
+        Testbenches without a ``build_command`` target rely on their run command to
+        build, so there is nothing a regression could build up front.
+
+        Args:
+            testbench: Name of the testbench
+
+        Returns:
+            bool: True if the testbench has a separate build command
+        """
+        return "build_command" in self.config.get("targets", {}).get(testbench, {})
 
     def clean(self, testbench: str) -> bool:
         """Clean the testbench using make clean.
@@ -219,16 +470,30 @@ class MakefileBuildSystem(BuildSystemBase):
         """
         clean_options = {"TESTBENCH": testbench}
 
+        # The build is gone, so its fingerprint must not skip the next build
+        if testbench:
+            self.build_cache.invalidate(testbench)
         return self._run_make_command("clean", clean_options)
 
     def get_available_testbenches(self) -> List[str]:
         """Get a list of available testbenches from Makefile.
 
+        Results come from the cached discovery index, which only runs make
+        again when the Makefile changed.
+
         Returns:
             List[str]: List of testbench names
         """
-        # This implementation assumes there's a make target 'list-testbenches'
-        # that outputs available testbenches one per line
+        try:
+            index = self.discovery.load()
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to get testbenches: {e}")
+            return []
+        if index is not None:
+            return list(index)
+
+        # Without a Makefile to key the index on, ask make directly. This assumes
+        # there's a make target 'list-testbenches' that outputs one testbench per line
         cmd = [self.make_command, "-C", self.makefile_path, "list-testbenches"]
 
         try:
@@ -242,14 +507,28 @@ class MakefileBuildSystem(BuildSystemBase):
     def get_available_tests(self, testbench: str) -> List[str]:
         """Get a list of available tests for a testbench from Makefile.
 
+        Results come from the cached discovery index, which only runs make
+        again when the Makefile changed.
+
         Args:
             testbench: Name of the testbench
 
         Returns:
             List[str]: List of test names
         """
-        # This implementation assumes there's a make target 'list-tests'
-        # that outputs available tests one per line
+        try:
+            index = self.discovery.load()
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to get tests for {testbench}: {e}")
+            return []
+        if index is not None:
+            if testbench not in index:
+                logger.error(f"Unknown testbench: {testbench}")
+                return []
+            return list(index[testbench])
+
+        # Without a Makefile to key the index on, ask make directly. This assumes
+        # there's a make target 'list-tests' that outputs one test per line
         cmd = [self.make_command, "-C", self.makefile_path, "list-tests", f"TESTBENCH={testbench}"]
 
         try:
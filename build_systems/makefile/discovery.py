@@ -0,0 +1,139 @@
+"""Cached discovery of the testbenches and tests a Makefile provides."""
+
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+from typing import Dict, List, Optional
+
+from build_systems.state import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+MAKEFILE_NAMES = ("GNUmakefile", "makefile", "Makefile")
+
+
+def find_makefile(directory: str) -> Optional[str]:
+    """Find the Makefile ``make -C directory`` would read.
+
+    Args:
+        directory: Directory make runs in
+
+    Returns:
+        Optional[str]: Path of the Makefile, or None if there is none
+    """
+    for name in MAKEFILE_NAMES:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class DiscoveryIndex:
+    """Testbenches and tests of a Makefile, cached across invocations.
+
+    The index is keyed by the Makefile's path, mtime, size and content hash.
+    While the Makefile is unchanged every lookup is a dictionary read; when it
+    changed, one ``make list-all`` invocation dumps all testbenches and their
+    tests at once. Makefiles without a ``list-all`` target are queried with
+    ``list-testbenches`` and ``list-tests`` once and then cached the same way.
+    """
+
+    def __init__(self, make_command: str, makefile_dir: str, index_path: str):
+        """Create the index.
+
+        Args:
+            make_command: Make executable
+            makefile_dir: Directory containing the Makefile
+            index_path: JSON file the index is persisted in
+        """
+        self.make_command = make_command
+        self.makefile_dir = makefile_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._index: Optional[Dict] = None
+        self._testbenches: Dict[str, List[str]] = {}
+
+    def _make(self, *args: str) -> List[str]:
+        cmd = [self.make_command, "-C", self.makefile_dir, "--no-print-directory", *args]
+        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        lines = result.stdout.decode("utf-8", errors="replace").strip().split("\n")
+        return [line.strip() for line in lines if line.strip()]
+
+    def _query(self) -> Dict[str, List[str]]:
+        """Ask make for every testbench and its tests."""
+        try:
+            testbenches: Dict[str, List[str]] = {}
+            for line in self._make("list-all"):
+                name, _, tests = line.partition(":")
+                testbenches[name.strip()] = tests.split()
+            return testbenches
+        except subprocess.CalledProcessError:
+            logger.debug("Makefile has no list-all target, listing testbenches one by one")
+
+        testbenches = {}
+        for name in self._make("list-testbenches"):
+            try:
+                testbenches[name] = self._make("list-tests", f"TESTBENCH={name}")
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Failed to get tests for {name}: {e}")
+                testbenches[name] = []
+        return testbenches
+
+    def _is_current(self, index: Optional[Dict], makefile: str, st: os.stat_result) -> bool:
+        if not index or index.get("makefile") != os.path.abspath(makefile):
+            return False
+        if index.get("mtime_ns") == st.st_mtime_ns and index.get("size") == st.st_size:
+            return True
+        # Touched but unchanged Makefiles keep their index
+        if index.get("sha256") == _hash_file(makefile):
+            index["mtime_ns"] = st.st_mtime_ns
+            index["size"] = st.st_size
+            self._save(index)
+            return True
+        return False
+
+    def _save(self, index: Dict) -> None:
+        try:
+            save_json(self.index_path, index)
+        except OSError as e:
+            logger.warning(f"Failed to save testbench discovery index: {e}")
+
+    def load(self) -> Optional[Dict[str, List[str]]]:
+        """Get the testbench to tests mapping, refreshing it when the Makefile changed.
+
+        Returns:
+            Optional[Dict[str, List[str]]]: Tests per testbench in Makefile order,
+                or None if there is no Makefile to key the index on
+
+        Raises:
+            subprocess.CalledProcessError: If the testbenches cannot be listed
+        """
+        makefile = find_makefile(self.makefile_dir)
+        if makefile is None:
+            return None
+        st = os.stat(makefile)
+
+        with self._lock:
+            index = self._index if self._index is not None else load_json(self.index_path)
+            if not self._is_current(index, makefile, st):
+                logger.debug(f"Refreshing testbench discovery index for {makefile}")
+                index = {
+                    "makefile": os.path.abspath(makefile),
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "sha256": _hash_file(makefile),
+                    # Pairs rather than a mapping so the Makefile order survives JSON
+                    "testbenches": [[name, tests] for name, tests in self._query().items()],
+                }
+                self._save(index)
+            if index is not self._index:
+                self._index = index
+                self._testbenches = {name: tests for name, tests in index["testbenches"]}
+            return self._testbenches
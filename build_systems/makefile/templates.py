@@ -1,7 +1,8 @@
 import logging
-import os
 from typing import Any, Dict, List, Optional
 
+from build_systems.state import write_if_changed
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,6 +21,10 @@ class MakefileTemplate:
     def generate(self, output_path: Optional[str] = None) -> str:
         """Generate the Makefile content.
 
+        The file at ``output_path`` is only replaced, atomically, when its
+        content differs, so regenerating an unchanged Makefile keeps its mtime
+        and concurrent tester processes never read a partially written file.
+
         Args:
             output_path: Optional path to write the Makefile
 
@@ -29,10 +34,10 @@ class MakefileTemplate:
         content = self._generate_content()
 
         if output_path:
-            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
-            with open(output_path, "w") as f:
-                f.write(content)
-            logger.info(f"Generated Makefile at {output_path}")
+            if write_if_changed(output_path, content):
+                logger.info(f"Generated Makefile at {output_path}")
+            else:
+                logger.debug(f"Makefile at {output_path} is up to date")
 
         return content
 
@@ -81,6 +86,8 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "SIM_DIR ?= ./sim",
             "BUILD_DIR ?= $(SIM_DIR)/build/$(TESTBENCH)",
             "RESULTS_DIR ?= $(SIM_DIR)/results/$(TESTBENCH)/$(TEST)",
+            "# Coverage database of one run, set per run by the tester",
+            "COVERAGE_DB ?= $(RESULTS_DIR)/coverage/$(TEST).$(SEED)$(COVERAGE_DB_SUFFIX)",
             "",
             "# Include paths",
         ]
@@ -130,7 +137,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
             [
                 "",
                 "# Common targets",
-                ".PHONY: all build run clean help list-testbenches list-tests",
+                ".PHONY: all build run clean help list-testbenches list-tests list-all",
                 "",
                 "all: build run",
                 "",
@@ -139,7 +146,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
                 "\t$(BUILD_CMD)",
                 "",
                 "run:",
-                "\t@mkdir -p $(RESULTS_DIR)",
+                "\t@mkdir -p $(RESULTS_DIR) $(dir $(COVERAGE_DB))",
                 "\t$(RUN_CMD)",
                 "",
                 "clean:",
@@ -153,6 +160,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
                 '\t@echo "  make clean TESTBENCH=<testbench>"',
                 '\t@echo "  make list-testbenches"',
                 '\t@echo "  make list-tests TESTBENCH=<testbench>"',
+                '\t@echo "  make list-all"',
                 "",
             ]
         )
@@ -169,6 +177,14 @@ class UVMTestbenchMakefile(MakefileTemplate):
 
         content.append("")
 
+        # Add combined discovery target, one "testbench: tests..." line per testbench
+        content.append("list-all:")
+        for tb_name, tb_data in testbenches.items():
+            tests = " ".join(tb_data.get("tests") or [])
+            content.append(f'\t@echo "{tb_name}: {tests}"')
+
+        content.append("")
+
         # Add tests discovery target (uses conditional logic)
         content.extend(
             [
@@ -215,6 +231,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
             f"  VCS_HOME ?= {vcs_home}",
             "  VCS = $(VCS_HOME)/bin/vcs",
             "  SIMV = $(BUILD_DIR)/simv",
+            "  COVERAGE_DB_SUFFIX = .vdb",
             "",
             "  # Debug settings",
             "  ifeq ($(DEBUG),1)",
@@ -242,7 +259,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "            +UVM_TESTNAME=$(TEST) \\",
             "            +UVM_VERBOSITY=$(VERBOSITY) \\",
             "            +ntb_random_seed=$(SEED) \\",
-            "            $(if $(COVERAGE),,-cm_dir $(RESULTS_DIR)/coverage)",
+            "            $(if $(COVERAGE_ARGS),$(COVERAGE_ARGS) -cm_dir $(COVERAGE_DB) -cm_name $(TEST).$(SEED))",
             "endif",
         ]
 
@@ -271,6 +288,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "  VSIM = $(QUESTA_HOME)/bin/vsim",
             "  VLIB = $(QUESTA_HOME)/bin/vlib",
             "  VMAP = $(QUESTA_HOME)/bin/vmap",
+            "  COVERAGE_DB_SUFFIX = .ucdb",
             "",
             "  # Debug settings",
             "  ifeq ($(DEBUG),1)",
@@ -282,8 +300,10 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "  # Coverage settings",
             "  ifeq ($(COVERAGE),1)",
             f"    COVERAGE_ARGS = {coverage_args}",
+            "    RUN_DO = coverage save -onexit $(abspath $(COVERAGE_DB)); run -all; quit -f",
             "  else",
             "    COVERAGE_ARGS =",
+            "    RUN_DO = run -all; quit -f",
             "  endif",
             "",
             "  # Build command",
@@ -300,13 +320,13 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "",
             "  # Run command",
             "  RUN_CMD = cd $(BUILD_DIR) && \\",
-            '           $(VSIM) -batch -do "run -all; quit -f" \\',
+            '           $(VSIM) -batch -do "$(RUN_DO)" \\',
             "           -l $(RESULTS_DIR)/sim.log \\",
             "           work.top \\",
             "           +UVM_TESTNAME=$(TEST) \\",
             "           +UVM_VERBOSITY=$(VERBOSITY) \\",
             "           -sv_seed $(SEED) \\",
-            "           $(if $(COVERAGE),-coverage)",
+            "           $(if $(COVERAGE_ARGS),-coverage)",
             "endif",
         ]
 
@@ -332,6 +352,7 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "ifeq ($(SIMULATOR),xcelium)",
             f"  XCELIUM_HOME ?= {xcelium_home}",
             "  XRUN = $(XCELIUM_HOME)/bin/xrun",
+            "  COVERAGE_DB_SUFFIX =",
             "",
             "  # Debug settings",
             "  ifeq ($(DEBUG),1)",
@@ -361,7 +382,8 @@ class UVMTestbenchMakefile(MakefileTemplate):
             "           -l $(RESULTS_DIR)/sim.log \\",
             "           +UVM_TESTNAME=$(TEST) \\",
             "           +UVM_VERBOSITY=$(VERBOSITY) \\",
-            "           -svseed $(SEED)",
+            "           -svseed $(SEED) \\",
+            "           $(if $(COVERAGE_ARGS),-covworkdir $(COVERAGE_DB) -covscope tester -covtest run -covoverwrite)",
             "endif",
         ]
 
@@ -416,7 +438,7 @@ class RivieraProMakefile(MakefileTemplate):
             "VERBOSITY ?= UVM_MEDIUM",
             "",
             "# Targets",
-            ".PHONY: build run clean list-testbenches list-tests",
+            ".PHONY: build run clean list-testbenches list-tests list-all",
             "",
             "build:",
             "\t@mkdir -p $(BUILD_DIR)",
@@ -440,10 +462,14 @@ class RivieraProMakefile(MakefileTemplate):
         for tb in self.config.get("template_config", {}).get("testbenches", {}):
             content.append(f'\t@echo "{tb}"')
 
+        testbenches = self.config.get("template_config", {}).get("testbenches", {})
+        content.extend(["", "list-all:"])
+        for tb_name, tb_data in testbenches.items():
+            content.append(f'\t@echo "{tb_name}: {" ".join(tb_data.get("tests", []))}"')
+
         content.extend(["", "list-tests:", '\t@case "$(TESTBENCH)" in \\'])
 
         # Add tests for each testbench
-        testbenches = self.config.get("template_config", {}).get("testbenches", {})
         for tb_name, tb_data in testbenches.items():
             content.append(f"\t\t{tb_name}) \\")
             if "tests" in tb_data:
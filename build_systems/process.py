@@ -0,0 +1,516 @@
+"""Subprocess helpers shared by the build systems.
+
+Every simulator, compiler or make invocation is started in its own process
+group so the whole tree (make, the simulator and anything they spawn) can be
+killed at once when a regression is cancelled.
+"""
+
+import codecs
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 64 * 1024
+DEFAULT_TAIL_LINES = 100
+
+# Resources measured for every command, see CommandResult.usage
+USAGE_FIELDS = ("cpu_user", "cpu_system", "max_rss", "read_bytes", "write_bytes")
+RSS_SAMPLE_INTERVAL = 1.0
+
+_active_lock = threading.Lock()
+_active: List[subprocess.Popen] = []
+_cancelled = threading.Event()
+
+
+def _register(proc: subprocess.Popen) -> None:
+    """Track a started process group, killing it at once if commands were cancelled meanwhile."""
+    with _active_lock:
+        _active.append(proc)
+        # terminate_all() sets the flag before taking its snapshot, so a group
+        # started in between is either in that snapshot or killed here
+        if _cancelled.is_set():
+            kill_process_group(proc, signal.SIGKILL)
+
+
+def _unregister(proc: subprocess.Popen) -> None:
+    with _active_lock:
+        if proc in _active:
+            _active.remove(proc)
+
+
+def kill_process_group(proc: subprocess.Popen, sig: int = signal.SIGTERM) -> None:
+    """Send a signal to the process group led by ``proc``.
+
+    Args:
+        proc: Process started with ``start_new_session=True``
+        sig: Signal to send
+    """
+    # The group may outlive its leader (e.g. backgrounded grandchildren), so it is
+    # signalled even when ``proc`` itself has already exited
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_all(grace_period: float = 5.0) -> int:
+    """Kill the process groups of every running command.
+
+    Sends SIGTERM to each group, waits up to ``grace_period`` seconds for them
+    to exit and then sends SIGKILL to whatever is left in the group. Commands started after this
+    call are refused until :func:`reset` is called.
+
+    Args:
+        grace_period: Seconds to wait between SIGTERM and SIGKILL
+
+    Returns:
+        int: Number of process groups that were signalled
+    """
+    _cancelled.set()
+    with _active_lock:
+        procs = list(_active)
+
+    for proc in procs:
+        kill_process_group(proc, signal.SIGTERM)
+
+    deadline = time.monotonic() + grace_period
+    for proc in procs:
+        remaining = max(0.0, deadline - time.monotonic())
+        try:
+            proc.wait(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            pass
+        # Anything left in the group after the grace period is killed outright
+        kill_process_group(proc, signal.SIGKILL)
+
+    if procs:
+        logger.warning(f"Terminated {len(procs)} running process group(s)")
+    return len(procs)
+
+
+def reset() -> None:
+    """Allow new commands to be started again after :func:`terminate_all`."""
+    _cancelled.clear()
+
+
+def is_cancelled() -> bool:
+    """Return True once :func:`terminate_all` has been called."""
+    return _cancelled.is_set()
+
+
+def wait_cancelled(timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for :func:`terminate_all` to be called.
+
+    Returns:
+        bool: True if commands were cancelled
+    """
+    return _cancelled.wait(timeout)
+
+
+class CommandResult:
+    """Outcome of a command run through :func:`run_command`.
+
+    Only the last lines of the output are kept in memory; the complete output
+    is in ``log_path`` when one was given.
+    """
+
+    __slots__ = ("cmd", "returncode", "tail", "log_path", "abort_reason", "timed_out", "usage")
+
+    def __init__(
+        self,
+        cmd: Sequence[str],
+        returncode: int,
+        tail: Sequence[str],
+        log_path: Optional[str] = None,
+        abort_reason: Optional[str] = None,
+        timed_out: bool = False,
+        usage: Optional[Dict[str, float]] = None,
+    ):
+        self.cmd = list(cmd)
+        self.returncode = returncode
+        self.tail = list(tail)
+        self.log_path = log_path
+        self.abort_reason = abort_reason
+        self.timed_out = timed_out
+        # Resources used by the command's process tree, keyed by USAGE_FIELDS
+        self.usage = usage or {}
+
+    @property
+    def success(self) -> bool:
+        """True if the command exited with status 0 and was not aborted by a log watcher."""
+        return self.returncode == 0 and self.abort_reason is None
+
+    @property
+    def output(self) -> str:
+        """The captured tail of the output as a single string."""
+        return "\n".join(self.tail)
+
+
+class CommandError(subprocess.CalledProcessError):
+    """Raised by :func:`run_command` when a checked command fails."""
+
+    def __init__(self, result: CommandResult):
+        super().__init__(result.returncode, result.cmd, output=result.output)
+        self.result = result
+
+    def __str__(self) -> str:
+        if self.result.abort_reason:
+            return f"Command '{' '.join(self.result.cmd)}' was aborted: {self.result.abort_reason}"
+        return super().__str__()
+
+
+def _read_io(pid: int) -> Dict[str, int]:
+    """Get the bytes a process read from and wrote to storage, or nothing if unknown."""
+    io = {}
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("read_bytes", "write_bytes"):
+                    io[name] = int(value)
+    except (OSError, ValueError):
+        pass
+    return io
+
+
+def _wait(proc: subprocess.Popen) -> Dict[str, float]:
+    """Wait for ``proc`` like ``Popen.wait`` and return the resources its process tree used.
+
+    ``wait4`` reports the CPU time and peak RSS of the child and of every
+    descendant it waited for, such as make's simulator. The I/O counters in
+    ``/proc/<pid>/io`` include those descendants as well, but are only there
+    until the child is reaped, so they are read while it is a zombie.
+    """
+    try:
+        io = {}
+        if hasattr(os, "waitid"):
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            io = _read_io(proc.pid)
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        # Already reaped by Popen, e.g. through a concurrent poll()
+        proc.wait()
+        return {}
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    # ru_maxrss is in kilobytes on Linux
+    usage = {"cpu_user": rusage.ru_utime, "cpu_system": rusage.ru_stime, "max_rss": rusage.ru_maxrss * 1024}
+    usage.update(io)
+    return usage
+
+
+def _with_group_rss(usage: Dict[str, float], group_rss: int) -> Dict[str, float]:
+    """Raise the peak RSS of ``usage`` to the sampled peak of its whole process group."""
+    if usage and group_rss > usage["max_rss"]:
+        # Several processes of the tree were at their peak at the same time
+        usage["max_rss"] = group_rss
+    return usage
+
+
+class _RssSampler:
+    """Samples the summed resident memory of the process groups of running commands.
+
+    ``wait4`` only knows the peak of the largest single process, while a make
+    running several simulators at once needs as much memory as all of them
+    together. One thread scans ``/proc`` for every running command, so the
+    cost does not grow with the number of commands.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._peaks: Dict[int, int] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def add(self, pgid: int) -> None:
+        """Start sampling a process group."""
+        if not os.path.isdir("/proc"):
+            return
+        with self._lock:
+            self._peaks[pgid] = 0
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def remove(self, pgid: int) -> int:
+        """Stop sampling a process group and return its peak RSS in bytes, 0 if never sampled."""
+        with self._lock:
+            return self._peaks.pop(pgid, 0)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                pgids = set(self._peaks)
+                if not pgids:
+                    self._wake.clear()
+            if not pgids:
+                self._wake.wait()
+                continue
+            totals = self._sample(pgids)
+            with self._lock:
+                for pgid, rss in totals.items():
+                    if pgid in self._peaks:
+                        self._peaks[pgid] = max(self._peaks[pgid], rss)
+            time.sleep(self.interval)
+
+    def _sample(self, pgids: Set[int]) -> Dict[int, int]:
+        totals = dict.fromkeys(pgids, 0)
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "rb") as f:
+                    # The command name may contain spaces and parentheses
+                    fields = f.read().rsplit(b")", 1)[1].split()
+                pgid, rss = int(fields[2]), int(fields[21])
+            except (OSError, IndexError, ValueError):
+                continue
+            if pgid in totals:
+                totals[pgid] += rss * self._page_size
+        return totals
+
+
+_rss_sampler = _RssSampler()
+
+
+def _split_lines(partial: str, text: str):
+    """Split decoded output into complete lines and the unterminated rest."""
+    lines = (partial + text).split("\n")
+    partial = lines.pop()
+    if len(partial) > MAX_LINE_LENGTH:
+        # A huge line without a newline must not grow without bound either
+        lines.append(partial[-MAX_LINE_LENGTH:])
+        partial = ""
+    return [line.rstrip("\r") for line in lines], partial
+
+
+def _pump_output(fd: int, tail: deque, log_file=None, echo: bool = False, on_line=None, on_output=None) -> None:
+    """Stream a child's output until EOF.
+
+    Raw bytes go to ``log_file`` unchanged. A decoded copy, with invalid UTF-8
+    replaced, feeds the bounded ``tail`` one line at a time, so memory use does
+    not depend on how much the child prints. ``on_line`` is called with every
+    complete line and ``on_output`` whenever anything was read.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    while True:
+        chunk = os.read(fd, CHUNK_SIZE)
+        if not chunk:
+            break
+        if on_output is not None:
+            on_output()
+        if log_file is not None:
+            log_file.write(chunk)
+        text = decoder.decode(chunk)
+        if echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        lines, partial = _split_lines(partial, text)
+        tail.extend(lines)
+        if on_line is not None:
+            for line in lines:
+                on_line(line)
+
+    partial += decoder.decode(b"", final=True)
+    if partial:
+        tail.append(partial.rstrip("\r"))
+        if on_line is not None:
+            on_line(partial.rstrip("\r"))
+
+
+class _OutputMonitor:
+    """Aborts a running command on a log watcher's verdict, a timeout or a silent hang.
+
+    Aborting sends SIGTERM to the whole process group right away and SIGKILL
+    if the group is still alive after the grace period. Timeouts are checked
+    by a watchdog thread because a hung command produces no output that could
+    trigger a check.
+    """
+
+    def __init__(
+        self,
+        proc: subprocess.Popen,
+        watcher=None,
+        kill_grace_period: float = 5.0,
+        timeout: Optional[float] = None,
+        inactivity_timeout: Optional[float] = None,
+    ):
+        self.proc = proc
+        self.watcher = watcher
+        self.kill_grace_period = kill_grace_period
+        self.timeout = timeout or None
+        self.inactivity_timeout = inactivity_timeout or None
+        self.abort_reason: Optional[str] = None
+        self.timed_out = False
+        self.started = self.last_output = time.monotonic()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._kill_timer: Optional[threading.Timer] = None
+
+        if self.timeout or self.inactivity_timeout:
+            limit = min(t for t in (self.timeout, self.inactivity_timeout) if t)
+            interval = max(0.01, min(1.0, limit / 10))
+            watchdog = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+            watchdog.start()
+
+    @classmethod
+    def create(cls, proc: subprocess.Popen, watcher, kill_grace_period: float, timeout, inactivity_timeout):
+        """Create a monitor, or return None if there is nothing to monitor."""
+        if watcher is None and not timeout and not inactivity_timeout:
+            return None
+        return cls(proc, watcher, kill_grace_period, timeout, inactivity_timeout)
+
+    def _watch(self, interval: float) -> None:
+        while not self._done.wait(interval):
+            now = time.monotonic()
+            if self.timeout and now - self.started > self.timeout:
+                self.abort(f"Timed out after {self.timeout:g}s", timed_out=True)
+            elif self.inactivity_timeout and now - self.last_output > self.inactivity_timeout:
+                self.abort(f"No output for {self.inactivity_timeout:g}s, assuming the simulation hangs", timed_out=True)
+
+    def on_output(self) -> None:
+        """Note that the command just printed something."""
+        self.last_output = time.monotonic()
+
+    def on_line(self, line: str) -> None:
+        """Check one complete output line with the log watcher."""
+        if self.abort_reason is None:
+            reason = self.watcher.feed(line)
+            if reason:
+                self.abort(reason)
+
+    def abort(self, reason: str, timed_out: bool = False) -> None:
+        """Kill the process group; only the first reason is kept."""
+        with self._lock:
+            if self.abort_reason is not None or self._done.is_set():
+                return
+            logger.warning(f"Aborting {self.proc.args[0]} (pid {self.proc.pid}): {reason}")
+            self.abort_reason = reason
+            self.timed_out = timed_out
+            kill_process_group(self.proc, signal.SIGTERM)
+            # Simulators that ignore SIGTERM are killed outright after the grace period
+            self._kill_timer = threading.Timer(self.kill_grace_period, kill_process_group, (self.proc, signal.SIGKILL))
+            self._kill_timer.daemon = True
+            self._kill_timer.start()
+
+    def finish(self) -> None:
+        """Stop watching and remove anything an aborted command left in its group."""
+        with self._lock:
+            self._done.set()
+        if self._kill_timer is not None:
+            self._kill_timer.cancel()
+            kill_process_group(self.proc, signal.SIGKILL)
+
+
+def run_command(
+    cmd: Sequence[str],
+    check: bool = True,
+    capture_output: bool = True,
+    cwd: Optional[str] = None,
+    log_path: Optional[str] = None,
+    echo: bool = False,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    watcher=None,
+    kill_grace_period: float = 5.0,
+    timeout: Optional[float] = None,
+    inactivity_timeout: Optional[float] = None,
+) -> CommandResult:
+    """Run a command in its own process group and wait for it.
+
+    The child is tracked so that :func:`terminate_all` can kill it together
+    with all of its descendants. Its stdout and stderr are merged and streamed
+    to ``log_path`` while only the last ``tail_lines`` lines are kept in memory.
+
+    The command is aborted when ``watcher`` reports a reason for a line of
+    output, when it runs longer than ``timeout`` seconds or when it prints
+    nothing for ``inactivity_timeout`` seconds. Its process group is then sent
+    SIGTERM right away, followed by SIGKILL if it is still alive after
+    ``kill_grace_period`` seconds. The command fails with the reason in
+    :attr:`CommandResult.abort_reason`; timeouts also set
+    :attr:`CommandResult.timed_out`.
+
+    The CPU time, peak memory and storage I/O of the whole process tree are
+    measured into :attr:`CommandResult.usage`.
+
+    Args:
+        cmd: Command and arguments
+        check: Raise :class:`CommandError` on non-zero exit
+        capture_output: Capture the output instead of inheriting the console
+        cwd: Working directory for the command
+        log_path: File receiving the complete output
+        echo: Also copy the captured output to the console
+        tail_lines: Number of trailing output lines kept for error reporting
+        watcher: Optional :class:`~build_systems.log_watch.LogWatcher` checking every output line
+        kill_grace_period: Seconds between SIGTERM and SIGKILL when the command is aborted
+        timeout: Maximum wall-clock seconds the command may run
+        inactivity_timeout: Maximum seconds without output (only with ``capture_output``)
+
+    Returns:
+        CommandResult: The finished command
+
+    Raises:
+        CommandError: If ``check`` is set and the command fails
+    """
+    tail = deque(maxlen=max(1, tail_lines))
+    if _cancelled.is_set():
+        result = CommandResult(cmd, -signal.SIGTERM, ["Cancelled before start"], log_path)
+        if check:
+            raise CommandError(result)
+        return result
+
+    log_file = None
+    if capture_output and log_path:
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        log_file = open(log_path, "wb")
+
+    try:
+        stdout = subprocess.PIPE if capture_output else None
+        stderr = subprocess.STDOUT if capture_output else None
+        proc = subprocess.Popen(list(cmd), stdout=stdout, stderr=stderr, cwd=cwd, start_new_session=True)
+        _register(proc)
+        _rss_sampler.add(proc.pid)
+        # Without captured output there is no activity to watch
+        inactivity_timeout = inactivity_timeout if capture_output else None
+        monitor = _OutputMonitor.create(proc, watcher, kill_grace_period, timeout, inactivity_timeout)
+        on_line = monitor.on_line if watcher is not None else None
+        on_output = monitor.on_output if inactivity_timeout else None
+        try:
+            if capture_output:
+                _pump_output(proc.stdout.fileno(), tail, log_file, echo, on_line, on_output)
+                proc.stdout.close()
+            usage = _wait(proc)
+        except BaseException:
+            kill_process_group(proc, signal.SIGKILL)
+            proc.wait()
+            raise
+        finally:
+            if monitor is not None:
+                monitor.finish()
+            _unregister(proc)
+            group_rss = _rss_sampler.remove(proc.pid)
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    result = CommandResult(
+        cmd, proc.returncode, tail, log_path if log_file is not None else None, usage=_with_group_rss(usage, group_rss)
+    )
+    if monitor is not None:
+        result.abort_reason = monitor.abort_reason
+        result.timed_out = monitor.timed_out
+    if check and not result.success:
+        raise CommandError(result)
+    return result
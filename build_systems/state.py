@@ -0,0 +1,105 @@
+"""Persistent tester state such as test history and build caches."""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = ".tester"
+
+
+def get_state_dir(config: Optional[Dict[str, Any]] = None) -> str:
+    """Get the directory where the tester keeps state between invocations.
+
+    Args:
+        config: Tester configuration; ``state_dir`` overrides the default
+
+    Returns:
+        str: Absolute path of the state directory
+    """
+    state_dir = (config or {}).get("state_dir") or DEFAULT_STATE_DIR
+    return os.path.abspath(state_dir)
+
+
+def write_atomic(path: str, content: Union[str, bytes]) -> None:
+    """Write a file so readers never see a partially written version.
+
+    The content goes to a temporary file in the same directory which then
+    replaces ``path`` in a single rename. An existing file keeps its mode.
+
+    Args:
+        path: File to write
+        content: Text, or bytes for a binary file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    # Unlike mkstemp, os.open honours the umask so new files get the usual permissions
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Atomically write a text file unless it already has ``content``.
+
+    Leaving an unchanged file alone keeps its mtime, so tools like make do not
+    consider everything depending on it out of date.
+
+    Args:
+        path: File to write
+        content: Text the file should contain
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    write_atomic(path, content)
+    return True
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Load a JSON state file.
+
+    Args:
+        path: File to read
+        default: Value returned when the file is missing or unreadable
+
+    Returns:
+        Any: The decoded data or ``default``
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable state file {path}: {e}")
+        return default
+
+
+def save_json(path: str, data: Any) -> None:
+    """Atomically save a JSON state file.
+
+    Args:
+        path: File to write
+        data: JSON-serializable data
+    """
+    write_atomic(path, json.dumps(data, indent=1, sort_keys=True))
@@ -1,17 +1,50 @@
+import datetime
+import importlib
 import logging
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
-import yaml
 
-from build_systems.edalize_integration import EdalizeIntegration
-from build_systems.makefile import MakefileBuildSystem
-from config.config_manager import ConfigManager
+from build_systems.state import get_state_dir
+from config.loader import load_yaml_file
 
 DEFAULT_CONFIG_FILES = ["tester.yml", "config.yml"]
 logger = logging.getLogger(__name__)
 
+# Heavy dependencies are imported on first use so that e.g. listing the tests of a
+# Makefile project never loads Edalize, and quick commands start fast
+_LAZY_IMPORTS = {
+    "AdmissionController": ("tester.admission", "AdmissionController"),
+    "CoverageMerger": ("build_systems.coverage", "CoverageMerger"),
+    "DependencyMap": ("tester.selection", "DependencyMap"),
+    "RunJournal": ("tester.journal", "RunJournal"),
+    "Coordinator": ("tester.distributed", "Coordinator"),
+    "EdalizeIntegration": ("build_systems.edalize_integration", "EdalizeIntegration"),
+    "MakefileBuildSystem": ("build_systems.makefile", "MakefileBuildSystem"),
+    "DurationHistory": ("tester.history", "DurationHistory"),
+    "MemoryHistory": ("tester.history", "MemoryHistory"),
+    "ResultsDatabase": ("tester.results_db", "ResultsDatabase"),
+    "TestRunner": ("tester.runner", "TestRunner"),
+    "Worker": ("tester.distributed", "Worker"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import the lazily loaded names of this module on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _LAZY_IMPORTS[name]
+    value = getattr(importlib.import_module(module_name), attr)
+    globals()[name] = value
+    return value
+
+
+def _lazy(name: str) -> Any:
+    """Get a lazily imported name, preferring a value already set on the module."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
 
 def find_config_file(config_file: Optional[str] = None) -> str:
     """Find the configuration file to use.
@@ -46,15 +79,21 @@ def find_config_file(config_file: Optional[str] = None) -> str:
 
 
 def load_config(config_file: Optional[str] = None) -> dict:
-    """Load configuration from file."""
+    """Load configuration from file.
+
+    The parsed configuration is cached next to the file, so YAML is only
+    parsed again after the file changed.
+    """
     config_path = find_config_file(config_file)
 
     try:
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        raise click.FileError(config_path, f"Invalid YAML format: {e}")
+        return load_yaml_file(config_path)
     except Exception as e:
+        # yaml is only imported once the file had to be parsed
+        import yaml
+
+        if isinstance(e, yaml.YAMLError):
+            raise click.FileError(config_path, f"Invalid YAML format: {e}")
         raise click.FileError(config_path, f"Failed to load config: {e}")
 
 
@@ -63,9 +102,9 @@ def get_build_system(config: dict):
     build_system_type = config.get("build_system", "makefile")
 
     if build_system_type == "makefile":
-        return MakefileBuildSystem(config)
+        return _lazy("MakefileBuildSystem")(config)
     elif build_system_type == "edalize":
-        return EdalizeIntegration(config)
+        return _lazy("EdalizeIntegration")(config)
     else:
         raise ValueError(f"Unsupported build system: {build_system_type}")
 
@@ -85,6 +124,295 @@ def get_default_testbench(config: dict) -> str:
     raise click.UsageError("No default testbench configured and no testbenches found in config")
 
 
+def get_test_runtime_args(config: dict, testbench: str, test: str) -> List[str]:
+    """Get the runtime arguments configured for a test.
+
+    Args:
+        config: Loaded configuration
+        testbench: Name of the testbench
+        test: Name of the test
+
+    Returns:
+        List[str]: Runtime arguments from ``testbenches.<tb>.tests.<test>.runtime_args``
+    """
+    tests = config.get("testbenches", {}).get(testbench, {}).get("tests", {})
+    test_config = tests.get(test, {}) if isinstance(tests, dict) else {}
+    config_runtime_args = (test_config or {}).get("runtime_args", [])
+
+    # Make sure config_runtime_args is a list
+    if isinstance(config_runtime_args, list):
+        return list(config_runtime_args)
+    # Handle the case where it might be something else
+    return [str(config_runtime_args)] if config_runtime_args else []
+
+
+def get_results_db(config: dict) -> Optional[Any]:
+    """Open the database regression results are stored in.
+
+    Args:
+        config: Loaded configuration; ``results_db`` is the database file
+            (default ``<state dir>/results.db``) or false to disable it
+
+    Returns:
+        Optional[ResultsDatabase]: The database, or None if disabled
+    """
+    path = config.get("results_db", True)
+    if path is False:
+        return None
+    if path is True or path is None:
+        path = os.path.join(get_state_dir(config), "results.db")
+    return _lazy("ResultsDatabase")(path)
+
+
+def get_junit_writer(path: Optional[str], suite_name: str) -> Optional[Any]:
+    """Create the JUnit XML writer requested with ``--junit``.
+
+    Args:
+        path: JUnit XML file, or None if no JUnit report was requested
+        suite_name: Name of the test suite in the report
+
+    Returns:
+        Optional[JUnitWriter]: The writer, or None
+    """
+    if not path:
+        return None
+    from tester.junit import JUnitWriter
+
+    return JUnitWriter(path, suite_name=suite_name)
+
+
+def get_scheduling(config: dict, parallel: Optional[int], adaptive: bool) -> Dict[str, Any]:
+    """Get the TestRunner arguments deciding how many tests run at once.
+
+    Args:
+        config: Loaded configuration; ``admission.enabled`` turns on adaptive admission
+        parallel: Number of tests to run concurrently, or None for the default
+        adaptive: Whether ``--adaptive`` was given
+
+    Returns:
+        Dict[str, Any]: ``parallel``, ``admission`` and ``memory_history`` arguments
+    """
+    # Peak memory is always learned, so it is known once admission is turned on
+    memory_history = _lazy("MemoryHistory")(os.path.join(get_state_dir(config), "memory.json"))
+    adaptive = adaptive or bool((config.get("admission") or {}).get("enabled"))
+    admission = _lazy("AdmissionController")(config, history=memory_history) if adaptive else None
+    if parallel is None:
+        parallel = (os.cpu_count() or 1) if adaptive else 1
+    return {"parallel": parallel, "admission": admission, "memory_history": memory_history}
+
+
+def get_coverage_merger(config: dict, build_system: Any, coverage: bool) -> Optional[Any]:
+    """Get the merger of the coverage databases of a regression run with ``--coverage``.
+
+    Args:
+        config: Loaded configuration; ``coverage.merge: false`` turns merging off
+        build_system: Build system the tests run with, for its simulator
+        coverage: Whether coverage is collected
+
+    Returns:
+        Optional[CoverageMerger]: The merger, or None
+    """
+    if not coverage or not (config.get("coverage") or {}).get("merge", True):
+        return None
+    try:
+        return _lazy("CoverageMerger")(config, simulator=getattr(build_system, "simulator", None))
+    except ValueError as e:
+        logger.warning(f"Coverage is not merged: {e}")
+        return None
+
+
+def echo_coverage(runner: Any) -> None:
+    """Print where the merged coverage database of a run is, if there is one."""
+    if runner.coverage_path:
+        click.echo(f"Merged coverage: {runner.coverage_path}")
+
+
+def get_coordinator(config: dict, address: Optional[str]) -> Optional[Any]:
+    """Start the coordinator requested with ``--distribute``.
+
+    Args:
+        config: Loaded configuration; the ``distributed`` section may set the
+            shared ``token`` and the worker ``heartbeat_timeout``
+        address: ``[HOST:]PORT`` to listen on, or None to run locally
+
+    Returns:
+        Optional[Coordinator]: The listening coordinator, or None
+    """
+    if not address:
+        return None
+    from tester.distributed import HEARTBEAT_TIMEOUT, parse_address
+
+    try:
+        host, port = parse_address(address)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--distribute")
+    settings = config.get("distributed") or {}
+    return _lazy("Coordinator")(
+        host,
+        port,
+        token=settings.get("token"),
+        heartbeat_timeout=settings.get("heartbeat_timeout", HEARTBEAT_TIMEOUT),
+    )
+
+
+def get_journal(config: dict, name: Optional[str], resume: Optional[str] = None) -> Optional[Any]:
+    """Get the journal of a regression, ``<state dir>/journals/<name>.jsonl``.
+
+    Args:
+        config: Loaded configuration; ``journal: false`` turns journaling off
+        name: Name of the regression, None for an ad-hoc one
+        resume: How the regression is resumed, if it is
+
+    Returns:
+        Optional[RunJournal]: The journal, or None if disabled
+
+    Raises:
+        click.UsageError: If the regression is resumed without an earlier journal
+    """
+    journal = None
+    if config.get("journal", True) is not False:
+        path = os.path.join(get_state_dir(config), "journals", f"{name or 'regression'}.jsonl")
+        journal = _lazy("RunJournal")(path)
+    if resume and (journal is None or not journal.exists()):
+        raise click.UsageError(f"No journal of regression '{name or 'regression'}' to resume")
+    return journal
+
+
+def close_outputs(*outputs: Any) -> None:
+    """Close the result outputs of a regression that were opened."""
+    for output in outputs:
+        if output is not None:
+            output.close()
+
+
+def get_testbench_and_test(
+    config: dict, arg1: Optional[str], arg2: Optional[str], testbench: Optional[str]
+) -> Tuple[str, str]:
+    """Resolve the ``[TESTBENCH] TEST`` arguments of the test commands.
+
+    Args:
+        config: Loaded configuration
+        arg1: First positional argument
+        arg2: Second positional argument
+        testbench: Value of the ``--testbench`` option
+
+    Returns:
+        Tuple[str, str]: Testbench and test name
+
+    Raises:
+        click.UsageError: If no test name was given
+    """
+    if arg1 and arg2:
+        # Two positional args: first is testbench, second is test
+        return arg1, arg2
+    if arg1 and testbench:
+        # One positional arg + --testbench option: arg1 is test, testbench is from option
+        return testbench, arg1
+    if arg1:
+        # Only one positional arg: it's the test name, use default testbench
+        return testbench or get_default_testbench(config), arg1
+    # No positional args: error
+    raise click.UsageError("Test name is required")
+
+
+def get_regression_tests(
+    config: dict, build_system, name: Optional[str] = None, testbenches: Tuple[str, ...] = ()
+) -> List[Tuple[str, str]]:
+    """Collect the (testbench, test) pairs of a regression.
+
+    A named regression is read from the ``regressions`` config section, where
+    ``tests`` lists ``testbench/test`` strings or ``{testbench, test}`` mappings
+    and ``testbenches`` selects every test of the listed testbenches. Without a
+    name, every test of ``testbenches`` (or of all available testbenches) runs.
+
+    Args:
+        config: Loaded configuration
+        build_system: Build system used to discover tests
+        name: Optional regression name
+        testbenches: Optional testbenches to restrict the regression to
+
+    Returns:
+        List[Tuple[str, str]]: Tests to run
+
+    Raises:
+        click.UsageError: If the named regression is not configured
+    """
+    selected_tbs = list(testbenches)
+    pairs: List[Tuple[str, str]] = []
+
+    if name:
+        regression = config.get("regressions", {}).get(name)
+        if regression is None:
+            raise click.UsageError(f"Unknown regression: {name}")
+        for entry in regression.get("tests", []):
+            if isinstance(entry, dict):
+                pairs.append((entry["testbench"], entry["test"]))
+            else:
+                tb_name, _, test_name = str(entry).partition("/")
+                pairs.append((tb_name, test_name))
+        selected_tbs = list(regression.get("testbenches", []))
+    elif not selected_tbs:
+        selected_tbs = build_system.get_available_testbenches()
+
+    for tb_name in selected_tbs:
+        for test_name in build_system.get_available_tests(tb_name):
+            pairs.append((tb_name, test_name))
+
+    if name and testbenches:
+        pairs = [pair for pair in pairs if pair[0] in testbenches]
+    return pairs
+
+
+def get_affected_tests(
+    config: dict,
+    build_system,
+    tests: List[Tuple[str, str]],
+    changed_since: Optional[str] = None,
+    changed_file: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """Keep the tests that the changed files can affect.
+
+    Args:
+        config: Loaded configuration
+        build_system: Build system the tests' testbenches are compiled with
+        tests: Tests of the regression
+        changed_since: Git revision; the files changed since the branch forked from it
+        changed_file: File listing changed paths, one per line, or ``-`` for stdin
+
+    Returns:
+        List[Tuple[str, str]]: The affected tests, or all tests without a change set
+
+    Raises:
+        click.UsageError: If git cannot tell the changed files
+    """
+    if not changed_since and not changed_file:
+        return tests
+    changed: List[str] = []
+    if changed_since:
+        from tester.selection import git_changed_files
+
+        try:
+            changed += git_changed_files(changed_since)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    if changed_file:
+        with click.open_file(changed_file) as f:
+            changed += [line.strip() for line in f if line.strip()]
+
+    affected = _lazy("DependencyMap")(config, build_system).select(tests, changed)
+    click.echo(f"{len(changed)} changed file(s) affect {len(affected)} of {len(tests)} test(s)")
+    return affected
+
+
+def get_regression_items(config: dict, tests: List[Tuple[str, str]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Attach the configured runtime args to each test of a regression."""
+    items = []
+    for tb_name, test_name in tests:
+        runtime_args = get_test_runtime_args(config, tb_name, test_name)
+        items.append((tb_name, test_name, {"runtime_args": runtime_args} if runtime_args else {}))
+    return items
+
+
 @click.group()
 @click.option("--config", "-c", help="Configuration file path")
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
@@ -184,6 +512,7 @@ def build(ctx, config, testbench: str, debug: bool, incremental: bool):
 @click.option("--verbosity", type=click.Choice(["LOW", "MEDIUM", "HIGH", "DEBUG"], case_sensitive=False))
 @click.option("--coverage", is_flag=True, help="Enable coverage collection")
 @click.option("--runtime-args", "-r", multiple=True, help="Additional runtime arguments (can be used multiple times)")
+@click.option("--timeout", type=float, help="Kill the test after this many seconds (overrides the configured timeout)")
 @click.pass_obj
 @click.pass_context
 def run(
@@ -196,6 +525,7 @@ def run(
     verbosity: Optional[str],
     coverage: bool,
     runtime_args: tuple,
+    timeout: Optional[float],
 ):
     """Run a specific test
 
@@ -209,22 +539,7 @@ def run(
         logger.debug(f"Config type: {type(config)}")
         logger.debug(f"Config content: {config}")
 
-        # Determine testbench and test from arguments
-        if arg1 and arg2:
-            # Two positional args: first is testbench, second is test
-            tb_name = arg1
-            test_name = arg2
-        elif arg1 and testbench:
-            # One positional arg + --testbench option: arg1 is test, testbench is from option
-            tb_name = testbench
-            test_name = arg1
-        elif arg1:
-            # Only one positional arg: it's the test name, use default testbench
-            test_name = arg1
-            tb_name = testbench or get_default_testbench(config)
-        else:
-            # No positional args: error
-            raise click.UsageError("Test name is required")
+        tb_name, test_name = get_testbench_and_test(config, arg1, arg2, testbench)
 
         build_system = get_build_system(config)
         options = {
@@ -238,20 +553,11 @@ def run(
         if verbosity:
             options["verbosity"] = verbosity
 
-        # Get test-specific runtime args from config
-        test_config = config.get("testbenches", {}).get(tb_name, {}).get("tests", {}).get(test_name, {})
-        config_runtime_args = test_config.get("runtime_args", [])
+        if timeout is not None:
+            options["timeout"] = timeout
 
         # Combine config runtime args with command-line runtime args
-        # Make sure config_runtime_args is a list
-        if isinstance(config_runtime_args, list):
-            all_runtime_args = list(config_runtime_args)
-        else:
-            # Handle the case where it might be something else
-            all_runtime_args = []
-            if config_runtime_args:
-                all_runtime_args.append(str(config_runtime_args))
-
+        all_runtime_args = get_test_runtime_args(config, tb_name, test_name)
         all_runtime_args.extend(runtime_args)
 
         if all_runtime_args:
@@ -267,6 +573,345 @@ def run(
         raise click.Abort()
 
 
+@cli.command()
+@click.option("--name", "-n", help="Regression name from the 'regressions' config section")
+@click.option("--testbench", "-t", multiple=True, help="Restrict the regression to a testbench (can be used multiple times)")
+@click.option("--parallel", "-j", type=int, help="Number of tests to run concurrently [default: 1, CPUs with --adaptive]")
+@click.option("--adaptive", is_flag=True, help="Start tests as load and free memory allow, up to --parallel")
+@click.option("--seed", type=int, help="Random seed for every test")
+@click.option("--coverage", is_flag=True, help="Enable coverage collection")
+@click.option("--report-dir", default="reports", show_default=True, help="Directory for the HTML report")
+@click.option("--time-budget", type=float, help="Seconds the whole run may take before running tests are killed")
+@click.option("--junit", "junit_path", type=click.Path(dir_okay=False), help="Also write a JUnit XML report to this file")
+@click.option(
+    "--distribute", metavar="[HOST:]PORT", help="Hand the tests to 'tester worker' processes connecting to this address"
+)
+@click.option("--changed-since", metavar="REF", help="Only run tests affected by the files changed since git REF")
+@click.option(
+    "--changed",
+    "changed_file",
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+    help="Only run tests affected by the paths in this file",
+)
+@click.option("--resume", is_flag=True, help="Continue the last run of the regression, running the unfinished tests")
+@click.option("--rerun-failed", is_flag=True, help="Rerun the tests of the last run of the regression that did not pass")
+@click.pass_obj
+@click.pass_context
+def regression(
+    ctx,
+    config,
+    name: Optional[str],
+    testbench: Tuple[str, ...],
+    parallel: Optional[int],
+    adaptive: bool,
+    seed: Optional[int],
+    coverage: bool,
+    report_dir: str,
+    time_budget: Optional[float],
+    junit_path: Optional[str],
+    distribute: Optional[str],
+    changed_since: Optional[str],
+    changed_file: Optional[str],
+    resume: bool,
+    rerun_failed: bool,
+):
+    """Run a regression of many tests in parallel
+
+    Press Ctrl-C to cancel: running simulations are killed together with
+    every process they spawned and the partial report is still written.
+    The same happens when the --time-budget (or the configured
+    regression_time_budget) runs out.
+
+    With --distribute, the tests run on 'tester worker' processes, possibly
+    on other hosts, instead of locally.
+
+    With --changed-since or --changed, only the tests whose testbench or own
+    files were changed run, e.g. --changed-since origin/main before a merge.
+
+    Every regression is journaled. After a crash, --resume runs the tests of
+    the last run of the regression that did not finish; --rerun-failed runs
+    those that did not pass. Both take the tests and options from the journal
+    and report them together with the results of the earlier runs.
+    """
+    if resume and rerun_failed:
+        raise click.UsageError("--resume and --rerun-failed cannot be combined")
+    resume_mode = "unfinished" if resume else "failed" if rerun_failed else None
+    results_db = junit = coordinator = journal = None
+    try:
+        build_system = get_build_system(config)
+        journal = get_journal(config, name, resume_mode)
+        tests = [] if resume_mode else get_regression_tests(config, build_system, name, testbench)
+        tests = get_affected_tests(config, build_system, tests, changed_since, changed_file)
+        if not tests and not resume_mode:
+            click.echo("No tests selected for regression")
+            return
+
+        options: Dict[str, Any] = {
+            "coverage": coverage,
+            "verbose": ctx.parent.params.get("verbose", False),  # Get verbose flag from parent context
+        }
+        if seed is not None:
+            options["seed"] = seed
+
+        history = _lazy("DurationHistory")(
+            os.path.join(get_state_dir(config), "durations.json"),
+            default_duration=config.get("default_test_duration", 60.0),
+        )
+        results_db = get_results_db(config)
+        junit = get_junit_writer(junit_path, name or "regression")
+        scheduling = get_scheduling(config, parallel, adaptive)
+        runner = _lazy("TestRunner")(
+            build_system,
+            history=history,
+            results_db=results_db,
+            junit=junit,
+            coverage_merger=get_coverage_merger(config, build_system, coverage),
+            journal=journal,
+            **scheduling,
+        )
+        if time_budget is None:
+            time_budget = config.get("regression_time_budget")
+        coordinator = get_coordinator(config, distribute)
+        report_path = runner.run_regression(
+            get_regression_items(config, tests),
+            report_dir=report_dir,
+            time_budget=time_budget,
+            coordinator=coordinator,
+            resume=resume_mode,
+            **options,
+        )
+    except click.UsageError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to run regression: {e}")
+        raise click.Abort()
+    finally:
+        close_outputs(results_db, junit, coordinator, journal)
+
+    report = runner.report
+    passed, timed_out = report.counts.get("passed", 0), report.counts.get("timeout", 0)
+    failed = report.total - passed
+    summary = f"{passed}/{report.total} passed" + (f", {timed_out} timed out" if timed_out else "")
+    click.echo(f"Regression finished: {summary}, report: {report_path}")
+    echo_coverage(runner)
+    if failed:
+        raise click.Abort()
+
+
+@cli.command()
+@click.argument("arg1", required=False)
+@click.argument("arg2", required=False)
+@click.option("--testbench", "-t", help="Testbench name (alternative to positional argument)")
+@click.option("--seeds", "-s", default="1", show_default=True, help="N random seeds, a START:END range or a list A,B,C")
+@click.option("--plusarg", "-p", multiple=True, help="Plusarg axis NAME=V1,V2,... (can be used multiple times)")
+@click.option("--samples", type=int, help="Sample N random plusarg combinations per seed instead of the full grid")
+@click.option("--sweep-seed", type=int, help="Seed for drawing random seeds and samples, to reproduce a sweep")
+@click.option("--parallel", "-j", type=int, help="Number of tests to run concurrently [default: 1, CPUs with --adaptive]")
+@click.option("--adaptive", is_flag=True, help="Start tests as load and free memory allow, up to --parallel")
+@click.option("--coverage", is_flag=True, help="Enable coverage collection")
+@click.option("--runtime-args", "-r", multiple=True, help="Additional runtime arguments (can be used multiple times)")
+@click.option("--report-dir", default="reports", show_default=True, help="Directory for the HTML report")
+@click.option("--time-budget", type=float, help="Seconds the whole run may take before running tests are killed")
+@click.option("--junit", "junit_path", type=click.Path(dir_okay=False), help="Also write a JUnit XML report to this file")
+@click.pass_obj
+@click.pass_context
+def sweep(
+    ctx,
+    config,
+    arg1: Optional[str],
+    arg2: Optional[str],
+    testbench: Optional[str],
+    seeds: str,
+    plusarg: Tuple[str, ...],
+    samples: Optional[int],
+    sweep_seed: Optional[int],
+    parallel: Optional[int],
+    adaptive: bool,
+    coverage: bool,
+    runtime_args: Tuple[str, ...],
+    report_dir: str,
+    time_budget: Optional[float],
+    junit_path: Optional[str],
+):
+    """Run a test over many seeds and plusarg values
+
+    The testbench is built once and every seed/plusarg combination runs
+    against that build in parallel.
+
+    Usage:
+      tester sweep [TESTBENCH] TEST --seeds 500 -j 16
+      tester sweep TEST --seeds 1:100 --plusarg MODE=fast,slow --plusarg LEN=8,64
+    """
+    from tester.sweep import Sweep, parse_plusarg_axis, parse_seed_spec
+
+    try:
+        tb_name, test_name = get_testbench_and_test(config, arg1, arg2, testbench)
+        seed_spec = parse_seed_spec(seeds)
+        axes = [parse_plusarg_axis(axis) for axis in plusarg]
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    results_db = junit = None
+    try:
+        build_system = get_build_system(config)
+        all_runtime_args = get_test_runtime_args(config, tb_name, test_name) + list(runtime_args)
+        base_options: Dict[str, Any] = {"runtime_args": all_runtime_args} if all_runtime_args else {}
+        instances = Sweep(tb_name, test_name, seed_spec, axes, samples=samples, rng_seed=sweep_seed, options=base_options)
+        logger.info(f"Sweeping {test_name} of {tb_name} over {len(instances)} instance(s), sweep seed {instances.rng_seed}")
+
+        options = {
+            "coverage": coverage,
+            "verbose": ctx.parent.params.get("verbose", False),  # Get verbose flag from parent context
+        }
+        results_db = get_results_db(config)
+        junit = get_junit_writer(junit_path, f"sweep.{tb_name}.{test_name}")
+        scheduling = get_scheduling(config, parallel, adaptive)
+        runner = _lazy("TestRunner")(
+            build_system,
+            results_db=results_db,
+            junit=junit,
+            coverage_merger=get_coverage_merger(config, build_system, coverage),
+            **scheduling,
+        )
+        if time_budget is None:
+            time_budget = config.get("regression_time_budget")
+        report_path, failures = runner.run_sweep(instances, report_dir=report_dir, time_budget=time_budget, **options)
+    except click.UsageError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to run sweep: {e}")
+        raise click.Abort()
+    finally:
+        close_outputs(results_db, junit)
+
+    total = runner.report.total
+    click.echo(f"Sweep finished: {total - len(failures)}/{total} passed, report: {report_path}")
+    echo_coverage(runner)
+    if failures:
+        failures = sorted(failures, key=lambda options: options["seed"])
+        click.echo(f"Failing seeds: {', '.join(str(options['seed']) for options in failures)}")
+        if axes:
+            for options in failures:
+                plusargs = options.get("runtime_args", [])[len(all_runtime_args) :]
+                click.echo(f"  seed {options['seed']}: {' '.join(plusargs)}")
+        raise click.Abort()
+
+
+@cli.command()
+@click.argument("coordinator", metavar="HOST:PORT")
+@click.option("--slots", "-j", type=int, default=1, show_default=True, help="Number of tests to run concurrently")
+@click.option("--name", help="Worker name shown in logs and reports (default: host:pid)")
+@click.option(
+    "--connect-timeout", type=float, default=60.0, show_default=True, help="Seconds to retry reaching the coordinator"
+)
+@click.pass_obj
+def worker(config, coordinator: str, slots: int, name: Optional[str], connect_timeout: float):
+    """Run the tests of a distributed regression
+
+    Connects to a 'tester regression --distribute' coordinator and runs its
+    tests until the regression finishes. The worker needs the same project
+    checkout and configuration as the coordinator and builds the testbenches
+    locally.
+    """
+    from tester.distributed import parse_address
+
+    try:
+        address = parse_address(coordinator, default_host="localhost")
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="HOST:PORT")
+
+    settings = config.get("distributed") or {}
+    try:
+        build_system = get_build_system(config)
+        count = _lazy("Worker")(
+            build_system,
+            address,
+            name=name,
+            token=settings.get("token"),
+            slots=slots,
+            connect_timeout=connect_timeout,
+            state_path=os.path.join(get_state_dir(config), "worker_builds.json"),
+        ).run()
+    except ConnectionError as e:
+        logger.error(str(e))
+        raise click.Abort()
+    except Exception as e:
+        logger.error(f"Worker failed: {e}")
+        raise click.Abort()
+    click.echo(f"Worker finished after running {count} test(s)")
+
+
+@cli.command()
+@click.argument("arg1", required=False)
+@click.argument("arg2", required=False)
+@click.option("--testbench", "-t", help="Testbench name (alternative to positional argument)")
+@click.option("--failed", is_flag=True, help="Only show failed and timed out runs")
+@click.option("--since", help="Only show runs since YYYY-MM-DD[ HH:MM], Nd, Nh or a weekday (e.g. monday)")
+@click.option("--limit", "-n", type=int, default=30, show_default=True, help="Maximum number of runs to show")
+@click.option(
+    "--top", type=click.Choice(["cpu", "memory", "io"]), help="Show the runs that used the most CPU, memory or disk I/O"
+)
+@click.pass_obj
+def results(
+    config,
+    arg1: Optional[str],
+    arg2: Optional[str],
+    testbench: Optional[str],
+    failed: bool,
+    since: Optional[str],
+    limit: int,
+    top: Optional[str],
+):
+    """Show stored test results, newest first
+
+    Usage:
+      tester results [TESTBENCH] TEST     (last runs of a test)
+      tester results --failed --since monday
+      tester results --top memory --since 7d
+    """
+    from tester.admission import format_size
+    from tester.results_db import FAILURE_STATUSES, parse_since
+
+    test_name = arg2 or arg1
+    if arg2:
+        testbench = arg1
+    try:
+        since_time = parse_since(since) if since else None
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    results_db = get_results_db(config)
+    if results_db is None:
+        raise click.UsageError("The results database is disabled in the configuration")
+    try:
+        rows = results_db.query(
+            testbench=testbench,
+            test=test_name,
+            statuses=FAILURE_STATUSES if failed else None,
+            since=since_time,
+            limit=limit,
+            order_by=top,
+        )
+    except Exception as e:
+        logger.error(f"Failed to query results: {e}")
+        raise click.Abort()
+    finally:
+        results_db.close()
+
+    if not rows:
+        click.echo("No results found")
+        return
+    for row in rows:
+        finished = datetime.datetime.fromtimestamp(row["finished"]).strftime("%Y-%m-%d %H:%M:%S")
+        seed = row["seed"] if row["seed"] is not None else "-"
+        line = f"{finished}  {row['testbench']}/{row['test']}  seed {seed}  {row['status']}  {row['duration'] or 0:.1f}s"
+        if row["max_rss"] is not None:
+            cpu = (row["cpu_user"] or 0) + (row["cpu_system"] or 0)
+            io = (row["read_bytes"] or 0) + (row["write_bytes"] or 0)
+            line += f"  cpu {cpu:.1f}s  mem {format_size(row['max_rss'])}  io {format_size(io)}"
+        click.echo(f"{line}  {row['log_path']}" if row["log_path"] else line)
+
+
 @cli.command()
 @click.argument("testbench", required=False)
 @click.pass_obj
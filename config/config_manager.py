@@ -3,20 +3,21 @@
 import os
 from typing import Any, Dict, Optional
 
-import yaml
+from config.loader import load_yaml_file
 
 
 class ConfigManager:
     """Configuration management for the testing tool."""
 
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
         """Initialize the configuration manager.
 
         Args:
             config_file: Path to the configuration file (YAML)
+            config: Already loaded configuration to use instead of reading ``config_file``
         """
         self.config_file = config_file or os.path.join(os.getcwd(), "config.yml")
-        self.config = self._load_config()
+        self.config = config if config is not None else self._load_config()
 
     def _load_config(self) -> Dict[str, Any]:
         """Load the configuration from file.
@@ -28,8 +29,7 @@ class ConfigManager:
             return {}
 
         try:
-            with open(self.config_file, "r") as f:
-                return yaml.safe_load(f) or {}
+            return load_yaml_file(self.config_file) or {}
         except Exception as e:
             print(f"Error loading config file {self.config_file}: {e}")
             return {}
@@ -56,7 +56,7 @@ class ConfigManager:
             Dict[str, Any]: Testbench configuration
         """
         testbenches = self.config.get("testbenches", {})
-        return testbenches.get(testbench, {})
+        return testbenches.get(testbench) or {}
 
     def get_test_config(self, testbench: str, test: str) -> Dict[str, Any]:
         """Get configuration for a specific test.
@@ -70,4 +70,5 @@ class ConfigManager:
         """
         tb_config = self.get_testbench_config(testbench)
         tests = tb_config.get("tests", {})
-        return tests.get(test, {})
+        # Tests may also be given as a plain list of names without settings
+        return (tests.get(test) if isinstance(tests, dict) else None) or {}
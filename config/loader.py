@@ -0,0 +1,145 @@
+"""Fast YAML configuration loading with a persistent parse cache."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Optional
+
+from build_systems.state import DEFAULT_STATE_DIR, write_atomic
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 2
+RACY_WINDOW = 2.0
+
+
+def get_yaml_loader():
+    """Get the fastest safe YAML loader available.
+
+    Returns:
+        The libyaml based ``CSafeLoader`` if PyYAML was built with it,
+        otherwise the pure-Python ``SafeLoader``
+    """
+    import yaml
+
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_yaml(stream) -> Any:
+    """Parse YAML like ``yaml.safe_load`` but with the C loader when available.
+
+    Args:
+        stream: YAML text or an open file
+
+    Returns:
+        Any: The parsed document
+
+    Raises:
+        yaml.YAMLError: If the document is invalid
+    """
+    import yaml
+
+    return yaml.load(stream, Loader=get_yaml_loader())
+
+
+def _parse_yaml_file(path: str) -> Any:
+    import yaml
+
+    try:
+        with open(path, "r") as f:
+            return parse_yaml(f)
+    except yaml.YAMLError:
+        if get_yaml_loader() is yaml.SafeLoader:
+            raise
+    # libyaml words its errors differently; parse the broken file again with the
+    # pure-Python loader so users get the same messages either way
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=yaml.SafeLoader)
+
+
+def get_cache_path(config_path: str, cache_dir: Optional[str] = None) -> str:
+    """Get the file caching the parsed content of a configuration file.
+
+    Args:
+        config_path: Configuration file
+        cache_dir: Cache directory; defaults to the state directory next to the
+            configuration file
+
+    Returns:
+        str: Path of the cache file
+    """
+    config_path = os.path.abspath(config_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(config_path), DEFAULT_STATE_DIR, "config_cache")
+    name = hashlib.sha1(config_path.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+def _read_cache(cache_path: str, key: tuple) -> Any:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring unreadable config cache {cache_path}: {e}")
+        return None
+    if not isinstance(entry, dict) or entry.get("key") != list(key):
+        return None
+    return entry
+
+
+def _write_cache(cache_path: str, key: tuple, data: Any) -> None:
+    try:
+        content = json.dumps({"key": list(key), "data": data})
+    except (TypeError, ValueError) as e:
+        logger.debug(f"Not caching config {key[1]}: {e}")
+        return
+    # JSON turns e.g. integer mapping keys into strings; such documents are not cached
+    if json.loads(content)["data"] != data:
+        logger.debug(f"Not caching config {key[1]}: it does not survive a JSON round trip")
+        return
+    try:
+        write_atomic(cache_path, content)
+    except OSError as e:
+        logger.debug(f"Failed to write config cache {cache_path}: {e}")
+
+
+def load_yaml_file(path: str, cache_dir: Optional[str] = None, use_cache: bool = True) -> Any:
+    """Load a YAML file, reusing the previous parse while the file is unchanged.
+
+    The parsed document is cached keyed by the file's absolute path, mtime and
+    size, so warm starts read the result back as JSON instead of parsing the
+    YAML. Documents JSON cannot represent exactly, e.g. with dates, are not
+    cached, and neither are files modified within the last few seconds because
+    a further edit in the same timestamp tick would go unnoticed.
+
+    Args:
+        path: YAML file to load
+        cache_dir: Directory for the parse cache (see :func:`get_cache_path`)
+        use_cache: Set to False to always parse the file
+
+    Returns:
+        Any: The parsed document
+
+    Raises:
+        OSError: If the file cannot be read
+        yaml.YAMLError: If the file is not valid YAML
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (CACHE_FORMAT, path, st.st_mtime_ns, st.st_size)
+    cache_path = get_cache_path(path, cache_dir)
+
+    if use_cache:
+        entry = _read_cache(cache_path, key)
+        if entry is not None:
+            return entry["data"]
+
+    data = _parse_yaml_file(path)
+
+    if use_cache and time.time() - st.st_mtime > RACY_WINDOW:
+        _write_cache(cache_path, key, data)
+    return data
@@ -22,7 +22,7 @@ setup(
             "tester=cli:cli",
         ],
     },
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     description="A flexible Python tool for automating UVM testbench execution",
     author="Your Name",
     author_email="your.email@example.com",
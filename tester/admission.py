@@ -0,0 +1,237 @@
+"""Admission of tests by the live load and free memory of the host."""
+
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from build_systems import process
+from config.config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+MB = 1024**2
+_UNITS = {"": MB, "k": 1024, "m": MB, "g": 1024**3, "t": 1024**4}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+
+
+def parse_size(value):
+    """Parse a memory size such as ``512M``, ``30G`` or ``30GiB``; plain numbers are megabytes.
+
+    Raises:
+        ValueError: If the size is not understood
+    """
+    if isinstance(value, (int, float)):
+        return int(value * MB)
+    match = _SIZE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid memory size '{value}', expected e.g. 512M or 30G")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def format_size(size):
+    """Format a size in bytes for log messages."""
+    return f"{size / 1024**3:.1f}G" if abs(size) >= 1024**3 else f"{size / MB:.0f}M"
+
+
+def read_loadavg(proc_dir="/proc"):
+    """Get the 1-minute load average, or None if unknown."""
+    try:
+        with open(os.path.join(proc_dir, "loadavg")) as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_meminfo(proc_dir="/proc"):
+    """Get the fields of ``/proc/meminfo`` in bytes; empty if unknown."""
+    info = {}
+    try:
+        with open(os.path.join(proc_dir, "meminfo")) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                fields = value.split()
+                if fields and fields[0].isdigit():
+                    info[name] = int(fields[0]) * (1024 if fields[1:] == ["kB"] else 1)
+    except OSError:
+        pass
+    return info
+
+
+def read_memory_pressure(proc_dir="/proc"):
+    """Get the share of the last 10s in which tasks stalled on memory, in percent.
+
+    Returns:
+        Optional[float]: The ``some avg10`` pressure stall figure, or None
+        without pressure stall information (kernels before 4.20)
+    """
+    try:
+        with open(os.path.join(proc_dir, "pressure", "memory")) as f:
+            for line in f:
+                if line.startswith("some "):
+                    fields = dict(field.split("=", 1) for field in line.split()[1:])
+                    return float(fields["avg10"])
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+class AdmissionController:
+    """Starts tests only while the host has the CPU and memory to run them.
+
+    A waiting test is admitted when the number of running tests and the
+    1-minute load average are below ``max_load``, when its expected peak
+    memory fits into the available memory minus ``memory_reserve``, and when
+    the expected peaks of all running tests together fit into the total
+    memory minus the reserve, since recently started tests may not have
+    reached their peak yet.
+
+    Under memory pressure, that is when tasks stall on memory for more than
+    ``max_memory_pressure`` percent of the time or the available memory drops
+    below the reserve, the number of tests admitted at once is halved; it
+    grows again by one test per ``poll_interval`` while the host is healthy.
+
+    A test's expected peak is its ``memory`` setting (or its testbench's),
+    else the peak measured in earlier runs, else ``default_test_memory``. A
+    test is always admitted when nothing runs, so a test larger than the
+    host still runs alone, and no test overtakes one that has waited more
+    than ``max_overtake`` seconds.
+    """
+
+    def __init__(self, config, history=None, proc_dir="/proc"):
+        """Create the controller.
+
+        Args:
+            config: Tester configuration; the ``admission`` section holds the limits
+            history: Optional MemoryHistory with the measured peaks of earlier runs
+            proc_dir: Mount point of procfs, for testing
+        """
+        settings = config.get("admission") or {}
+        self.config = ConfigManager(config=config)
+        self.history = history
+        self.proc_dir = proc_dir
+        self.max_load = float(settings.get("max_load") or os.cpu_count() or 1)
+        self.memory_reserve = parse_size(settings.get("memory_reserve", "1G"))
+        self.default_memory = parse_size(settings.get("default_test_memory", "512M"))
+        self.max_pressure = float(settings.get("max_memory_pressure", 10.0))
+        self.poll_interval = float(settings.get("poll_interval", 1.0))
+        self.max_overtake = float(settings.get("max_overtake", 60.0))
+        self.limit = self.max_load
+        self._cond = threading.Condition()
+        self._running = {}
+        self._waiting = {}
+        self._next_ticket = 0
+        self._last_change = 0.0
+        self._last_reason = None
+
+    def footprint(self, testbench, test):
+        """Get the expected peak memory of a test in bytes."""
+        declared = self.config.get_test_config(testbench, test).get("memory")
+        if declared is None:
+            declared = self.config.get_testbench_config(testbench).get("memory")
+        if declared is not None:
+            return parse_size(declared)
+        learned = self.history.predict(testbench, test) if self.history is not None else None
+        return learned or self.default_memory
+
+    @property
+    def running(self):
+        """Number of admitted tests that have not finished yet."""
+        with self._cond:
+            return len(self._running)
+
+    @contextmanager
+    def admit(self, testbench, test):
+        """Wait until the test may start and count it as running for the duration of the block.
+
+        Yields:
+            bool: True once admitted; False if the regression was cancelled while
+            waiting, in which case the test must not start
+        """
+        footprint = self.footprint(testbench, test)
+        ticket = self._wait(f"{testbench}/{test}", footprint)
+        if ticket is None:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            with self._cond:
+                del self._running[ticket]
+                self._cond.notify_all()
+
+    def _wait(self, name, footprint):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._waiting[ticket] = time.monotonic()
+            try:
+                while not process.is_cancelled():
+                    reason = self._refusal(ticket, footprint)
+                    if reason is None:
+                        self._running[ticket] = footprint
+                        return ticket
+                    if reason != self._last_reason:
+                        logger.info(f"Holding back {name}: {reason}")
+                        self._last_reason = reason
+                    self._cond.wait(self.poll_interval)
+                return None
+            finally:
+                del self._waiting[ticket]
+
+    def _refusal(self, ticket, footprint):
+        """Get the reason a waiting test may not start yet, or None; call with the lock held."""
+        pressure = self._memory_pressure()
+        self._adapt_limit(pressure)
+        if not self._running:
+            return None
+        oldest = min(self._waiting, key=self._waiting.get)
+        if oldest != ticket and time.monotonic() - self._waiting[oldest] > self.max_overtake:
+            return "an earlier test has waited too long"
+        if len(self._running) >= self.limit:
+            return f"{len(self._running)} test(s) running, limit {self.limit:.0f}"
+        if pressure:
+            return pressure
+        load = read_loadavg(self.proc_dir)
+        if load is not None and load >= self.max_load:
+            return f"load average {load:.1f}"
+        return self._memory_refusal(footprint)
+
+    def _memory_pressure(self):
+        """Describe memory pressure on the host, or None if there is none."""
+        stall = read_memory_pressure(self.proc_dir)
+        if stall is not None and stall > self.max_pressure:
+            return f"memory pressure {stall:.0f}%"
+        available = read_meminfo(self.proc_dir).get("MemAvailable")
+        if available is not None and available < self.memory_reserve:
+            return f"only {format_size(available)} memory available"
+        return None
+
+    def _memory_refusal(self, footprint):
+        meminfo = read_meminfo(self.proc_dir)
+        available = meminfo.get("MemAvailable", meminfo.get("MemFree"))
+        if available is not None and footprint > available - self.memory_reserve:
+            return f"needs {format_size(footprint)}, {format_size(available - self.memory_reserve)} available"
+        total = meminfo.get("MemTotal")
+        committed = sum(self._running.values())
+        if total is not None and committed + footprint > total - self.memory_reserve:
+            return f"needs {format_size(footprint)}, {format_size(committed)} committed to running tests"
+        return None
+
+    def _adapt_limit(self, pressure):
+        """Halve the concurrency limit under memory pressure, then let it recover slowly."""
+        now = time.monotonic()
+        if now - self._last_change < self.poll_interval:
+            return
+        if pressure:
+            limit = max(1.0, min(self.limit, len(self._running)) / 2)
+            if limit < self.limit:
+                logger.warning(f"Backing off to {limit:.0f} concurrent test(s): {pressure}")
+                self.limit = limit
+        elif self.limit < self.max_load:
+            self.limit = min(self.max_load, self.limit + 1)
+        else:
+            return
+        self._last_change = now
@@ -0,0 +1,707 @@
+"""Coordinator and workers spreading a regression over several hosts.
+
+The coordinator listens on a TCP port; ``tester worker`` processes connect to
+it, pull one job at a time, build their testbench locally when needed and send
+back the result together with the tail of the test's log. Messages are JSON
+objects, one per line:
+
+* worker to coordinator: ``hello``, ``request`` (carrying the build keys
+  present on the worker), ``result`` and ``heartbeat``
+* coordinator to worker: ``welcome`` or ``error``, ``job``, ``cancel`` and
+  ``shutdown``
+
+A worker that disconnects or stops sending heartbeats while it holds jobs is
+considered lost and its jobs are handed to other workers. The protocol has no
+encryption; an optional shared token keeps strangers from joining, so only run
+it on a trusted network.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+from build_systems import process
+from build_systems.state import load_json, save_json
+
+from .runner import TestRunner
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7420
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TIMEOUT = 30.0
+
+
+def parse_address(text, default_host="0.0.0.0"):
+    """Parse a ``HOST:PORT`` or ``PORT`` address.
+
+    Args:
+        text: Address as typed by the user
+        default_host: Host used when only a port is given
+
+    Returns:
+        tuple: Host and port
+
+    Raises:
+        ValueError: If the address is not understood
+    """
+    host, _, port = str(text).strip().rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid address '{text}', expected HOST:PORT or PORT")
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Invalid port {port} in address '{text}'")
+    return host.strip("[]") or default_host, port
+
+
+def build_key(testbench, build_options):
+    """Identify one build of a testbench across hosts."""
+    return json.dumps([testbench, build_options], sort_keys=True, default=str)
+
+
+class _Connection:
+    """A socket exchanging JSON lines, shared by one reader and several writers."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        data = (json.dumps(message, default=str) + "\n").encode("utf-8")
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def receive(self):
+        """Get the next message, or None once the peer has disconnected."""
+        line = self._reader.readline()
+        return json.loads(line.decode("utf-8")) if line else None
+
+    def abort(self):
+        """Break the connection, waking up a blocked reader."""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        self.abort()
+        self._reader.close()
+        self.sock.close()
+
+
+class _RemoteWorker:
+    """Coordinator-side state of one connected worker."""
+
+    def __init__(self, conn, name, host):
+        self.conn = conn
+        self.name = name
+        self.host = host
+        self.jobs = {}
+        self.last_seen = time.monotonic()
+
+
+class Coordinator:
+    """Hands out jobs to connected workers and collects their results.
+
+    Jobs are queued per build key. A worker asking for work gets the oldest
+    job whose build it already has, then the oldest job needing no build,
+    and only then the oldest job overall, so testbenches are built on as few
+    hosts as possible.
+    """
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, token=None, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        """Start listening for workers.
+
+        Args:
+            host: Interface to listen on
+            port: TCP port to listen on; 0 picks a free one
+            token: Shared secret workers must present, or None to accept any worker
+            heartbeat_timeout: Seconds of silence after which a busy worker is considered lost
+        """
+        self.token = token
+        self.heartbeat_timeout = float(heartbeat_timeout)
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+        self._workers = []
+        self._results = queue.Queue()
+        self._outstanding = 0
+        self._sequence = 0
+        self._cancelled = False
+        self._closed = threading.Event()
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        # A timeout lets the accept loop notice that the coordinator was closed
+        self._server.settimeout(0.5)
+        self.address = self._server.getsockname()[:2]
+        for target in (self._accept, self._monitor):
+            threading.Thread(target=target, name=f"coordinator-{target.__name__}", daemon=True).start()
+        logger.info(f"Waiting for workers on {self.address[0]}:{self.address[1]}")
+
+    @property
+    def outstanding(self):
+        """Number of submitted jobs whose result has not arrived yet."""
+        with self._cond:
+            return self._outstanding
+
+    @property
+    def workers(self):
+        """Names of the connected workers."""
+        with self._cond:
+            return [worker.name for worker in self._workers]
+
+    def submit(self, job_id, testbench, test, options, build=None):
+        """Queue a test for the workers.
+
+        Args:
+            job_id: Identifier the result is reported with
+            testbench: Name of the testbench
+            test: Name of the test
+            options: Run options of the test
+            build: Build options if the testbench has to be built first, else None
+        """
+        job = {
+            "id": job_id,
+            "testbench": testbench,
+            "test": test,
+            "options": options,
+            "build": build,
+            "key": build_key(testbench, build) if build is not None else None,
+        }
+        with self._cond:
+            job["seq"] = self._sequence
+            self._sequence += 1
+            self._queues.setdefault(job["key"], deque()).append(job)
+            self._outstanding += 1
+            self._cond.notify_all()
+
+    def next_result(self, timeout=None):
+        """Wait for the next result.
+
+        Returns:
+            Optional[dict]: The worker's result message with the original ``job``
+            and the ``worker`` and ``host`` it ran on added, or None on timeout
+        """
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cancel(self):
+        """Drop every queued job and kill the running ones on the workers.
+
+        Returns:
+            list: Identifiers of the dropped jobs
+        """
+        with self._cond:
+            self._cancelled = True
+            dropped = [job["id"] for jobs in self._queues.values() for job in jobs]
+            self._queues.clear()
+            self._outstanding -= len(dropped)
+            busy = [worker for worker in self._workers if worker.jobs]
+        self._broadcast(busy, {"type": "cancel"})
+        return dropped
+
+    def close(self):
+        """Tell every worker to shut down and stop listening."""
+        self._closed.set()
+        with self._cond:
+            workers = list(self._workers)
+            self._cond.notify_all()
+        self._broadcast(workers, {"type": "shutdown"})
+        self._server.close()
+
+    @staticmethod
+    def _broadcast(workers, message):
+        for worker in workers:
+            try:
+                worker.conn.send(message)
+            except OSError:
+                pass
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            threading.Thread(target=self._serve, args=(sock, address), daemon=True).start()
+
+    def _monitor(self):
+        """Disconnect busy workers whose heartbeats stopped; their jobs are then rescheduled."""
+        interval = max(0.05, min(1.0, self.heartbeat_timeout / 4))
+        while not self._closed.wait(interval):
+            now = time.monotonic()
+            with self._cond:
+                lost = [w for w in self._workers if w.jobs and now - w.last_seen > self.heartbeat_timeout]
+            for worker in lost:
+                logger.warning(f"Worker {worker.name} sent no heartbeat for {self.heartbeat_timeout:g}s")
+                worker.conn.abort()
+
+    def _handshake(self, conn, address):
+        """Check a new worker's hello message and register it."""
+        hello = conn.receive()
+        error = None
+        if not hello or hello.get("type") != "hello" or hello.get("version") != PROTOCOL_VERSION:
+            error = f"Expected a hello message of protocol version {PROTOCOL_VERSION}"
+        elif self.token is not None and hello.get("token") != self.token:
+            error = "Invalid token"
+        if error:
+            logger.warning(f"Rejecting worker at {address[0]}:{address[1]}: {error}")
+            conn.send({"type": "error", "message": error})
+            return None
+
+        worker = _RemoteWorker(conn, hello.get("name") or f"{address[0]}:{address[1]}", hello.get("host") or address[0])
+        with self._cond:
+            self._workers.append(worker)
+        conn.send({"type": "welcome", "heartbeat_interval": min(HEARTBEAT_INTERVAL, self.heartbeat_timeout / 3)})
+        logger.info(f"Worker {worker.name} connected")
+        return worker
+
+    def _serve(self, sock, address):
+        conn = _Connection(sock)
+        worker = None
+        try:
+            worker = self._handshake(conn, address)
+            while worker is not None:
+                message = conn.receive()
+                if message is None:
+                    break
+                self._handle(worker, message)
+        except (OSError, ValueError) as e:
+            if not self._closed.is_set():
+                logger.warning(f"Connection to worker at {address[0]}:{address[1]} failed: {e}")
+        finally:
+            if worker is not None:
+                self._disconnect(worker)
+            conn.close()
+
+    def _handle(self, worker, message):
+        kind = message.get("type")
+        with self._cond:
+            worker.last_seen = time.monotonic()
+        if kind == "request":
+            job = self._assign(worker, set(message.get("builds") or ()))
+            if job is not None:
+                worker.conn.send({"type": "job", "job": job})
+        elif kind == "result":
+            with self._cond:
+                job = worker.jobs.pop(message.get("id"), None)
+                if job is None:
+                    logger.warning(f"Ignoring result of unknown job {message.get('id')} from worker {worker.name}")
+                    return
+                self._outstanding -= 1
+                self._cond.notify_all()
+            self._results.put(dict(message, job=job, worker=worker.name, host=worker.host))
+        elif kind != "heartbeat":
+            logger.warning(f"Ignoring unexpected '{kind}' message from worker {worker.name}")
+
+    def _assign(self, worker, builds):
+        """Wait for a job for ``worker`` and mark it as running there.
+
+        Returns:
+            Optional[dict]: The job, or None once the coordinator is closed
+        """
+        with self._cond:
+            while not self._closed.is_set():
+                job = self._take(builds)
+                if job is not None:
+                    worker.jobs[job["id"]] = job
+                    # The heartbeat clock starts with the job, not while the worker waited for it
+                    worker.last_seen = time.monotonic()
+                    return job
+                self._cond.wait(1.0)
+        return None
+
+    def _take(self, builds):
+        """Pop the best queued job for a worker having ``builds``; call with the lock held."""
+        for key in [key for key in builds if key in self._queues] + [None]:
+            if self._queues.get(key):
+                return self._pop(key)
+        candidates = [key for key, jobs in self._queues.items() if jobs]
+        if not candidates:
+            return None
+        return self._pop(min(candidates, key=lambda key: self._queues[key][0]["seq"]))
+
+    def _pop(self, key):
+        job = self._queues[key].popleft()
+        if not self._queues[key]:
+            del self._queues[key]
+        return job
+
+    def _disconnect(self, worker):
+        with self._cond:
+            self._workers.remove(worker)
+            jobs = sorted(worker.jobs.values(), key=lambda job: job["seq"], reverse=True)
+            worker.jobs.clear()
+            if self._cancelled or self._closed.is_set():
+                self._outstanding -= len(jobs)
+            else:
+                for job in jobs:
+                    self._queues.setdefault(job["key"], deque()).appendleft(job)
+            self._cond.notify_all()
+        if jobs and not self._cancelled:
+            logger.warning(f"Worker {worker.name} lost, rescheduling {len(jobs)} job(s)")
+        else:
+            logger.info(f"Worker {worker.name} disconnected")
+
+
+class _LocalBuilds:
+    """The build each testbench currently has on this host, shared by the slots of a worker.
+
+    A testbench has a single build directory, so a test only starts once the
+    build it needs is in place, and a testbench is only rebuilt with other
+    build options while none of its tests is running. The builds are saved so
+    a restarted worker still reports them, as long as the build system's
+    fingerprint shows that the build directory was not rebuilt in between.
+    """
+
+    def __init__(self, fingerprint, path=None):
+        """Load the builds of a previous worker session.
+
+        Args:
+            fingerprint: Function returning the current build fingerprint of a testbench
+            path: JSON file the builds are saved in; None keeps them in memory only
+        """
+        self.path = path
+        self._fingerprint = fingerprint
+        self._cond = threading.Condition()
+        self._current = {}
+        self._users = Counter()
+        self._building = set()
+        self._failed = set()
+        for testbench, entry in (load_json(path, {}) if path else {}).items():
+            if entry.get("fingerprint") and entry["fingerprint"] == self._get_fingerprint(testbench):
+                self._current[testbench] = entry["key"]
+
+    def _get_fingerprint(self, testbench):
+        try:
+            return self._fingerprint(testbench)
+        except Exception as e:
+            logger.debug(f"No build fingerprint for {testbench}: {e}")
+            return None
+
+    def keys(self):
+        """Build keys present on this host."""
+        with self._cond:
+            return sorted(self._current.values())
+
+    def acquire(self, testbench, key, build):
+        """Make sure the build ``key`` is in place and keep it there until :meth:`release`.
+
+        Args:
+            testbench: Name of the testbench
+            key: Build key of the required build
+            build: Function building the testbench, returning True on success
+
+        Returns:
+            bool: True if the build is in place; False if it failed, in which case
+            :meth:`release` must not be called
+        """
+        with self._cond:
+            while testbench in self._building or (self._current.get(testbench) != key and self._users[testbench]):
+                self._cond.wait()
+            if key in self._failed:
+                return False
+            if self._current.get(testbench) == key:
+                self._users[testbench] += 1
+                return True
+            self._building.add(testbench)
+            self._current.pop(testbench, None)
+
+        built = False
+        try:
+            built = build()
+        finally:
+            with self._cond:
+                self._building.discard(testbench)
+                if built:
+                    self._current[testbench] = key
+                    self._users[testbench] += 1
+                else:
+                    self._failed.add(key)
+                self._cond.notify_all()
+        if built:
+            self._save()
+        return built
+
+    def release(self, testbench):
+        """Allow the testbench to be rebuilt again once no test uses its build."""
+        with self._cond:
+            self._users[testbench] -= 1
+            self._cond.notify_all()
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._cond:
+            current = dict(self._current)
+        data = {}
+        for testbench, key in current.items():
+            # Without a fingerprint there is no telling later whether the build is still there
+            fingerprint = self._get_fingerprint(testbench)
+            if fingerprint:
+                data[testbench] = {"key": key, "fingerprint": fingerprint}
+        try:
+            save_json(self.path, data)
+        except OSError as e:
+            logger.warning(f"Failed to save the worker builds to {self.path}: {e}")
+
+
+class Worker:
+    """Executes jobs of a coordinator on this host.
+
+    Each of the worker's ``slots`` holds its own connection to the coordinator
+    and runs one test at a time, so a host with many cores or licenses runs a
+    single worker with several slots.
+    """
+
+    def __init__(
+        self,
+        build_system,
+        address,
+        name=None,
+        token=None,
+        slots=1,
+        connect_timeout=60.0,
+        state_path=None,
+    ):
+        """Create a worker.
+
+        Args:
+            build_system: BuildSystemBase used to build and run the tests
+            address: ``(host, port)`` of the coordinator
+            name: Name of the worker in logs and reports; defaults to host and process id
+            token: Shared secret expected by the coordinator
+            slots: Number of tests run concurrently
+            connect_timeout: Seconds to keep retrying while the coordinator is not up yet
+            state_path: JSON file remembering the builds present on this host
+        """
+        self.build_system = build_system
+        self.address = tuple(address)
+        self.host = socket.gethostname()
+        self.name = name or f"{self.host}:{os.getpid()}"
+        self.token = token
+        self.slots = max(1, int(slots or 1))
+        self.connect_timeout = connect_timeout
+        self.runner = TestRunner(build_system)
+        self.builds = _LocalBuilds(build_system.get_build_fingerprint, state_path)
+        # Cancelling kills the commands of the whole process, so the slots share
+        # the count of cancellations, of those the process state was reset
+        # after, and of jobs running
+        self._cancel = threading.Condition()
+        self._cancellations = 0
+        self._resets = 0
+        self._busy = 0
+
+    def run(self):
+        """Execute jobs until the coordinator shuts down or goes away.
+
+        Returns:
+            int: Number of jobs executed
+
+        Raises:
+            ConnectionError: If the coordinator cannot be reached or rejects the worker
+        """
+        connections = self._connect_slots()
+        counts = [0] * len(connections)
+        threads = [
+            threading.Thread(target=self._serve, args=(conn, interval, counts, slot), daemon=True)
+            for slot, (conn, interval) in enumerate(connections)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                # Joining with a timeout keeps Ctrl-C responsive
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            logger.warning("Worker interrupted, killing running tests")
+            process.terminate_all()
+            for conn, _ in connections:
+                conn.abort()
+            raise
+        return sum(counts)
+
+    def _connect_slots(self):
+        """Connect every slot, or none of them."""
+        connections = []
+        try:
+            for slot in range(self.slots):
+                name = self.name if self.slots == 1 else f"{self.name}/{slot + 1}"
+                connections.append(self._connect(name))
+        except BaseException:
+            for conn, _ in connections:
+                conn.close()
+            raise
+        return connections
+
+    def _connect(self, name):
+        """Connect one slot and introduce it to the coordinator.
+
+        Returns:
+            tuple: The connection and the heartbeat interval asked for by the coordinator
+        """
+        deadline = time.monotonic() + (self.connect_timeout or 0)
+        while True:
+            try:
+                sock = socket.create_connection(self.address, timeout=10)
+                break
+            except OSError as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Cannot connect to coordinator {self.address[0]}:{self.address[1]}: {e}")
+                time.sleep(1.0)
+        sock.settimeout(None)
+        conn = _Connection(sock)
+        try:
+            conn.send({"type": "hello", "version": PROTOCOL_VERSION, "name": name, "host": self.host, "token": self.token})
+            reply = conn.receive()
+        except (OSError, ValueError) as e:
+            conn.close()
+            raise ConnectionError(f"Handshake with coordinator failed: {e}")
+        if not reply or reply.get("type") != "welcome":
+            conn.close()
+            raise ConnectionError(f"Coordinator rejected the worker: {(reply or {}).get('message', 'connection closed')}")
+        logger.info(f"Worker {name} connected to coordinator {self.address[0]}:{self.address[1]}")
+        return conn, float(reply.get("heartbeat_interval", HEARTBEAT_INTERVAL))
+
+    def _serve(self, conn, heartbeat_interval, counts, slot):
+        """Request and execute jobs on one connection until it ends."""
+        jobs = queue.Queue()
+        stop = threading.Event()
+        threading.Thread(target=self._read, args=(conn, jobs, stop), daemon=True).start()
+        threading.Thread(target=self._heartbeat, args=(conn, heartbeat_interval, stop), daemon=True).start()
+        try:
+            while not stop.is_set():
+                conn.send({"type": "request", "builds": self.builds.keys()})
+                job = jobs.get()
+                if job is None:
+                    break
+                self._start_job()
+                try:
+                    result = self.execute(job)
+                finally:
+                    self._end_job()
+                conn.send(dict(result, type="result", id=job["id"]))
+                counts[slot] += 1
+        except OSError as e:
+            if not stop.is_set():
+                logger.warning(f"Lost the connection to the coordinator: {e}")
+        finally:
+            stop.set()
+            conn.close()
+
+    def _read(self, conn, jobs, stop):
+        """Receive coordinator messages; jobs are queued, cancellation acts immediately."""
+        try:
+            while True:
+                message = conn.receive()
+                kind = message.get("type") if message else None
+                if kind == "job":
+                    jobs.put(message["job"])
+                elif kind == "cancel":
+                    self._cancel_jobs()
+                elif kind == "shutdown":
+                    break
+                elif message is None:
+                    if not stop.is_set():
+                        # Results of tests still running would be thrown away
+                        logger.warning("Coordinator went away, killing running tests")
+                        process.terminate_all()
+                    break
+        except (OSError, ValueError):
+            process.terminate_all()
+        finally:
+            stop.set()
+            jobs.put(None)
+
+    def _cancel_jobs(self):
+        """Kill the running tests of every slot; the next job resets the process state."""
+        with self._cancel:
+            process.terminate_all()
+            self._cancellations += 1
+
+    def _start_job(self):
+        """Wait until a cancellation has been reset after, before a slot starts a job.
+
+        The process state is only reset once no slot still runs a job the
+        cancellation killed, so those jobs cannot start new commands.
+        """
+        with self._cancel:
+            while self._resets < self._cancellations:
+                if self._busy:
+                    self._cancel.wait()
+                else:
+                    process.reset()
+                    self._resets = self._cancellations
+            self._busy += 1
+
+    def _end_job(self):
+        with self._cancel:
+            self._busy -= 1
+            self._cancel.notify_all()
+
+    @staticmethod
+    def _heartbeat(conn, interval, stop):
+        while not stop.wait(interval):
+            try:
+                conn.send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    def execute(self, job):
+        """Build the testbench of a job if needed and run its test.
+
+        Args:
+            job: Job message from the coordinator
+
+        Returns:
+            dict: ``status``, ``duration``, ``details``, ``log_path``, resource ``usage`` of the run
+            and whether the tester ``killed`` it
+        """
+        testbench, test = job["testbench"], job["test"]
+        options = dict(job.get("options") or {})
+        if job.get("build") is None:
+            return self._run(testbench, test, options)
+
+        if not self.builds.acquire(testbench, job["key"], lambda: self._build(testbench, job["build"])):
+            details = f"Build of testbench {testbench} failed on worker {self.name}"
+            return {"status": "skipped", "duration": 0.0, "details": details, "log_path": None}
+        try:
+            return self._run(testbench, test, dict(options, prebuilt=True))
+        finally:
+            self.builds.release(testbench)
+
+    def _build(self, testbench, build_options):
+        logger.info(f"Building testbench {testbench}")
+        try:
+            return bool(self.build_system.build(testbench, dict(build_options)))
+        except Exception as e:
+            logger.error(f"Failed to build testbench {testbench}: {e}")
+            return False
+
+    def _run(self, testbench, test, options):
+        status, duration, details, log_path, usage, killed = self.runner.execute(testbench, test, options)
+        logger.info(f"{testbench}/{test}: {status} ({duration:.1f}s)")
+        return {
+            "status": status,
+            "duration": duration,
+            "details": details,
+            "log_path": log_path,
+            "usage": usage,
+            "killed": killed,
+        }
@@ -0,0 +1,139 @@
+"""Persistent per-test duration history used to schedule regressions."""
+
+import logging
+import statistics
+import threading
+
+from build_systems.state import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+
+class DurationHistory:
+    """Remembers how long each test took and predicts how long it will take.
+
+    Durations are smoothed with an exponential moving average so a single slow
+    run does not dominate the prediction. Tests that were never seen are
+    predicted from the average of their testbench, then from the median of
+    all known tests and finally from ``default_duration``.
+    """
+
+    def __init__(self, path=None, default_duration=60.0, smoothing=0.5):
+        """Load the history.
+
+        Args:
+            path: JSON file the history is stored in; None keeps it in memory only
+            default_duration: Prediction in seconds when nothing is known
+            smoothing: Weight of the newest duration in the moving average
+        """
+        self.path = path
+        self.default_duration = float(default_duration)
+        self.smoothing = float(smoothing)
+        self._lock = threading.Lock()
+        self._durations = {}
+        if path:
+            data = load_json(path, {})
+            self._durations = {key: float(value) for key, value in data.get("durations", {}).items()}
+
+    @staticmethod
+    def _key(testbench, test):
+        return f"{testbench}/{test}"
+
+    def record(self, testbench, test, duration):
+        """Record the wall time of a finished test."""
+        key = self._key(testbench, test)
+        with self._lock:
+            previous = self._durations.get(key)
+            if previous is None:
+                self._durations[key] = float(duration)
+            else:
+                self._durations[key] = self.smoothing * float(duration) + (1 - self.smoothing) * previous
+
+    def _predictor(self):
+        """Snapshot the history into a ``predict(testbench, test)`` function."""
+        with self._lock:
+            durations = dict(self._durations)
+
+        per_testbench = {}
+        for key, value in durations.items():
+            per_testbench.setdefault(key.split("/", 1)[0], []).append(value)
+        testbench_means = {tb: sum(values) / len(values) for tb, values in per_testbench.items()}
+        fallback = statistics.median(durations.values()) if durations else self.default_duration
+
+        def predict(testbench, test):
+            known = durations.get(self._key(testbench, test))
+            if known is not None:
+                return known
+            return testbench_means.get(testbench, fallback)
+
+        return predict
+
+    def predict(self, testbench, test):
+        """Predict the wall time of a test in seconds."""
+        return self._predictor()(testbench, test)
+
+    def order(self, items):
+        """Sort ``(testbench, test, ...)`` items longest-predicted first.
+
+        Dispatching the longest jobs first keeps a long test from starting last
+        and stretching the wall-clock time of the whole regression.
+        """
+        predict = self._predictor()
+        return sorted(items, key=lambda item: predict(item[0], item[1]), reverse=True)
+
+    def save(self):
+        """Write the history back to its file."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {"durations": dict(self._durations)}
+        try:
+            save_json(self.path, data)
+        except OSError as e:
+            logger.warning(f"Failed to save test duration history: {e}")
+
+
+class MemoryHistory:
+    """Remembers the peak memory footprint of each test.
+
+    A larger peak replaces the remembered one right away, while smaller peaks
+    only lower it gradually, so one lucky run does not make the scheduler
+    place a memory hungry test next to others.
+    """
+
+    def __init__(self, path=None, decay=0.75):
+        """Load the history.
+
+        Args:
+            path: JSON file the history is stored in; None keeps it in memory only
+            decay: Fraction of the remembered peak kept when a run used less
+        """
+        self.path = path
+        self.decay = float(decay)
+        self._lock = threading.Lock()
+        self._peaks = {}
+        if path:
+            data = load_json(path, {})
+            self._peaks = {key: int(value) for key, value in data.get("memory", {}).items()}
+
+    def record(self, testbench, test, peak):
+        """Record the peak RSS in bytes of a finished test."""
+        key = f"{testbench}/{test}"
+        with self._lock:
+            self._peaks[key] = int(max(peak, self.decay * self._peaks.get(key, 0)))
+
+    def predict(self, testbench, test):
+        """Get the expected peak RSS of a test in bytes, or None if it never ran."""
+        with self._lock:
+            return self._peaks.get(f"{testbench}/{test}")
+
+    def save(self):
+        """Write the history back to its file."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {"memory": dict(self._peaks)}
+        try:
+            save_json(self.path, data)
+        except OSError as e:
+            logger.warning(f"Failed to save test memory history: {e}")
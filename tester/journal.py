@@ -0,0 +1,185 @@
+"""Append-only journal of a regression, to resume it or rerun its failures."""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Options that do not change what a test does, left out of its key
+_IGNORED_OPTIONS = ("prebuilt", "verbose")
+
+
+def instance_key(testbench, test, options):
+    """Identify a test instance by its testbench, test and run options."""
+    options = {name: value for name, value in (options or {}).items() if name not in _IGNORED_OPTIONS}
+    return json.dumps([testbench, test, options], sort_keys=True, default=str)
+
+
+class JournalState:
+    """What a journal says about its regression.
+
+    Attributes:
+        items: Planned ``(testbench, test, options)`` instances, in order
+        results: Per instance key, the finish records of its last runs, at most
+            as many as the instance is planned
+    """
+
+    def __init__(self, items, finishes):
+        self.items = items
+        planned = Counter(instance_key(*item) for item in items)
+        self.results = OrderedDict((key, finishes.get(key, [])[-count:]) for key, count in planned.items())
+
+    def remaining(self, failed=False):
+        """Select the instances still to run and the results to keep.
+
+        Args:
+            failed: Also rerun the instances whose last run did not pass
+
+        Returns:
+            tuple: The ``(testbench, test, options)`` instances to run and the
+            finish records carried over from the earlier runs
+        """
+        kept = {
+            key: [record for record in records if not failed or record["status"] == "passed"]
+            for key, records in self.results.items()
+        }
+        done = Counter({key: len(records) for key, records in kept.items()})
+        to_run = []
+        for item in self.items:
+            key = instance_key(*item)
+            if done[key] > 0:
+                done[key] -= 1
+            else:
+                to_run.append(item)
+        return to_run, [record for records in kept.values() for record in records]
+
+
+class RunJournal:
+    """Records the plan of a regression and the dispatch and finish of every test.
+
+    The journal is a file of JSON lines that is only ever appended to, and
+    every line is flushed to disk with ``fsync`` before the regression goes
+    on. When the tester or its host dies, the journal therefore holds every
+    result up to the crash; at most the line being written is lost. A
+    resumed run appends to the same journal, so it always describes the
+    regression as a whole.
+
+    Tests that were cancelled or skipped are not journaled as finished, so
+    they run again when the regression is resumed.
+    """
+
+    def __init__(self, path):
+        """Create the journal; nothing is written before ``start`` or ``resume``.
+
+        Args:
+            path: Journal file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def exists(self):
+        """Check whether an earlier run left a journal."""
+        return os.path.exists(self.path)
+
+    def start(self, items, run_id):
+        """Start a new journal for a regression, replacing any earlier one.
+
+        Args:
+            items: ``(testbench, test, options)`` instances of the regression
+            run_id: Identifier of the run
+        """
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._append({"event": "plan", "run_id": run_id, "time": time.time(), "items": [list(item) for item in items]})
+
+    def resume(self, run_id, mode):
+        """Continue the journal of an earlier run.
+
+        Args:
+            run_id: Identifier of the resuming run
+            mode: What is run again, for the record
+        """
+        self.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # Complete the line cut short by a crash, so it does not swallow the next record
+            self._file.write("\n")
+        self._append({"event": "resume", "run_id": run_id, "time": time.time(), "mode": mode})
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def dispatch(self, testbench, test, options):
+        """Record that a test started."""
+        self._append({"event": "dispatch", "key": instance_key(testbench, test, options), "time": time.time()})
+
+    def finish(self, testbench, test, options, status, duration, details=None, log_path=None, host=None, usage=None):
+        """Record the outcome of a test that ran."""
+        record = {
+            "event": "finish",
+            "key": instance_key(testbench, test, options),
+            "time": time.time(),
+            "testbench": testbench,
+            "test": test,
+            "seed": options.get("seed"),
+            "status": status,
+            "duration": duration,
+            "details": details,
+            "log_path": log_path,
+            "host": host,
+            "usage": usage or None,
+        }
+        self._append(record)
+
+    def _append(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None or self._file.closed:
+                logger.warning(f"Ignoring {record['event']} record written after the journal was closed")
+                return
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def load(self):
+        """Read the journal of an earlier run.
+
+        Returns:
+            JournalState: The planned instances and their results
+
+        Raises:
+            ValueError: If there is no journal or it has no plan
+        """
+        items, finishes = None, {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last line is cut short when the tester died while writing it
+                        logger.warning(f"Ignoring damaged line {number} of journal {self.path}")
+                        continue
+                    if record.get("event") == "plan":
+                        items = [tuple(item) for item in record["items"]]
+                    elif record.get("event") == "finish":
+                        finishes.setdefault(record["key"], []).append(record)
+        except OSError as e:
+            raise ValueError(f"No journal to resume: {e}")
+        if items is None:
+            raise ValueError(f"Journal {self.path} has no regression plan")
+        return JournalState(items, finishes)
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.close()
@@ -0,0 +1,125 @@
+"""JUnit XML report written incrementally while a regression runs."""
+
+import datetime
+import logging
+import os
+import re
+import socket
+import threading
+from xml.sax.saxutils import escape, quoteattr
+
+logger = logging.getLogger(__name__)
+
+# Characters XML 1.0 does not allow, which simulator output sometimes contains
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Room left in the header for the counts to grow without moving any test case
+HEADER_RESERVE = 96
+
+_FOOTER = "</testsuite>\n</testsuites>\n"
+
+
+def _clean(text):
+    return _INVALID_XML_CHARS.sub("?", str(text))
+
+
+def _attr(value):
+    return quoteattr(_clean(value))
+
+
+class JUnitWriter:
+    """Streams test results into a JUnit XML file.
+
+    Each result is appended as a ``<testcase>`` element as soon as it is
+    added, so memory use does not grow with the number of tests. After every
+    result the closing tags and the counts in the fixed-size header are
+    rewritten in place, so the file on disk is a complete, valid report even
+    when the regression is interrupted.
+    """
+
+    def __init__(self, path, suite_name="tester"):
+        """Create the report file.
+
+        Args:
+            path: JUnit XML file to write
+            suite_name: Name of the test suite
+        """
+        self.path = path
+        self.suite_name = suite_name
+        self.timestamp = datetime.datetime.now().replace(microsecond=0).isoformat()
+        self.hostname = socket.gethostname()
+        self.counts = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+        self.time = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w+", encoding="utf-8")
+        self._header_size = len(self._header()) + HEADER_RESERVE
+        self._file.write(" " * self._header_size)
+        self._end = self._file.tell()
+        self._write_footer()
+
+    def _header(self):
+        counts = " ".join(f'{name}="{value}"' for name, value in self.counts.items())
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<testsuites name={_attr(self.suite_name)} {counts} time="{self.time:.3f}">\n'
+            f"<testsuite name={_attr(self.suite_name)} {counts} "
+            f'time="{self.time:.3f}" timestamp="{self.timestamp}" hostname={_attr(self.hostname)}'
+        )
+
+    def _write_footer(self):
+        # Whitespace before the ">" keeps the header size fixed as the counts grow
+        self._file.write(_FOOTER)
+        self._file.truncate()
+        self._file.seek(0)
+        self._file.write(self._header().ljust(self._header_size - 2) + ">\n")
+        self._file.seek(self._end)
+        self._file.flush()
+
+    def add(self, testbench, test, status, duration=0.0, details=None, name=None):
+        """Append one result.
+
+        Args:
+            testbench: Name of the testbench, used as the class name
+            test: Name of the test
+            status: Result status; failed and timeout are failures, skipped is skipped
+            duration: Wall time in seconds
+            details: Failure text, such as the tail of the test's log
+            name: Name of the test case, e.g. including the seed; defaults to ``test``
+        """
+        element = f'<testcase classname={_attr(testbench)} name={_attr(name or test)} time="{duration or 0.0:.3f}"'
+        body = ""
+        if status in ("failed", "timeout"):
+            message = (details or status).strip().split("\n", 1)[0]
+            body = f"<failure type={_attr(status)} message={_attr(message)}>{escape(_clean(details or ''))}</failure>"
+        elif status == "skipped":
+            body = f"<skipped message={_attr(details or 'skipped')}/>"
+        elif status != "passed":
+            body = f"<error type={_attr(status)} message={_attr(details or status)}/>"
+        xml = f"{element}>{body}</testcase>\n" if body else f"{element}/>\n"
+
+        with self._lock:
+            if self._file.closed:
+                logger.warning(f"Ignoring result of {test} added after the JUnit report was closed")
+                return
+            self.counts["tests"] += 1
+            if status in ("failed", "timeout"):
+                self.counts["failures"] += 1
+            elif status == "skipped":
+                self.counts["skipped"] += 1
+            elif status != "passed":
+                self.counts["errors"] += 1
+            self.time += duration or 0.0
+
+            self._file.seek(self._end)
+            self._file.write(xml)
+            self._end = self._file.tell()
+            self._write_footer()
+
+    def close(self):
+        """Close the report file, which is complete at any time."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
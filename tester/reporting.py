@@ -1,39 +1,379 @@
 import datetime
+import heapq
+import itertools
+import json
+import math
 import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
 
-from jinja2 import Environment, FileSystemLoader
+from build_systems.process import USAGE_FIELDS
+from build_systems.state import write_atomic
+
+# Statuses with their own summary box; anything else only counts towards the total
+STATUSES = ("passed", "failed", "skipped", "timeout")
+
+# Longer details (log tails) are kept on disk instead of in memory
+DETAILS_INLINE_LIMIT = 256
+
+# Number of tests listed per resource in the summary's tables of the heaviest tests
+TOP_USERS = 10
+
+# How the heaviest tests are ranked, by resource
+RANKINGS = {
+    "cpu": lambda usage: usage.get("cpu_user", 0.0) + usage.get("cpu_system", 0.0),
+    "memory": lambda usage: usage.get("max_rss", 0),
+    "io": lambda usage: usage.get("read_bytes", 0) + usage.get("write_bytes", 0),
+}
+
+
+def get_data_dir(output_path):
+    """Get the directory holding the data files of the report at ``output_path``."""
+    return os.path.splitext(output_path)[0] + "_data"
+
+
+class _DetailsSpill:
+    """Append-only temporary file holding long details texts."""
+
+    def __init__(self):
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        """Store a text and return the reference to read it back with."""
+        data = text.encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="tester_details_")
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+        return _SpilledText(self, offset, len(data))
+
+    def read(self, offset, length):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length).decode("utf-8")
+
+
+class _SpilledText:
+    __slots__ = ("spill", "offset", "length")
+
+    def __init__(self, spill, offset, length):
+        self.spill = spill
+        self.offset = offset
+        self.length = length
+
+    def read(self):
+        return self.spill.read(self.offset, self.length)
+
+
+class TestResult:
+    """The result of one test, stored compactly.
+
+    Results of large sweeps number in the hundreds of thousands, so each is a
+    slotted object rather than a dict and long details live in a spill file.
+    Item access (``result["status"]``) is supported like for a dict.
+    """
+
+    __slots__ = ("name", "testbench", "status", "duration", "seed", "_details", "_usage")
+
+    FIELDS = ("name", "testbench", "status", "duration", "seed", "details", "usage")
+
+    def __init__(self, name, testbench, status, duration, seed, details=None, usage=None):
+        self.name = name
+        # Testbench names and statuses repeat across results, so they share one string
+        self.testbench = sys.intern(str(testbench))
+        self.status = sys.intern(str(status))
+        self.duration = duration
+        self.seed = seed
+        self._details = details
+        # A tuple in USAGE_FIELDS order is smaller than a dict
+        self._usage = tuple(usage.get(field) for field in USAGE_FIELDS) if usage else None
+
+    @property
+    def details(self):
+        """Details text, such as the log tail of a failed test."""
+        details = self._details
+        return details.read() if isinstance(details, _SpilledText) else details
+
+    @property
+    def usage(self):
+        """Resources the test used, keyed by ``USAGE_FIELDS``; empty if not measured."""
+        return dict(zip(USAGE_FIELDS, self._usage)) if self._usage else {}
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def as_row(self):
+        """The result as a ``[name, testbench, status, duration, seed, details, *usage]`` row.
+
+        The usage values follow in ``USAGE_FIELDS`` order if they were measured.
+        """
+        return [self.name, self.testbench, self.status, self.duration, self.seed, self.details] + list(self._usage or ())
+
+
+class TopUsers:
+    """The tests that used the most of one resource, kept in constant memory."""
+
+    def __init__(self, size=TOP_USERS):
+        self.size = size
+        self._heap = []
+        # Breaks ties between equal values, as results are not comparable
+        self._counter = itertools.count()
+
+    def add(self, value, entry):
+        """Offer a test's value with the ``entry`` listed for it."""
+        if not value:
+            return
+        item = (value, next(self._counter), entry)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif value > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def top(self):
+        """Get the kept entries with their value appended, largest first."""
+        return [list(entry) + [value] for value, _, entry in sorted(self._heap, reverse=True)]
+
+
+class DurationStats:
+    """Running statistics of test durations in constant memory.
+
+    Percentiles come from a histogram with logarithmically sized buckets,
+    accurate to ``precision`` relative error, so no individual duration is
+    kept however many tests run.
+    """
+
+    MIN_DURATION = 0.001
+
+    def __init__(self, precision=0.01):
+        """Create empty statistics.
+
+        Args:
+            precision: Relative error of the reported percentiles
+        """
+        self._log_base = math.log1p(precision)
+        self._buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration):
+        """Add one duration in seconds."""
+        duration = max(float(duration or 0.0), 0.0)
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+        self._buckets[self._bucket(duration)] += 1
+
+    def _bucket(self, duration):
+        if duration < self.MIN_DURATION:
+            return -1
+        return int(math.log(duration / self.MIN_DURATION) / self._log_base)
+
+    def _value(self, bucket):
+        if bucket < 0:
+            return 0.0
+        # Geometric middle of the bucket
+        return self.MIN_DURATION * math.exp((bucket + 0.5) * self._log_base)
+
+    def percentile(self, percent):
+        """Get a percentile (0-100) of the durations, or None if there are none."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(max(self._value(bucket), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """Get the totals and the usual percentiles as a dict."""
+        return {
+            "count": self.count,
+            "total": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            **{f"p{percent}": self._round(self.percentile(percent)) for percent in (50, 90, 99)},
+        }
+
+    @staticmethod
+    def _round(value):
+        return None if value is None else round(value, 3)
 
 
 class TestReport:
+    """Test results rendered as an HTML report.
+
+    The HTML file is a small shell; the results live next to it in
+    ``<report>_data/`` as script files of ``SHARD_SIZE`` results each, which
+    the page loads and renders client side with virtual scrolling, so even
+    reports of 100k tests open quickly. Script files rather than JSON are used
+    because browsers refuse to fetch JSON from ``file://`` pages.
+
+    After :meth:`start`, the data files are republished while results arrive
+    and an open report refreshes itself until the run has finished. Full shards
+    are written once; only the last, partial one is rewritten.
+
+    Results are kept as compact :class:`TestResult` objects and the summary is
+    maintained with running counters, so it never scans the results.
+    """
+
+    SHARD_SIZE = 2000
+    PUBLISH_INTERVAL = 2.0
+
     def __init__(self):
         self.template_dir = os.path.join(os.path.dirname(__file__), "..", "templates")
-        self.env = Environment(loader=FileSystemLoader(self.template_dir))
-        self.template = self.env.get_template("report.html")
         self.tests = []
+        self.started = datetime.datetime.now()
+        # Results are added concurrently by the regression worker threads
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self.counts = Counter()
+        self.durations = DurationStats()
+        self._spill = _DetailsSpill()
+        self.top_users = {resource: TopUsers(TOP_USERS) for resource in RANKINGS}
+        self.usage_totals = Counter()
+        self.builds = []
+        self._output_path = None
+        self._full_shards = 0
+        self._last_publish = 0.0
 
-    def add_test_result(self, name, testbench, status, duration, seed, details=None):
-        """Add a test result to the report."""
-        self.tests.append(
-            {"name": name, "testbench": testbench, "status": status, "duration": duration, "seed": seed, "details": details}
-        )
+    def add_test_result(self, name, testbench, status, duration, seed, details=None, usage=None):
+        """Add a test result to the report.
+
+        Args:
+            usage: Resources the test used, keyed by ``USAGE_FIELDS``, if measured
+        """
+        if details is not None and len(details) > DETAILS_INLINE_LIMIT:
+            details = self._spill.write(details)
+        result = TestResult(name, testbench, status, duration, seed, details, usage)
+        with self._lock:
+            self.tests.append(result)
+            self.counts[result.status] += 1
+            self.durations.add(duration)
+            if usage:
+                self._add_usage([name, testbench, seed], usage)
+            live = self._output_path is not None
+            due = time.monotonic() - self._last_publish > self.PUBLISH_INTERVAL or len(self.tests) % self.SHARD_SIZE == 0
+        if live and due:
+            self._publish(running=True)
+
+    def _add_usage(self, entry, usage):
+        """Count a test's resource usage towards the totals and the heaviest tests; call with the lock held."""
+        for field in USAGE_FIELDS:
+            if field != "max_rss":
+                self.usage_totals[field] += usage.get(field) or 0
+        for resource, rank in RANKINGS.items():
+            self.top_users[resource].add(rank(usage), entry)
+
+    def add_build(self, testbench, usage):
+        """Add the resource usage of a testbench build to the report."""
+        with self._lock:
+            self.builds.append([testbench] + [usage.get(field) for field in USAGE_FIELDS])
+
+    @property
+    def total(self):
+        """Number of results added."""
+        return self.durations.count
+
+    def summary(self):
+        """Get the result counts and duration statistics.
+
+        Returns:
+            dict: ``total``, ``counts`` per status, ``duration`` statistics, the
+            ``usage`` totals, the ``top`` users of each resource as
+            ``[name, testbench, seed, value]`` lists and the ``builds`` as
+            ``[testbench, *usage]`` rows
+        """
+        with self._lock:
+            return {
+                "total": self.durations.count,
+                "counts": {status: self.counts.get(status, 0) for status in STATUSES},
+                "duration": self.durations.summary(),
+                "usage": {field: round(value, 3) for field, value in self.usage_totals.items()},
+                "top": {resource: top.top() for resource, top in self.top_users.items()},
+                "builds": list(self.builds),
+            }
+
+    def start(self, output_path):
+        """Write an empty report that keeps updating while results are added.
+
+        Args:
+            output_path: HTML file of the report
+        """
+        with self._lock:
+            self._output_path = output_path
+        self._write_shell(output_path)
+        self._publish(running=True)
 
     def generate(self, output_path):
         """Generate HTML report at the specified path."""
-        passed = sum(1 for t in self.tests if t["status"] == "passed")
-        failed = sum(1 for t in self.tests if t["status"] == "failed")
-        skipped = sum(1 for t in self.tests if t["status"] == "skipped")
-
-        report_data = {
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_tests": len(self.tests),
-            "passed_tests": passed,
-            "failed_tests": failed,
-            "skipped_tests": skipped,
-            "tests": self.tests,
-        }
+        with self._lock:
+            if output_path != self._output_path:
+                self._output_path = output_path
+                self._full_shards = 0
+                self._write_shell(output_path)
+        self._publish(running=False)
+
+    def _write_shell(self, output_path):
+        # Jinja is only needed once a report is written, not for collecting results
+        from jinja2 import Environment, FileSystemLoader
+
+        env = Environment(loader=FileSystemLoader(self.template_dir), autoescape=True)
+        html = env.get_template("report.html").render(
+            started=self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            data_dir=os.path.basename(get_data_dir(output_path)),
+            statuses=STATUSES,
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        write_atomic(output_path, html)
+
+    @staticmethod
+    def _write_shard(data_dir, index, tests):
+        rows = [test.as_row() for test in tests]
+        content = f"testerReport.shard({index}, {json.dumps(rows, separators=(',', ':'), default=str)});\n"
+        write_atomic(os.path.join(data_dir, f"shard_{index:04d}.js"), content)
+
+    def _publish(self, running):
+        """Write the shards that changed since the last call and the summary."""
+        with self._publish_lock:
+            with self._lock:
+                output_path = self._output_path
+                total = len(self.tests)
+                first = self._full_shards
+                pending = self.tests[first * self.SHARD_SIZE : total]
+                self._last_publish = time.monotonic()
 
-        html = self.template.render(**report_data)
+            data_dir = get_data_dir(output_path)
+            os.makedirs(data_dir, exist_ok=True)
+            shard_sizes = [self.SHARD_SIZE] * first
+            for offset in range(0, len(pending), self.SHARD_SIZE):
+                chunk = pending[offset : offset + self.SHARD_SIZE]
+                self._write_shard(data_dir, first + offset // self.SHARD_SIZE, chunk)
+                shard_sizes.append(len(chunk))
+            with self._lock:
+                self._full_shards = max(self._full_shards, total // self.SHARD_SIZE)
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w") as f:
-            f.write(html)
+            summary = self.summary()
+            summary.update(
+                {
+                    "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
+                    "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "running": running,
+                    "total": total,
+                    "shards": shard_sizes,
+                }
+            )
+            write_atomic(os.path.join(data_dir, "summary.js"), f"testerReport.summary({json.dumps(summary)});\n")
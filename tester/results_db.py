@@ -0,0 +1,257 @@
+"""SQLite database keeping the result of every test run across regressions."""
+
+import datetime
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+# Resources used by each run, as measured by build_systems.process
+USAGE_COLUMNS = (
+    ("cpu_user", "REAL"),
+    ("cpu_system", "REAL"),
+    ("max_rss", "INTEGER"),
+    ("read_bytes", "INTEGER"),
+    ("write_bytes", "INTEGER"),
+)
+
+COLUMNS = ("run_id", "finished", "testbench", "test", "seed", "status", "duration", "fingerprint", "host", "log_path") + tuple(
+    name for name, _ in USAGE_COLUMNS
+)
+
+# Orderings of query results by resource, heaviest first
+RESOURCE_ORDER = {
+    "cpu": "cpu_user + cpu_system",
+    "memory": "max_rss",
+    "io": "read_bytes + write_bytes",
+}
+
+# Statuses that count as a failure in queries
+FAILURE_STATUSES = ("failed", "timeout")
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT,
+    finished REAL NOT NULL,
+    testbench TEXT NOT NULL,
+    test TEXT NOT NULL,
+    seed INTEGER,
+    status TEXT NOT NULL,
+    duration REAL,
+    fingerprint TEXT,
+    host TEXT,
+    log_path TEXT,
+    cpu_user REAL,
+    cpu_system REAL,
+    max_rss INTEGER,
+    read_bytes INTEGER,
+    write_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_test ON results (testbench, test, finished);
+CREATE INDEX IF NOT EXISTS results_status ON results (status, finished);
+CREATE INDEX IF NOT EXISTS results_finished ON results (finished);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+"""
+
+
+class ResultsDatabase:
+    """Test results stored in a local SQLite database.
+
+    The database runs in WAL mode so queries never block a running
+    regression. Results are buffered in memory and written in one
+    transaction per batch, so regression workers only ever take a lock
+    around a list append; a batch is written once ``batch_size`` results
+    are buffered or ``flush_interval`` seconds have passed.
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=5.0):
+        """Open the database, creating it if needed.
+
+        Args:
+            path: Database file; ``":memory:"`` keeps it in memory
+            batch_size: Number of buffered results that triggers a write
+            flush_interval: Seconds after which buffered results are written anyway
+        """
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.host = socket.gethostname()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Writes come from whichever worker fills a batch, always under the write lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                self._add_missing_columns()
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _add_missing_columns(self):
+        """Upgrade a database written by an older version, which lacks the resource usage columns."""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        for name, sql_type in USAGE_COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE results ADD COLUMN {name} {sql_type}")
+
+    def add(
+        self,
+        testbench,
+        test,
+        status,
+        duration=None,
+        seed=None,
+        fingerprint=None,
+        log_path=None,
+        run_id=None,
+        host=None,
+        usage=None,
+    ):
+        """Buffer the result of one test run.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            status: Result status (passed, failed, timeout, skipped)
+            duration: Wall time in seconds
+            seed: Random seed of the run, if one was set
+            fingerprint: Fingerprint of the build the test ran on
+            log_path: Log file of the run
+            run_id: Identifier of the regression the run belongs to
+            host: Host the test ran on; defaults to this host
+            usage: Resources the run used, keyed by the ``USAGE_COLUMNS`` names
+        """
+        usage = usage or {}
+        row = (run_id, time.time(), testbench, test, seed, status, duration, fingerprint, host or self.host, log_path) + tuple(
+            usage.get(name) for name, _ in USAGE_COLUMNS
+        )
+        with self._buffer_lock:
+            self._pending.append(row)
+            due = len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush > self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered result in a single transaction."""
+        with self._buffer_lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        try:
+            with self._write_lock, self._conn:
+                self._conn.executemany(f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write {len(rows)} result(s) to {self.path}: {e}")
+
+    def query(self, testbench=None, test=None, statuses=None, since=None, run_id=None, limit=None, order_by=None):
+        """Get stored results, newest first.
+
+        Every filter is served by an index, so queries stay fast on millions
+        of rows.
+
+        Args:
+            testbench: Only results of this testbench
+            test: Only results of this test
+            statuses: Only results with one of these statuses
+            since: Only results finished at or after this Unix timestamp
+            run_id: Only results of this regression
+            limit: Maximum number of results
+            order_by: Resource (a ``RESOURCE_ORDER`` key) to order the results by,
+                heaviest first, instead of by time
+
+        Returns:
+            list: One dict per result with the stored fields
+        """
+        conditions, params = [], []
+        for column, value in (("testbench", testbench), ("test", test), ("run_id", run_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if since is not None:
+            conditions.append("finished >= ?")
+            params.append(since)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by is not None:
+            # Runs without measured usage sort last
+            sql += f" ORDER BY COALESCE({RESOURCE_ORDER[order_by]}, -1) DESC, finished DESC, id DESC"
+        else:
+            sql += " ORDER BY finished DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        self.flush()
+        with self._write_lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def last_runs(self, testbench, test, limit=30):
+        """Get the latest results of one test, newest first."""
+        return self.query(testbench=testbench, test=test, limit=limit)
+
+    def failures(self, since=None, testbench=None, limit=None):
+        """Get failed and timed out results, newest first."""
+        return self.query(testbench=testbench, statuses=FAILURE_STATUSES, since=since, limit=limit)
+
+    def close(self):
+        """Write buffered results and close the database."""
+        self.flush()
+        with self._write_lock:
+            self._conn.close()
+
+
+def parse_since(text, now=None):
+    """Parse the start of a query period.
+
+    Accepted forms are ``YYYY-MM-DD``, ``YYYY-MM-DD HH:MM``, a number of days
+    or hours ago such as ``7d`` or ``12h``, and a weekday name meaning the
+    start of its most recent occurrence (today included).
+
+    Args:
+        text: Period start as typed by the user
+        now: Current time as a datetime, for testing
+
+    Returns:
+        float: Unix timestamp of the period start
+
+    Raises:
+        ValueError: If the text is not understood
+    """
+    now = now or datetime.datetime.now()
+    text = text.strip().lower()
+    if text[:-1].isdigit() and text[-1:] in ("d", "h"):
+        delta = datetime.timedelta(**{"days" if text[-1] == "d" else "hours": int(text[:-1])})
+        return (now - delta).timestamp()
+    if text in WEEKDAYS:
+        days_back = (now.weekday() - WEEKDAYS.index(text)) % 7
+        start = (now - datetime.timedelta(days=days_back)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return start.timestamp()
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M"):
+        try:
+            return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid time '{text}', expected YYYY-MM-DD[ HH:MM], Nd, Nh or a weekday")
@@ -1,47 +1,647 @@
 import datetime
+import logging
 import os
+import signal
+import threading
 import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import chain
+
+from build_systems import process
+from build_systems.process import CommandResult
 
 from .reporting import TestReport
 
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _always_admitted():
+    yield True
+
 
 class TestRunner:
-    def __init__(self):
+    def __init__(
+        self,
+        build_system=None,
+        parallel=1,
+        history=None,
+        results_db=None,
+        junit=None,
+        admission=None,
+        memory_history=None,
+        coverage_merger=None,
+        journal=None,
+    ):
+        """Create a runner that executes tests through ``build_system``.
+
+        Args:
+            build_system: BuildSystemBase used to run each test
+            parallel: Default number of tests executed concurrently
+            history: Optional DurationHistory used to dispatch the longest tests first
+            results_db: Optional ResultsDatabase every result is also stored in
+            junit: Optional JUnitWriter every result is streamed to
+            admission: Optional AdmissionController deciding when each test may start;
+                ``parallel`` is then the upper limit
+            memory_history: Optional MemoryHistory the peak memory of every test is recorded in
+            coverage_merger: Optional CoverageMerger the coverage databases of passing
+                tests are merged with while the regression runs
+            journal: Optional RunJournal of the regression, to resume it later
+        """
+        self.build_system = build_system
+        self.parallel = max(1, int(parallel or 1))
+        self.history = history
+        self.results_db = results_db
+        self.junit = junit
+        self.admission = admission
+        self.memory_history = memory_history
+        self.coverage_merger = coverage_merger
+        self.journal = journal
+        # Merged coverage database of the last regression or sweep
+        self.coverage_path = None
+        self.run_id = None
         self.report = TestReport()
+        self._cancelled = threading.Event()
+        self._budget_exceeded = threading.Event()
+        self._coordinator = None
+        # Results carried over from earlier runs of a resumed regression
+        self._restored = Counter()
 
     def run_test(self, testbench, test, **kwargs):
         """Run a single test and collect results."""
+        if self._cancelled.is_set():
+            self._record(testbench, test, "skipped", 0.0, kwargs, self._unstarted_reason())
+            return "skipped"
+
+        # Waiting for admission does not count towards the duration
+        with self.admission.admit(testbench, test) if self.admission is not None else _always_admitted() as admitted:
+            if not admitted:
+                self._record(testbench, test, "skipped", 0.0, kwargs, self._unstarted_reason())
+                return "skipped"
+            if self.journal is not None:
+                self.journal.dispatch(testbench, test, kwargs)
+            status, duration, details, log_path, usage, killed = self.execute(testbench, test, kwargs)
+        return self._finish(testbench, test, kwargs, status, duration, details, log_path, usage=usage, killed=killed)
+
+    def execute(self, testbench, test, options):
+        """Run a single test without recording its result.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            options: Run options passed to the build system
+
+        Returns:
+            tuple: Status, duration in seconds, failure details, log file, the
+            resource usage of the run, keyed by ``process.USAGE_FIELDS`` (empty if
+            not measured), and whether the tester killed the run because the
+            regression was cancelled
+        """
         start_time = time.time()
         details = None
-        result = None  # Initialize result variable
+        log_path = None
+        usage = {}
+        killed = False
         try:
-            # Existing test execution code...
-            # The actual implementation should set the result variable
-            # For now, we'll just initialize it to avoid the undefined name error
-            # Assuming result should be defined in the commented out code
-            # If it's passed as a parameter, we could use:
-            # result = kwargs.get("result")
-            status = "passed" if result and hasattr(result, "success") and result.success else "failed"
+            # Each test gets its own options dict: build systems mutate the options they receive
+            result = self.build_system.run(testbench, test, dict(options))
+            status = "passed" if result else "failed"
+            command_result = getattr(self.build_system, "last_result", None)
+            if isinstance(command_result, CommandResult):
+                log_path = command_result.log_path
+                usage = dict(command_result.usage)
+            if not result:
+                details = self._failure_details()
+                if isinstance(command_result, CommandResult) and command_result.timed_out:
+                    status = "timeout"
+                # terminate_all() signals the process group, or refuses to start it at all
+                killed = (
+                    status == "failed"
+                    and isinstance(command_result, CommandResult)
+                    and command_result.returncode in (-signal.SIGTERM, -signal.SIGKILL)
+                    and process.is_cancelled()
+                )
         except Exception as e:
             status = "failed"
             details = str(e)
+        return status, time.time() - start_time, details, log_path, usage, killed
+
+    def _finish(self, testbench, test, options, status, duration, details, log_path, host=None, usage=None, killed=False):
+        """Record the outcome of a test that ran, accounting for cancellation.
 
-        duration = time.time() - start_time
+        Only a run the tester itself ``killed`` is reported as timed out or
+        skipped; a test that failed on its own stays failed, also when it
+        finished just after the regression was cancelled.
+        """
+        killed = killed and status == "failed" and (self._cancelled.is_set() or self._budget_exceeded.is_set())
+        if killed and self._budget_exceeded.is_set():
+            status = "timeout"
+            details = "Regression time budget exceeded while the test was running"
+        elif killed:
+            status = "skipped"
+            details = "Regression cancelled while the test was running"
+        elif status != "timeout":
+            if self.history is not None:
+                self.history.record(testbench, test, duration)
+            if self.memory_history is not None and (usage or {}).get("max_rss"):
+                self.memory_history.record(testbench, test, usage["max_rss"])
+            if status == "passed" and self.coverage_merger is not None:
+                self._collect_coverage(testbench, test, options)
 
+        self._record(testbench, test, status, duration, options, details, log_path, host, usage)
+        # Tests the regression killed run again when it is resumed
+        if self.journal is not None and not killed and status != "skipped":
+            self.journal.finish(testbench, test, options, status, duration, details, log_path, host, usage)
+        return status
+
+    def _collect_coverage(self, testbench, test, options):
+        """Hand the coverage database of a passing test to the merge."""
+        database = self.build_system.get_coverage_database(testbench, test, options)
+        if database and os.path.exists(database):
+            self.coverage_merger.add(database)
+        elif database:
+            logger.warning(f"No coverage database of {testbench}/{test} at {database}")
+
+    def _merge_coverage(self, report_dir):
+        """Finish merging the coverage of the regression into ``<report_dir>/coverage_<run_id>``."""
+        self.coverage_path = None
+        if self.coverage_merger is None:
+            return
+        if self._cancelled.is_set():
+            self.coverage_merger.abort()
+            return
+        self.coverage_path = self.coverage_merger.finish(os.path.join(report_dir, f"coverage_{self.run_id}"))
+        if self.coverage_merger.unmerged:
+            logger.warning(f"{len(self.coverage_merger.unmerged)} coverage database(s) could not be merged")
+
+    def _failure_details(self):
+        """Describe a failed test from the output tail the build system captured."""
+        command_result = getattr(self.build_system, "last_result", None)
+        if not isinstance(command_result, CommandResult):
+            return None
+        details = command_result.output
+        if command_result.abort_reason:
+            # The line that triggered an early abort comes first
+            details = f"Aborted: {command_result.abort_reason}\n{details}".rstrip("\n")
+        if command_result.log_path:
+            details = f"{details}\n[full log: {command_result.log_path}]".lstrip("\n")
+        return details
+
+    def _record(self, testbench, test, status, duration, options, details, log_path=None, host=None, usage=None):
         self.report.add_test_result(
             name=test,
             testbench=testbench,
             status=status,
             duration=round(duration, 2),
-            seed=kwargs.get("seed", "random"),
-            details=details if status == "failed" else None,
+            seed=options.get("seed", "random"),
+            details=details if status != "passed" else None,
+            usage=usage,
+        )
+        if self.results_db is not None:
+            self.results_db.add(
+                testbench,
+                test,
+                status,
+                duration=round(duration, 3),
+                seed=options.get("seed"),
+                fingerprint=self._fingerprint(testbench),
+                log_path=log_path,
+                run_id=self.run_id,
+                host=host,
+                usage=usage,
+            )
+        if self.junit is not None:
+            seed = options.get("seed")
+            name = options.get("log_name") or (f"{test}.{seed}" if seed is not None else test)
+            self.junit.add(testbench, test, status, duration, details, name=name)
+
+    def _fingerprint(self, testbench):
+        try:
+            return self.build_system.get_build_fingerprint(testbench)
+        except Exception as e:
+            logger.debug(f"No build fingerprint for {testbench}: {e}")
+            return None
+
+    def cancel(self):
+        """Stop dispatching new tests and kill every running simulation."""
+        self._cancelled.set()
+        process.terminate_all()
+        coordinator = self._coordinator
+        if coordinator is not None:
+            coordinator.cancel()
+
+    def _unstarted_reason(self):
+        if self._budget_exceeded.is_set():
+            return "Regression time budget exceeded before the test started"
+        return "Regression cancelled before the test started"
+
+    def _reset(self, time_budget):
+        """Prepare a regression run and return its deadline, if any."""
+        self.run_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._restored = Counter()
+        self._cancelled.clear()
+        self._budget_exceeded.clear()
+        process.reset()
+        return time.monotonic() + time_budget if time_budget else None
+
+    def _check_deadline(self, deadline):
+        """Cancel the regression once its time budget is used up."""
+        if deadline is not None and not self._cancelled.is_set() and time.monotonic() > deadline:
+            logger.error("Regression time budget exceeded, killing running tests")
+            self._budget_exceeded.set()
+            self.cancel()
+
+    @staticmethod
+    def _normalize(tests, kwargs):
+        """Turn ``(testbench, test[, options])`` items into ``(testbench, test, options)``."""
+        normalized = []
+        for item in tests:
+            options = dict(kwargs)
+            if len(item) > 2 and item[2]:
+                options.update(item[2])
+            normalized.append((item[0], item[1], options))
+        return normalized
+
+    def _run_pool(self, jobs, parallel, deadline=None, on_result=None):
+        """Run ``(func, args)`` jobs on a bounded worker pool, cancelling everything on Ctrl-C.
+
+        Jobs are pulled from the iterable only as workers free up, so a lazily
+        generated job stream is never materialized up front, and a job is
+        forgotten as soon as it completes, so memory stays bounded however many
+        jobs the stream yields. Once the regression is cancelled, or
+        ``deadline`` (a ``time.monotonic`` value) has passed, no further jobs
+        are pulled.
+
+        Args:
+            jobs: Iterable of ``(func, args)`` jobs
+            parallel: Number of jobs to run concurrently
+            deadline: ``time.monotonic`` value after which the regression is cancelled
+            on_result: Optional callable taking the position of a job in ``jobs``
+                and its result, called as each job completes
+        """
+        executor = ThreadPoolExecutor(max_workers=parallel)
+        jobs = enumerate(jobs)
+        # Position of each job in flight
+        pending = {}
+        try:
+            exhausted = False
+            while True:
+                # Keep a few jobs queued beyond the running ones so workers never idle
+                exhausted = exhausted or self._cancelled.is_set()
+                while not exhausted and len(pending) < 2 * parallel:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    index, (func, args) = job
+                    pending[executor.submit(func, *args)] = index
+                if not pending:
+                    break
+
+                # Wait with a timeout so KeyboardInterrupt is delivered to the main thread promptly
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    result = future.result()
+                    if on_result is not None:
+                        on_result(index, result)
+                self._check_deadline(deadline)
+        except KeyboardInterrupt:
+            logger.warning("Regression interrupted, cancelling remaining jobs")
+            self.cancel()
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+
+    def _run_remote(self, tests, coordinator, deadline=None):
+        """Hand the tests to the workers of ``coordinator`` and record results as they arrive."""
+        for job_id, (testbench, test, options) in enumerate(tests):
+            build = self.build_system.get_build_options(options) if self.build_system.needs_build(testbench) else None
+            coordinator.submit(job_id, testbench, test, options, build)
+            if self.journal is not None:
+                self.journal.dispatch(testbench, test, options)
+
+        logger.info(f"Distributing {len(tests)} test(s) to the workers")
+        self._coordinator = coordinator
+        try:
+            while coordinator.outstanding:
+                result = coordinator.next_result(timeout=0.5)
+                if result is not None:
+                    self._record_remote(result)
+                self._check_deadline(deadline)
+        except KeyboardInterrupt:
+            logger.warning("Regression interrupted, cancelling remaining jobs")
+            self.cancel()
+            raise
+        finally:
+            self._coordinator = None
+            # Results that arrived while cancelling still count
+            result = coordinator.next_result(timeout=0)
+            while result is not None:
+                self._record_remote(result)
+                result = coordinator.next_result(timeout=0)
+
+    def _record_remote(self, result):
+        job = result["job"]
+        # Log paths in the details are on the worker's host
+        details = "\n".join(filter(None, [result.get("details"), f"[worker: {result['worker']}]"]))
+        self._finish(
+            job["testbench"],
+            job["test"],
+            job["options"],
+            result.get("status", "failed"),
+            float(result.get("duration") or 0.0),
+            details,
+            result.get("log_path"),
+            host=result.get("host"),
+            usage=result.get("usage"),
+            killed=bool(result.get("killed")),
         )
 
-    def run_regression(self, tests, **kwargs):
-        """Run multiple tests and generate report."""
-        for testbench, test in tests:
-            self.run_test(testbench, test, **kwargs)
+    def _build(self, testbench, options):
+        """Build one testbench configuration, returning True on success."""
+        if self._cancelled.is_set():
+            return False
+        try:
+            built = bool(self.build_system.build(testbench, dict(options)))
+        except Exception as e:
+            logger.error(f"Failed to build testbench {testbench}: {e}")
+            return False
+        command_result = getattr(self.build_system, "last_result", None)
+        if isinstance(command_result, CommandResult) and command_result.usage:
+            self.report.add_build(testbench, command_result.usage)
+        return built
+
+    def _build_waves(self, tests):
+        """Split tests into waves in which every testbench is built at most once.
+
+        A testbench has a single build directory, so its builds with different
+        build options must neither run at the same time nor while tests still
+        run on an earlier one. Wave ``n`` holds the ``n``-th set of build
+        options of every testbench and the tests using it; tests of testbenches
+        without a separate build go with the first wave.
+
+        Returns:
+            list: ``(builds, items)`` per wave, ``builds`` mapping a build key to
+            ``(testbench, build_options)`` and ``items`` holding the
+            ``(testbench, test, options, key)`` of the wave's tests
+        """
+        waves = []
+        wave_of = {}
+        counts = Counter()
+        for testbench, test, options in tests:
+            key, build_options = None, None
+            if self.build_system.needs_build(testbench):
+                build_options = self.build_system.get_build_options(options)
+                key = (testbench, tuple(sorted((name, repr(value)) for name, value in build_options.items())))
+                if key not in wave_of:
+                    wave_of[key] = counts[testbench]
+                    counts[testbench] += 1
+            index = wave_of[key] if key is not None else 0
+            while len(waves) <= index:
+                waves.append((OrderedDict(), []))
+            if key is not None:
+                waves[index][0].setdefault(key, (testbench, build_options))
+            waves[index][1].append((testbench, test, options, key))
+        return waves
+
+    def _build_phase(self, builds, items, parallel, deadline=None):
+        """Build each testbench/build-option combination of a wave exactly once.
 
-        report_path = os.path.join("reports", f'report_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.html')
-        self.report.generate(report_path)
+        Tests of a successful build are returned with the ``prebuilt`` option set so
+        the build system does not compile again; tests of a failed build are
+        recorded as skipped right away.
+
+        Args:
+            builds: Build key to ``(testbench, build_options)`` of the wave
+            items: ``(testbench, test, options, key)`` of the wave's tests
+            parallel: Number of builds to run concurrently
+            deadline: ``time.monotonic`` value after which the regression is cancelled
+
+        Returns:
+            list: ``(testbench, test, options)`` items that still have to run
+        """
+        if not builds:
+            return [item[:3] for item in items]
+
+        logger.info(f"Building {len(builds)} testbench configuration(s) before running {len(items)} test(s)")
+        results = [None] * len(builds)
+        self._run_pool([(self._build, build) for build in builds.values()], parallel, deadline, results.__setitem__)
+        built = dict(zip(builds.keys(), results))
+
+        to_run = []
+        for testbench, test, options, key in items:
+            if key is None:
+                to_run.append((testbench, test, options))
+            elif built[key] is None:
+                # The build never started, the test is reported as unstarted
+                continue
+            elif built[key]:
+                to_run.append((testbench, test, dict(options, prebuilt=True)))
+            else:
+                self._record(testbench, test, "skipped", 0.0, options, f"Build of testbench {testbench} failed")
+        return to_run
+
+    def run_regression(
+        self, tests, parallel=None, report_dir="reports", time_budget=None, coordinator=None, resume=None, **kwargs
+    ):
+        """Run multiple tests and generate report.
+
+        Every testbench is built once per distinct set of build options before its
+        tests run; when that build fails, its tests are skipped. The builds of
+        one testbench share its build directory, so with several sets of build
+        options each build runs only after the tests of the previous one. With a duration
+        history, tests are dispatched longest-predicted first. When the time
+        budget runs out, running tests are killed and reported as timed out and
+        the remaining tests as skipped.
+
+        With a coordinator, the tests are handed to its remote workers instead,
+        which build their testbenches themselves.
+
+        With a coverage merger, the coverage databases of passing tests are
+        merged while the regression runs and the merged database is left in
+        ``coverage_path``.
+
+        With a journal, the regression is recorded so that a later run can
+        resume it: ``resume="unfinished"`` runs the tests of the journaled
+        regression that did not finish, ``resume="failed"`` also those that
+        did not pass. ``tests`` and ``kwargs`` are then ignored, and the results
+        of the earlier runs are carried over into the report.
+
+        Args:
+            tests: Iterable of ``(testbench, test)`` pairs or ``(testbench, test, options)``
+                triples whose options override ``kwargs`` for that test
+            parallel: Number of tests to run concurrently (defaults to the runner setting)
+            report_dir: Directory the HTML report is written to
+            time_budget: Seconds the whole regression may take; None for no limit
+            coordinator: Optional Coordinator whose workers run the tests
+            resume: None to start the regression afresh, "unfinished" or "failed"
+                to continue the journaled one
+            **kwargs: Run options passed to the build system for every test
+
+        Returns:
+            str: Path of the generated report
+
+        Raises:
+            ValueError: If there is no journal to resume
+        """
+        parallel = max(1, int(parallel or self.parallel))
+        deadline = self._reset(time_budget)
+        tests = self._start_journal(self._normalize(tests, kwargs), resume)
+
+        report_path = os.path.join(report_dir, f"report_{self.run_id}.html")
+        try:
+            # The report updates itself while the tests run
+            self.report.start(report_path)
+            if coordinator is not None:
+                self._run_remote(self.history.order(tests) if self.history is not None else tests, coordinator, deadline)
+            else:
+                logger.info(f"Running {len(tests)} test(s) with {parallel} parallel worker(s)")
+                for builds, items in self._build_waves(tests):
+                    if self._cancelled.is_set():
+                        break
+                    to_run = self._build_phase(builds, items, parallel, deadline)
+                    if self.history is not None:
+                        to_run = self.history.order(to_run)
+                    self._run_pool([(self._run_item, item) for item in to_run], parallel, deadline)
+        finally:
+            # Tests that never got a slot are reported as skipped, also after Ctrl-C
+            self._record_unstarted(tests)
+            self.report.generate(report_path)
+            self._save_state()
+            self._merge_coverage(report_dir)
         return report_path
+
+    def _start_journal(self, tests, resume):
+        """Journal a new regression, or load the journaled one and carry over its results.
+
+        Returns:
+            list: ``(testbench, test, options)`` items to run
+        """
+        if resume is None:
+            if self.journal is not None:
+                self.journal.start(tests, self.run_id)
+            return tests
+        if self.journal is None:
+            raise ValueError("No journal to resume the regression from")
+        tests, results = self.journal.load().remaining(failed=resume == "failed")
+        self.journal.resume(self.run_id, resume)
+        for result in results:
+            self._restore(result)
+        logger.info(f"Resuming the regression: {len(results)} result(s) carried over, {len(tests)} test(s) to run")
+        return tests
+
+    def _restore(self, result):
+        """Add the result of an earlier run of a resumed regression to the reports."""
+        testbench, test, status = result["testbench"], result["test"], result["status"]
+        duration, seed = result.get("duration") or 0.0, result.get("seed")
+        self.report.add_test_result(
+            name=test,
+            testbench=testbench,
+            status=status,
+            duration=round(duration, 2),
+            seed="random" if seed is None else seed,
+            details=result.get("details") if status != "passed" else None,
+            usage=result.get("usage"),
+        )
+        if self.junit is not None:
+            name = f"{test}.{seed}" if seed is not None else test
+            self.junit.add(testbench, test, status, duration, result.get("details"), name=name)
+        self._restored[(testbench, test)] += 1
+
+    def run_sweep(self, sweep, parallel=None, report_dir="reports", time_budget=None, **kwargs):
+        """Run every instance of a seed/plusarg sweep off a single build.
+
+        The testbench is built once; instances are then expanded lazily and
+        dispatched to the worker pool as slots free up. If the build fails,
+        every instance is reported as skipped.
+
+        Args:
+            sweep: Sweep (or any re-iterable of ``(testbench, test, options)``) to run
+            parallel: Number of instances to run concurrently (defaults to the runner setting)
+            report_dir: Directory the HTML report is written to
+            time_budget: Seconds the whole sweep may take; None for no limit
+            **kwargs: Run options passed to the build system for every instance
+
+        Returns:
+            tuple: Path of the generated report and the options of every
+            instance that did not pass, in the order they finished
+        """
+        parallel = max(1, int(parallel or self.parallel))
+        deadline = self._reset(time_budget)
+
+        # Only what the summary needs is kept: the instances in flight, at most a
+        # few per worker, and the options of the failing ones
+        in_flight, failures = {}, []
+        instances = enumerate(sweep)
+
+        def jobs(prebuilt):
+            for index, (tb, test, options) in instances:
+                options = dict(kwargs, **options)
+                in_flight[index] = (tb, test, options)
+                yield self._run_sweep_item, (index, tb, test, options, prebuilt, in_flight, failures)
+
+        report_path = os.path.join(report_dir, f"report_{self.run_id}.html")
+        try:
+            # The report updates itself while the tests run
+            self.report.start(report_path)
+            first = next(iter(sweep), None)
+            runnable, prebuilt = self._build_sweep(first[0], dict(kwargs, **first[2])) if first else (False, False)
+            if runnable:
+                logger.info(f"Running {len(sweep)} sweep instance(s) with {parallel} parallel worker(s)")
+                self._run_pool(jobs(prebuilt), parallel, deadline)
+            elif first is not None:
+                for _, (tb, test, options) in instances:
+                    self._record(tb, test, "skipped", 0.0, options, f"Build of testbench {tb} failed")
+                    failures.append(options)
+        finally:
+            # Instances that never got a slot, and those still queued on Ctrl-C,
+            # are reported as skipped; the sweep is only iterated to its end
+            for tb, test, options in chain(list(in_flight.values()), (instance for _, instance in instances)):
+                self._record(tb, test, "skipped", 0.0, options, self._unstarted_reason())
+                failures.append(options)
+            self.report.generate(report_path)
+            self._save_state()
+            self._merge_coverage(report_dir)
+        return report_path, failures
+
+    def _save_state(self):
+        """Persist the duration and memory histories and the buffered database results."""
+        for history in (self.history, self.memory_history):
+            if history is not None:
+                history.save()
+        if self.results_db is not None:
+            self.results_db.flush()
+
+    def _build_sweep(self, testbench, options):
+        """Build the testbench of a sweep once.
+
+        Returns:
+            tuple: Whether the instances can run and whether they run prebuilt
+        """
+        if not self.build_system.needs_build(testbench):
+            return True, False
+        built = self._build(testbench, self.build_system.get_build_options(options))
+        return built, built
+
+    def _run_sweep_item(self, index, testbench, test, options, prebuilt, in_flight, failures):
+        status = self.run_test(testbench, test, **(dict(options, prebuilt=True) if prebuilt else options))
+        in_flight.pop(index, None)
+        if status != "passed":
+            failures.append(options)
+        return status
+
+    def _run_item(self, testbench, test, options):
+        return self.run_test(testbench, test, **options)
+
+    def _record_unstarted(self, tests):
+        recorded = Counter((t.testbench, t.name) for t in self.report.tests) - self._restored
+        for testbench, test, options in tests:
+            if recorded[(testbench, test)] > 0:
+                recorded[(testbench, test)] -= 1
+            else:
+                self._record(testbench, test, "skipped", 0.0, options, self._unstarted_reason())
@@ -0,0 +1,171 @@
+"""Selection of the tests a change can affect, from the files their testbenches depend on."""
+
+import fnmatch
+import logging
+import os
+import subprocess
+
+from config.config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def read_dependency_file(path):
+    """Read a dependency list written by a compiler.
+
+    Make rules (``target: dep dep \\``), as written by ``-M`` style options,
+    and plain lists of one file per line are understood.
+
+    Returns:
+        List[str]: The files, or an empty list if the file does not exist
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError:
+        return []
+    files = []
+    for line in text.replace("\\\n", " ").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        target, colon, deps = line.partition(":")
+        # A rule's colon is followed by whitespace, unlike e.g. a drive letter's
+        files.extend((deps if colon and deps[:1] in ("", " ", "\t") else line).split())
+    return files
+
+
+def _git(args, cwd=None):
+    try:
+        result = subprocess.run(
+            ["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True
+        )
+    except OSError as e:
+        raise ValueError(f"Cannot run git: {e}")
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git {' '.join(args)} failed: {e.stderr.strip()}")
+    return result.stdout
+
+
+def git_changed_files(ref, cwd=None):
+    """Get the files changed since a branch forked from ``ref``.
+
+    Covers the commits since the merge base of ``ref`` and HEAD, uncommitted
+    changes and untracked files; both the old and the new path of a rename.
+
+    Args:
+        ref: Git revision, such as ``origin/main``
+        cwd: Directory inside the repository
+
+    Returns:
+        List[str]: Absolute paths of the changed files
+
+    Raises:
+        ValueError: If git fails, e.g. for an unknown revision
+    """
+    top = _git(["rev-parse", "--show-toplevel"], cwd=cwd).strip()
+    base = _git(["merge-base", ref, "HEAD"], cwd=top).strip()
+    names = _git(["diff", "--name-only", "--no-renames", base], cwd=top).splitlines()
+    names += _git(["ls-files", "--others", "--exclude-standard"], cwd=top).splitlines()
+    return sorted({os.path.join(top, name) for name in names if name})
+
+
+class DependencyMap:
+    """The files every testbench and test depends on.
+
+    A testbench depends on what its build system compiles, that is
+    ``src_files``, ``tb_files``, its ``files`` and ``includes`` and the
+    Makefile, or the ``files`` of the Edalize description, plus the files in
+    the dependency lists its compiler wrote. A test additionally depends on
+    its own ``files``, such as stimulus or plusarg files. A directory covers
+    everything below it, and paths may be glob patterns.
+
+    The ``selection`` config section adds to the map::
+
+        selection:
+          dependency_files: ["sim/build/{testbench}/deps.d"]  # compiler-emitted lists
+          run_all: [tester.yml, "scripts/*"]  # a change here selects every test
+
+    A testbench whose build system cannot tell its sources is always selected,
+    so an incomplete map never skips a test.
+    """
+
+    def __init__(self, config, build_system, base_dir="."):
+        """Create the map.
+
+        Args:
+            config: Tester configuration
+            build_system: Build system compiling the testbenches
+            base_dir: Directory relative paths are resolved against
+        """
+        settings = config.get("selection") or {}
+        self.config = ConfigManager(config=config)
+        self.build_system = build_system
+        self.base_dir = base_dir
+        dependency_files = settings.get("dependency_files") or []
+        self.dependency_files = [dependency_files] if isinstance(dependency_files, str) else list(dependency_files)
+        self.run_all = [self._normalize(path) for path in settings.get("run_all") or []]
+        self._testbenches = {}
+
+    def _normalize(self, path):
+        path = str(path).replace("+incdir+", "").strip()
+        return os.path.normpath(os.path.join(os.path.abspath(self.base_dir), os.path.expanduser(path)))
+
+    def testbench_dependencies(self, testbench):
+        """Get the normalized paths a testbench depends on, or None if unknown."""
+        if testbench not in self._testbenches:
+            paths = self.build_system.get_dependencies(testbench)
+            if paths is not None:
+                tb_config = self.config.get_testbench_config(testbench)
+                patterns = self.dependency_files + list(tb_config.get("dependency_files") or [])
+                for pattern in patterns:
+                    paths = list(paths) + read_dependency_file(self._normalize(pattern.format(testbench=testbench)))
+                paths = [self._normalize(path) for entry in paths for path in str(entry).split()]
+            self._testbenches[testbench] = paths
+        return self._testbenches[testbench]
+
+    def test_dependencies(self, testbench, test):
+        """Get the normalized paths a test depends on besides its testbench's."""
+        files = self.config.get_test_config(testbench, test).get("files") or []
+        return [self._normalize(path) for path in ([files] if isinstance(files, str) else files)]
+
+    @staticmethod
+    def _matches(changed, dependencies):
+        for dependency in dependencies:
+            if changed == dependency or changed.startswith(dependency + os.sep):
+                return True
+            if _GLOB_CHARS.intersection(dependency) and fnmatch.fnmatch(changed, dependency):
+                return True
+        return False
+
+    def select(self, tests, changed):
+        """Get the tests a change can affect.
+
+        Args:
+            tests: (testbench, test) pairs to choose from
+            changed: Paths of the changed files
+
+        Returns:
+            List[Tuple[str, str]]: The affected tests, in their original order
+        """
+        changed = [self._normalize(path) for path in changed]
+        if any(self._matches(path, self.run_all) for path in changed):
+            return list(tests)
+
+        affected_testbenches = {}
+        selected = []
+        for testbench, test in tests:
+            if testbench not in affected_testbenches:
+                dependencies = self.testbench_dependencies(testbench)
+                if dependencies is None:
+                    logger.info(f"Dependencies of {testbench} are unknown, selecting all of its tests")
+                affected_testbenches[testbench] = dependencies is None or any(
+                    self._matches(path, dependencies) for path in changed
+                )
+            if affected_testbenches[testbench] or any(
+                self._matches(path, self.test_dependencies(testbench, test)) for path in changed
+            ):
+                selected.append((testbench, test))
+        return selected
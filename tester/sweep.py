@@ -0,0 +1,148 @@
+"""Seed and plusarg sweeps that expand one test into many instances."""
+
+import itertools
+import random
+
+MAX_SEED = 2**31 - 1
+
+
+def parse_seed_spec(spec):
+    """Parse a ``--seeds`` specification.
+
+    Three forms are accepted:
+
+    * ``N``: ``N`` distinct random seeds
+    * ``START:END`` (or ``START-END``): every seed from ``START`` to ``END`` inclusive
+    * ``A,B,C``: exactly the listed seeds
+
+    Args:
+        spec: The specification string
+
+    Returns:
+        tuple: ``("count", n)``, ``("range", (start, end))`` or ``("list", [seeds])``
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    spec = str(spec).strip()
+    try:
+        if "," in spec:
+            seeds = []
+            for part in spec.split(","):
+                if part.strip() and int(part) not in seeds:
+                    seeds.append(int(part))
+            return ("list", seeds)
+        for separator in (":", "-"):
+            start, found, end = spec.partition(separator)
+            if found and start:
+                start, end = int(start), int(end)
+                if end < start:
+                    raise ValueError(f"Empty seed range: {spec}")
+                return ("range", (start, end))
+        count = int(spec)
+    except ValueError as e:
+        raise ValueError(f"Invalid seed specification '{spec}': {e}")
+    if count < 1:
+        raise ValueError(f"Invalid seed specification '{spec}': need at least one seed")
+    return ("count", count)
+
+
+def parse_plusarg_axis(spec):
+    """Parse a ``NAME=V1,V2,...`` plusarg axis.
+
+    Args:
+        spec: The axis specification; a leading ``+`` is ignored
+
+    Returns:
+        tuple: ``(name, [values])``
+
+    Raises:
+        ValueError: If the specification has no name or no values
+    """
+    name, _, values = str(spec).lstrip("+").partition("=")
+    values = [value.strip() for value in values.split(",") if value.strip()]
+    if not name.strip() or not values:
+        raise ValueError(f"Invalid plusarg axis '{spec}', expected NAME=VALUE1,VALUE2,...")
+    return name.strip(), values
+
+
+class Sweep:
+    """A test expanded over seeds and plusarg values.
+
+    Instances are generated lazily, so a sweep of thousands of seeds never
+    exists as a list. Iterating twice yields the same instances: random seeds
+    and random plusarg samples are drawn from a generator seeded once per
+    sweep.
+    """
+
+    def __init__(self, testbench, test, seeds=("count", 1), axes=None, samples=None, rng_seed=None, options=None):
+        """Describe a sweep.
+
+        Args:
+            testbench: Name of the testbench
+            test: Name of the test
+            seeds: Parsed seed specification (see :func:`parse_seed_spec`)
+            axes: Sequence of ``(name, values)`` plusarg axes
+            samples: Number of random plusarg combinations per seed; None runs the full grid
+            rng_seed: Seed of the generator drawing random seeds and samples
+            options: Run options shared by every instance
+        """
+        self.testbench = testbench
+        self.test = test
+        self.seeds = seeds
+        self.axes = list(axes or [])
+        self.samples = samples
+        self.rng_seed = random.randrange(MAX_SEED) if rng_seed is None else rng_seed
+        self.options = dict(options or {})
+
+    def _iter_seeds(self, rng):
+        kind, value = self.seeds
+        if kind == "count":
+            # Sampling a range is O(count) and never repeats a seed
+            return iter(rng.sample(range(1, MAX_SEED), value))
+        if kind == "range":
+            return iter(range(value[0], value[1] + 1))
+        return iter(value)
+
+    def _seed_count(self):
+        kind, value = self.seeds
+        if kind == "count":
+            return value
+        if kind == "range":
+            return value[1] - value[0] + 1
+        return len(value)
+
+    def _iter_combinations(self, rng):
+        if not self.axes:
+            return iter([()])
+        if self.samples is None:
+            return itertools.product(*(values for _, values in self.axes))
+        return (tuple(rng.choice(values) for _, values in self.axes) for _ in range(self.samples))
+
+    def _combination_count(self):
+        if not self.axes:
+            return 1
+        if self.samples is not None:
+            return self.samples
+        count = 1
+        for _, values in self.axes:
+            count *= len(values)
+        return count
+
+    def __len__(self):
+        return self._seed_count() * self._combination_count()
+
+    def __iter__(self):
+        """Yield ``(testbench, test, options)`` instances."""
+        seed_rng = random.Random(self.rng_seed)
+        sample_rng = random.Random(self.rng_seed + 1)
+        base_args = list(self.options.get("runtime_args", []))
+        for seed in self._iter_seeds(seed_rng):
+            for index, combination in enumerate(self._iter_combinations(sample_rng)):
+                plusargs = [f"+{name}={value}" for (name, _), value in zip(self.axes, combination)]
+                options = dict(self.options, seed=seed)
+                if base_args or plusargs:
+                    options["runtime_args"] = base_args + plusargs
+                # Unique per instance so logs and run directories never collide
+                options["log_name"] = f"{self.test}.{seed}" + (f".{index}" if self.axes else "")
+                yield (self.testbench, self.test, options)
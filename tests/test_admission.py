@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+from build_systems import process
+from tester.admission import AdmissionController, parse_size
+from tester.history import MemoryHistory
+
+GB = 1024**3
+
+
+def write_proc(proc_dir, load=0.5, total=64 * GB, available=48 * GB, pressure=0.0):
+    (proc_dir / "pressure").mkdir(parents=True, exist_ok=True)
+    (proc_dir / "loadavg").write_text(f"{load} {load} {load} 1/200 1234\n")
+    (proc_dir / "meminfo").write_text(
+        f"MemTotal:       {total // 1024} kB\nMemFree:        1024 kB\nMemAvailable:   {available // 1024} kB\n"
+    )
+    (proc_dir / "pressure" / "memory").write_text(
+        f"some avg10={pressure:.2f} avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+    )
+
+
+def make_controller(tmp_path, config=None, history=None, **settings):
+    config = dict(config or {})
+    settings.setdefault("max_load", 4)
+    settings.setdefault("poll_interval", 0.02)
+    config["admission"] = settings
+    proc_dir = tmp_path / "proc"
+    if not proc_dir.exists():
+        write_proc(proc_dir)
+    return AdmissionController(config, history=history, proc_dir=str(proc_dir))
+
+
+def admit_in_thread(controller, testbench, test, admitted):
+    release = threading.Event()
+
+    def run():
+        with controller.admit(testbench, test) as ok:
+            admitted.append((test, ok))
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, release
+
+
+def test_parse_size():
+    assert parse_size("512M") == 512 * 1024**2
+    assert parse_size("30G") == parse_size("30GiB") == parse_size("30 gb") == 30 * GB
+    assert parse_size(256) == 256 * 1024**2
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_footprint_precedence(tmp_path):
+    config = {
+        "testbenches": {
+            "tb1": {"memory": "2G", "tests": {"big": {"memory": "30G"}}},
+            "tb2": {"tests": ["plain"]},
+        }
+    }
+    history = MemoryHistory()
+    history.record("tb2", "learned", 3 * GB)
+    controller = make_controller(tmp_path, config, history=history, default_test_memory="1G")
+
+    assert controller.footprint("tb1", "big") == 30 * GB
+    assert controller.footprint("tb1", "other") == 2 * GB
+    assert controller.footprint("tb2", "learned") == 3 * GB
+    assert controller.footprint("tb2", "plain") == GB
+
+
+def test_tests_wait_for_free_memory(tmp_path):
+    write_proc(tmp_path / "proc", available=12 * GB)
+    config = {"testbenches": {"tb1": {"memory": "8G"}}}
+    controller = make_controller(tmp_path, config, memory_reserve="1G")
+    admitted = []
+
+    first, release_first = admit_in_thread(controller, "tb1", "a", admitted)
+    time.sleep(0.1)
+    # The first test took 8G of the 12G
+    write_proc(tmp_path / "proc", available=4 * GB)
+    second, release_second = admit_in_thread(controller, "tb1", "b", admitted)
+    time.sleep(0.1)
+    assert admitted == [("a", True)]
+
+    release_first.set()
+    first.join(5)
+    second_admitted = time.monotonic()
+    while len(admitted) < 2 and time.monotonic() - second_admitted < 5:
+        time.sleep(0.01)
+    # Nothing else runs, so the test starts even though it does not fit
+    assert admitted == [("a", True), ("b", True)]
+    release_second.set()
+    second.join(5)
+
+
+def test_tests_wait_for_the_load_to_drop(tmp_path):
+    write_proc(tmp_path / "proc", load=6.0)
+    controller = make_controller(tmp_path)
+    admitted = []
+
+    first, release_first = admit_in_thread(controller, "tb1", "a", admitted)
+    time.sleep(0.1)
+    second, release_second = admit_in_thread(controller, "tb1", "b", admitted)
+    time.sleep(0.1)
+    assert admitted == [("a", True)]
+
+    write_proc(tmp_path / "proc", load=1.0)
+    second_admitted = time.monotonic()
+    while len(admitted) < 2 and time.monotonic() - second_admitted < 5:
+        time.sleep(0.01)
+    assert admitted == [("a", True), ("b", True)]
+    assert controller.running == 2
+    for release in (release_first, release_second):
+        release.set()
+    first.join(5)
+    second.join(5)
+    assert controller.running == 0
+
+
+def test_backs_off_under_memory_pressure(tmp_path):
+    controller = make_controller(tmp_path, max_load=8)
+    admitted = []
+    threads = [admit_in_thread(controller, "tb1", f"t{i}", admitted) for i in range(4)]
+    time.sleep(0.1)
+    assert controller.running == 4
+
+    write_proc(tmp_path / "proc", pressure=40.0)
+    late, release_late = admit_in_thread(controller, "tb1", "late", admitted)
+    time.sleep(0.1)
+    assert controller.limit <= 2
+    assert ("late", True) not in admitted
+
+    # The limit recovers once the pressure is gone
+    write_proc(tmp_path / "proc")
+    for thread, release in threads:
+        release.set()
+        thread.join(5)
+    late_admitted = time.monotonic()
+    while ("late", True) not in admitted and time.monotonic() - late_admitted < 5:
+        time.sleep(0.01)
+    assert ("late", True) in admitted
+    release_late.set()
+    late.join(5)
+
+
+def test_cancel_stops_waiting(tmp_path):
+    write_proc(tmp_path / "proc", load=10.0)
+    controller = make_controller(tmp_path)
+    admitted = []
+    first, release_first = admit_in_thread(controller, "tb1", "a", admitted)
+    time.sleep(0.05)
+    second, release_second = admit_in_thread(controller, "tb1", "b", admitted)
+    time.sleep(0.05)
+    try:
+        process.terminate_all()
+        release_second.set()
+        second.join(5)
+    finally:
+        release_first.set()
+        first.join(5)
+        process.reset()
+    assert admitted == [("a", True), ("b", False)]
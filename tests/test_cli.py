@@ -1,5 +1,7 @@
 import logging
 import os
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -237,6 +239,169 @@ class TestCLICommands:
         assert "Successfully cleaned" in result.output
         mock_build_system.clean.assert_called_once_with("my_testbench")
 
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config):
+        """Test running a regression in parallel"""
+        mock_build_system = MagicMock()
+        mock_build_system.get_available_testbenches.return_value = ["my_testbench"]
+        mock_build_system.get_available_tests.return_value = ["basic_test", "extended_test"]
+        mock_get_build_system.return_value = mock_build_system
+        mock_runner = mock_runner_class.return_value
+        mock_runner.run_regression.return_value = "reports/report.html"
+        mock_runner.report.total = 2
+        mock_runner.report.counts = {"passed": 2}
+
+        result = cli_runner.invoke(cli, ["regression", "--parallel", "4", "--seed", "7"], obj=mock_config)
+
+        assert result.exit_code == 0
+        assert "2/2 passed" in result.output
+        mock_runner_class.assert_called_once()
+        assert mock_runner_class.call_args[0] == (mock_build_system,)
+        assert mock_runner_class.call_args[1]["parallel"] == 4
+        assert mock_runner_class.call_args[1]["history"] is not None
+        assert mock_runner_class.call_args[1]["admission"] is None
+        assert mock_runner_class.call_args[1]["coverage_merger"] is None
+        items = mock_runner.run_regression.call_args[0][0]
+        assert items[0] == ("my_testbench", "basic_test", {"runtime_args": ["+UVM_TESTNAME=basic_test", "+TIMEOUT=1000"]})
+        assert mock_runner.run_regression.call_args[1]["seed"] == 7
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression_named(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config, tmp_path):
+        """Test running a regression defined in the config"""
+        config_file = tmp_path / "tester.yml"
+        mock_config["regressions"] = {"smoke": {"tests": ["my_testbench/basic_test"]}}
+        config_file.write_text(yaml.safe_dump(mock_config))
+        mock_get_build_system.return_value = MagicMock()
+        mock_runner = mock_runner_class.return_value
+        mock_runner.report.total = 1
+        mock_runner.report.counts = {"failed": 1}
+
+        result = cli_runner.invoke(cli, ["--config", str(config_file), "regression", "--name", "smoke"])
+
+        assert result.exit_code != 0
+        assert "0/1 passed" in result.output
+        assert [item[:2] for item in mock_runner.run_regression.call_args[0][0]] == [("my_testbench", "basic_test")]
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_sweep(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config):
+        """Test sweeping a test over seeds and plusargs"""
+        mock_runner = mock_runner_class.return_value
+        failures = [{"seed": 9, "runtime_args": ["+UVM_TESTNAME=basic_test", "+TIMEOUT=1000", "+MODE=b"]}, {"seed": 4}]
+        mock_runner.run_sweep.return_value = ("reports/report.html", failures)
+        mock_runner.report.total = 8
+        mock_runner.report.counts = {"passed": 6, "failed": 2}
+
+        result = cli_runner.invoke(
+            cli, ["sweep", "basic_test", "--seeds", "1:4", "--plusarg", "MODE=a,b", "-j", "8"], obj=mock_config
+        )
+
+        assert result.exit_code != 0
+        assert "6/8 passed" in result.output
+        assert "Failing seeds: 4, 9" in result.output
+        assert "seed 9: +MODE=b" in result.output
+        assert mock_runner_class.call_args[1]["parallel"] == 8
+        sweep = mock_runner.run_sweep.call_args[0][0]
+        assert (sweep.testbench, sweep.test, len(sweep)) == ("my_testbench", "basic_test", 8)
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression_adaptive(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config):
+        """Test that --adaptive admits tests by load and memory, with up to one per CPU"""
+        mock_get_build_system.return_value.get_available_testbenches.return_value = ["my_testbench"]
+        mock_get_build_system.return_value.get_available_tests.return_value = ["basic_test"]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.report.total = 1
+        mock_runner.report.counts = {"passed": 1}
+
+        result = cli_runner.invoke(cli, ["regression", "--adaptive"], obj=mock_config)
+
+        assert result.exit_code == 0
+        kwargs = mock_runner_class.call_args[1]
+        assert kwargs["parallel"] == (os.cpu_count() or 1)
+        assert kwargs["admission"].history is kwargs["memory_history"]
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression_coverage_merge(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config):
+        """Test that --coverage merges the coverage with the simulator's merge tool"""
+        mock_get_build_system.return_value.simulator = "vcs"
+        mock_get_build_system.return_value.get_available_testbenches.return_value = ["my_testbench"]
+        mock_get_build_system.return_value.get_available_tests.return_value = ["basic_test"]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.report.total = 1
+        mock_runner.report.counts = {"passed": 1}
+        mock_runner.coverage_path = "reports/coverage_1.vdb"
+
+        result = cli_runner.invoke(cli, ["regression", "--coverage"], obj=mock_config)
+
+        assert result.exit_code == 0
+        assert mock_runner_class.call_args[1]["coverage_merger"].merge_command[0] == "urg"
+        assert "Merged coverage: reports/coverage_1.vdb" in result.output
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression_changed(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config, tmp_path):
+        """Test that --changed only runs the tests the changed files affect"""
+        mock_build_system = mock_get_build_system.return_value
+        mock_build_system.get_available_testbenches.return_value = ["tb1", "tb2"]
+        mock_build_system.get_available_tests.side_effect = lambda tb: [f"{tb}_test"]
+        mock_build_system.get_dependencies.side_effect = lambda tb: [f"{tb}/env.sv"]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.report.total = 1
+        mock_runner.report.counts = {"passed": 1}
+        changed = tmp_path / "changed.txt"
+        changed.write_text("tb2/env.sv\ndocs/index.md\n")
+
+        result = cli_runner.invoke(cli, ["regression", "--changed", str(changed)], obj=mock_config)
+
+        assert result.exit_code == 0
+        assert "2 changed file(s) affect 1 of 2 test(s)" in result.output
+        assert [item[:2] for item in mock_runner.run_regression.call_args[0][0]] == [("tb2", "tb2_test")]
+
+    @patch("cli.TestRunner")
+    @patch("cli.get_build_system")
+    def test_regression_resume(self, mock_get_build_system, mock_runner_class, cli_runner, mock_config, tmp_path):
+        """Test that --resume and --rerun-failed continue the journal of the last run"""
+        config_file = tmp_path / "tester.yml"
+        mock_config["state_dir"] = str(tmp_path)
+        config_file.write_text(yaml.safe_dump(mock_config))
+        mock_runner = mock_runner_class.return_value
+        mock_runner.report.total = 2
+        mock_runner.report.counts = {"passed": 2}
+
+        result = cli_runner.invoke(cli, ["--config", str(config_file), "regression", "--name", "nightly", "--resume"])
+        assert result.exit_code != 0
+        assert "No journal of regression 'nightly' to resume" in result.output
+
+        (tmp_path / "journals").mkdir()
+        (tmp_path / "journals" / "nightly.jsonl").write_text("")
+        for flag, mode in [("--resume", "unfinished"), ("--rerun-failed", "failed")]:
+            result = cli_runner.invoke(cli, ["--config", str(config_file), "regression", "--name", "nightly", flag])
+
+            assert result.exit_code == 0
+            assert mock_runner.run_regression.call_args[1]["resume"] == mode
+            assert mock_runner.run_regression.call_args[0][0] == []
+            assert mock_runner_class.call_args[1]["journal"].path == str(tmp_path / "journals" / "nightly.jsonl")
+
+        result = cli_runner.invoke(cli, ["--config", str(config_file), "regression", "--resume", "--rerun-failed"])
+        assert result.exit_code != 0
+
+    def test_sweep_invalid_seeds(self, cli_runner, mock_config):
+        """Test error for a malformed seed specification"""
+        result = cli_runner.invoke(cli, ["sweep", "basic_test", "--seeds", "many"], obj=mock_config)
+        assert result.exit_code != 0
+        assert "Invalid seed specification" in result.output
+
+    def test_regression_unknown_name(self, cli_runner, mock_config):
+        """Test error for a regression that is not configured"""
+        with patch("cli.get_build_system"):
+            result = cli_runner.invoke(cli, ["regression", "--name", "nightly"], obj=mock_config)
+        assert result.exit_code != 0
+        assert "Unknown regression: nightly" in result.output
+
     def test_default_testbench_commands(self, cli_runner, mock_config):
         """Test commands using default testbench"""
         with patch("cli.get_build_system") as mock_get_build_system:
@@ -396,3 +561,83 @@ class TestBuildSystem:
             build_system = get_build_system(config)
             assert build_system == mock_instance
             mock_makefile.assert_called_once_with(config)
+
+
+class TestStartupImports:
+    """Guard the CLI startup time by checking what a fresh interpreter imports."""
+
+    REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+    HEAVY_MODULES = ("edalize", "jinja2", "yaml")
+
+    def loaded_modules(self, script, cwd):
+        env = dict(os.environ, PYTHONPATH=self.REPO_ROOT)
+        code = script + "\nimport sys\nprint(' '.join(m for m in %r if m in sys.modules))" % (self.HEAVY_MODULES,)
+        result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, stdout=subprocess.PIPE, check=True)
+        return result.stdout.decode().split()
+
+    def test_import_cli_is_lightweight(self):
+        assert self.loaded_modules("import cli", self.REPO_ROOT) == []
+
+    def test_makefile_commands_skip_edalize(self, tmp_path):
+        config_file = tmp_path / "tester.yml"
+        config_file.write_text(
+            f"build_system: makefile\nmakefile_path: {self.REPO_ROOT}\nuse_custom_makefile: true\nstate_dir: {tmp_path}\n"
+        )
+        script = (
+            "from click.testing import CliRunner\n"
+            "from cli import cli\n"
+            "result = CliRunner().invoke(cli, ['list-testbenches'])\n"
+            "assert 'testbench1' in result.output, result.output"
+        )
+
+        assert self.loaded_modules(script, str(tmp_path)) == ["yaml"]
+
+
+def test_results_command(tmp_path, cli_runner):
+    """Test querying the results database"""
+    from tester.results_db import ResultsDatabase
+
+    db = ResultsDatabase(str(tmp_path / "results.db"))
+    db.add("tb1", "t1", "passed", duration=1.0, seed=1)
+    db.add("tb1", "t1", "failed", duration=2.0, seed=2, log_path="logs/t1.2.log")
+    db.add("tb1", "t2", "passed", duration=3.0, seed=3, usage={"cpu_user": 2.5, "cpu_system": 0.5, "max_rss": 3 * 1024**3})
+    db.close()
+    config_file = tmp_path / "tester.yml"
+    config_file.write_text(f"build_system: makefile\nresults_db: {tmp_path / 'results.db'}\n")
+
+    result = cli_runner.invoke(cli, ["--config", str(config_file), "results", "tb1", "t1"])
+    assert result.exit_code == 0
+    lines = result.output.strip().split("\n")
+    assert len(lines) == 2
+    assert "tb1/t1  seed 2  failed  2.0s  logs/t1.2.log" in lines[0]
+
+    result = cli_runner.invoke(cli, ["--config", str(config_file), "results", "--failed", "--since", "1d"])
+    assert result.exit_code == 0
+    assert "seed 2  failed" in result.output and "passed" not in result.output
+
+    result = cli_runner.invoke(cli, ["--config", str(config_file), "results", "--top", "memory", "-n", "1"])
+    assert result.exit_code == 0
+    assert "tb1/t2  seed 3  passed  3.0s  cpu 3.0s  mem 3.0G" in result.output
+
+    result = cli_runner.invoke(cli, ["--config", str(config_file), "results", "--since", "yesterday-ish"])
+    assert result.exit_code != 0
+    assert "Invalid time" in result.output
+
+
+def test_worker_command(tmp_path, cli_runner):
+    """Test that the worker command connects to the given coordinator"""
+    config_file = tmp_path / "tester.yml"
+    config_file.write_text(f"build_system: makefile\nstate_dir: {tmp_path / 'state'}\ndistributed:\n  token: secret\n")
+
+    with patch("cli.Worker") as mock_worker:
+        mock_worker.return_value.run.return_value = 3
+        result = cli_runner.invoke(cli, ["--config", str(config_file), "worker", "farm01:7420", "-j", "4"])
+    assert result.exit_code == 0
+    assert "after running 3 test(s)" in result.output
+    args, kwargs = mock_worker.call_args
+    assert args[1] == ("farm01", 7420)
+    assert kwargs["slots"] == 4 and kwargs["token"] == "secret"
+
+    result = cli_runner.invoke(cli, ["--config", str(config_file), "worker", "farm01"])
+    assert result.exit_code != 0
+    assert "Invalid address" in result.output
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from config.config_manager import ConfigManager
+from config.loader import get_cache_path, get_yaml_loader, load_yaml_file, parse_yaml
+
+
+def write_config(path, text, age=10):
+    path.write_text(text)
+    # Files modified within the last seconds are deliberately not cached
+    past = time.time() - age
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "tester.yml"
+    write_config(path, "build_system: makefile\ntestbenches:\n  tb1:\n    tests: [t1, t2]\n")
+    return path
+
+
+def count_parses():
+    return patch("config.loader.parse_yaml", wraps=parse_yaml)
+
+
+class TestYamlLoader:
+    def test_prefers_c_loader(self):
+        assert get_yaml_loader() is getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def test_warm_start_skips_parsing(self, config_file):
+        expected = {"build_system": "makefile", "testbenches": {"tb1": {"tests": ["t1", "t2"]}}}
+        assert load_yaml_file(str(config_file)) == expected
+        assert os.path.exists(get_cache_path(str(config_file)))
+
+        with count_parses() as mock_parse:
+            assert load_yaml_file(str(config_file)) == expected
+        mock_parse.assert_not_called()
+
+    def test_change_invalidates_cache(self, config_file):
+        load_yaml_file(str(config_file))
+        write_config(config_file, "build_system: edalize\n", age=5)
+
+        assert load_yaml_file(str(config_file)) == {"build_system": "edalize"}
+
+    def test_recently_modified_file_not_cached(self, config_file):
+        write_config(config_file, "build_system: edalize\n", age=0)
+
+        load_yaml_file(str(config_file))
+
+        assert not os.path.exists(get_cache_path(str(config_file)))
+
+    def test_corrupt_cache_ignored(self, config_file):
+        cache_path = get_cache_path(str(config_file))
+        os.makedirs(os.path.dirname(cache_path))
+        with open(cache_path, "wb") as f:
+            f.write(b'{"key": [')
+
+        assert load_yaml_file(str(config_file))["build_system"] == "makefile"
+
+    def test_cache_is_plain_json(self, config_file):
+        load_yaml_file(str(config_file))
+
+        with open(get_cache_path(str(config_file))) as f:
+            assert json.load(f)["data"]["testbenches"] == {"tb1": {"tests": ["t1", "t2"]}}
+
+    def test_documents_json_cannot_represent_not_cached(self, tmp_path):
+        path = tmp_path / "dates.yml"
+        write_config(path, "released: 2024-01-31\nseeds:\n  1: one\n")
+
+        assert load_yaml_file(str(path))["seeds"] == {1: "one"}
+        assert not os.path.exists(get_cache_path(str(path)))
+        write_config(path, "seeds:\n  1: one\n")
+        assert load_yaml_file(str(path)) == {"seeds": {1: "one"}}
+        assert not os.path.exists(get_cache_path(str(path)))
+
+    def test_invalid_yaml_message_matches_pure_python_loader(self, tmp_path):
+        path = tmp_path / "bad.yml"
+        write_config(path, "invalid: yaml: :")
+
+        with pytest.raises(yaml.YAMLError) as exc_info:
+            load_yaml_file(str(path))
+        assert "mapping values are not allowed here" in str(exc_info.value)
+
+    def test_config_manager_uses_cache(self, config_file):
+        assert ConfigManager(str(config_file)).get("build_system") == "makefile"
+
+        with count_parses() as mock_parse:
+            assert ConfigManager(str(config_file)).get_testbench_config("tb1") == {"tests": ["t1", "t2"]}
+        mock_parse.assert_not_called()
@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from build_systems.coverage import CoverageMerger, get_coverage_settings
+
+# Stand-in merge tool: the union of the lines of the input files, each merge
+# logged to merges.log next to the script. It fails on inputs named broken*,
+# and on intermediate databases while a fail_intermediates file is next to it
+MERGE_TOOL = """\
+import os, sys
+output, inputs = sys.argv[1], sys.argv[2:]
+if len(inputs) == 1:
+    inputs = inputs[0].split()
+if any(os.path.basename(path).startswith("broken") for path in inputs):
+    sys.exit("cannot read database")
+if os.path.exists(os.path.join(os.path.dirname(__file__), "fail_intermediates")):
+    if any(os.path.basename(path).startswith("level") for path in inputs):
+        sys.exit("cannot read database")
+lines = set()
+for path in inputs:
+    with open(path) as f:
+        lines.update(f.read().split())
+with open(output, "w") as f:
+    f.write("\\n".join(sorted(lines)))
+with open(os.path.join(os.path.dirname(__file__), "merges.log"), "a") as f:
+    f.write(f"{len(inputs)}\\n")
+"""
+
+
+@pytest.fixture
+def merge_tool(tmp_path):
+    script = tmp_path / "merge.py"
+    script.write_text(MERGE_TOOL)
+    return script
+
+
+def make_merger(tmp_path, merge_tool, **settings):
+    settings.setdefault("merge_command", [sys.executable, str(merge_tool), "{output}", "{inputs}"])
+    settings.setdefault("work_dir", str(tmp_path / "work"))
+    return CoverageMerger({"coverage": settings})
+
+
+def make_databases(tmp_path, count, prefix="test"):
+    databases = []
+    for index in range(count):
+        path = tmp_path / "results" / f"{prefix}{index}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{prefix}{index}\n")
+        databases.append(str(path))
+    return databases
+
+
+def merge_sizes(merge_tool):
+    log = merge_tool.parent / "merges.log"
+    return [int(line) for line in log.read_text().split()] if log.exists() else []
+
+
+def test_coverage_settings():
+    assert get_coverage_settings({}, "VCS")["suffix"] == ".vdb"
+    assert get_coverage_settings({}, "xcelium")["database"] == "{path}/tester/run"
+    assert get_coverage_settings({}, "verilator")["merge_command"] is None
+    settings = get_coverage_settings({"coverage": {"merge_command": "merge {inputs}", "fan_in": 4}}, "questa")
+    assert settings["merge_command"] == "merge {inputs}"
+    assert settings["suffix"] == ".ucdb"
+
+
+def test_merger_needs_a_merge_command():
+    with pytest.raises(ValueError):
+        CoverageMerger({}, simulator="verilator")
+
+
+@pytest.mark.parametrize("count", [1, 3, 10, 23])
+def test_every_database_ends_up_in_the_merged_one(tmp_path, merge_tool, count):
+    merger = make_merger(tmp_path, merge_tool, fan_in=3, parallel=2)
+    databases = make_databases(tmp_path, count)
+    for database in databases:
+        merger.add(database)
+
+    output = merger.finish(str(tmp_path / "report" / "coverage"))
+
+    assert output == str(tmp_path / "report" / "coverage")
+    assert sorted((tmp_path / "report" / "coverage").read_text().split()) == sorted(f"test{i}" for i in range(count))
+    assert all(size <= 3 for size in merge_sizes(merge_tool))
+    assert merger.unmerged == []
+    # The intermediate databases are gone, the tests' own are kept
+    assert not (tmp_path / "work").exists() or os.listdir(tmp_path / "work") == []
+    assert all(os.path.exists(database) for database in databases)
+
+
+def test_merges_start_while_tests_run(tmp_path, merge_tool):
+    merger = make_merger(tmp_path, merge_tool, fan_in=4)
+    for database in make_databases(tmp_path, 8):
+        merger.add(database)
+
+    deadline = time.monotonic() + 10
+    while len(merge_sizes(merge_tool)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert merge_sizes(merge_tool) == [4, 4]
+
+    merger.finish(str(tmp_path / "coverage"))
+    # Only the two intermediate databases were left to merge
+    assert merge_sizes(merge_tool) == [4, 4, 2]
+
+
+def test_inputs_inside_an_argument(tmp_path, merge_tool):
+    command = f"{sys.executable} {merge_tool} {{output}} '{{inputs}}'"
+    merger = make_merger(tmp_path, merge_tool, merge_command=command, suffix=".db")
+    for database in make_databases(tmp_path, 2):
+        merger.add(database)
+
+    output = merger.finish(str(tmp_path / "coverage"))
+
+    assert output == str(tmp_path / "coverage.db")
+    assert (tmp_path / "coverage.db").read_text().split() == ["test0", "test1"]
+
+
+def test_failed_merge_keeps_its_inputs_unmerged(tmp_path, merge_tool):
+    merger = make_merger(tmp_path, merge_tool, fan_in=2)
+    good = make_databases(tmp_path, 2)
+    broken = make_databases(tmp_path, 2, prefix="broken")
+    for database in good + broken:
+        merger.add(database)
+
+    output = merger.finish(str(tmp_path / "coverage"))
+
+    assert output == str(tmp_path / "coverage")
+    assert (tmp_path / "coverage").read_text().split() == ["test0", "test1"]
+    assert sorted(merger.unmerged) == sorted(broken)
+
+
+def test_failed_merge_of_intermediates_keeps_them(tmp_path, merge_tool):
+    (merge_tool.parent / "fail_intermediates").write_text("")
+    merger = make_merger(tmp_path, merge_tool, fan_in=2)
+    for database in make_databases(tmp_path, 4):
+        merger.add(database)
+
+    assert merger.finish(str(tmp_path / "coverage")) is None
+
+    # The two first-level databases survive the removal of the work directory
+    assert len(merger.unmerged) == 2
+    assert all(not path.startswith(str(tmp_path / "work" / "merge_")) for path in merger.unmerged)
+    kept = sorted(line for path in merger.unmerged for line in Path(path).read_text().split())
+    assert kept == [f"test{i}" for i in range(4)]
+
+
+def test_nothing_to_merge(tmp_path, merge_tool):
+    merger = make_merger(tmp_path, merge_tool)
+    assert merger.finish(str(tmp_path / "coverage")) is None
+    assert not (tmp_path / "work").exists()
+
+
+def test_abort_drops_the_merge(tmp_path, merge_tool):
+    merger = make_merger(tmp_path, merge_tool, fan_in=2)
+    for database in make_databases(tmp_path, 5):
+        merger.add(database)
+
+    merger.abort()
+
+    assert os.listdir(tmp_path / "work") == []
+    assert not (tmp_path / "coverage").exists()
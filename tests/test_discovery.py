@@ -0,0 +1,99 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from build_systems.makefile import MakefileBuildSystem
+from build_systems.makefile.discovery import DiscoveryIndex
+
+MAKEFILE = """\
+list-all:
+\t@echo "tb1: test1 test2"
+\t@echo "tb2: test3"
+"""
+
+LEGACY_MAKEFILE = """\
+list-testbenches:
+\t@echo "tb1"
+\t@echo "tb2"
+
+list-tests:
+\t@case "$(TESTBENCH)" in \\
+\t\ttb1) echo "test1"; echo "test2";; \\
+\t\ttb2) echo "test3";; \\
+\tesac
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "Makefile").write_text(MAKEFILE)
+    return tmp_path
+
+
+def make_index(project):
+    return DiscoveryIndex("make", str(project), str(project / ".tester" / "discovery.json"))
+
+
+def count_make_calls():
+    return patch("build_systems.makefile.discovery.subprocess.run", wraps=subprocess.run)
+
+
+class TestDiscoveryIndex:
+    def test_single_make_invocation(self, project):
+        with count_make_calls() as mock_run:
+            index = make_index(project).load()
+
+        assert index == {"tb1": ["test1", "test2"], "tb2": ["test3"]}
+        assert list(index) == ["tb1", "tb2"]
+        assert mock_run.call_count == 1
+        assert "list-all" in mock_run.call_args[0][0]
+
+    def test_cached_across_instances(self, project):
+        make_index(project).load()
+
+        with count_make_calls() as mock_run:
+            index = make_index(project).load()
+
+        assert list(index) == ["tb1", "tb2"]
+        mock_run.assert_not_called()
+
+    def test_touched_makefile_keeps_index(self, project):
+        make_index(project).load()
+        st = os.stat(project / "Makefile")
+        os.utime(project / "Makefile", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        with count_make_calls() as mock_run:
+            assert make_index(project).load()["tb2"] == ["test3"]
+        mock_run.assert_not_called()
+
+    def test_refresh_on_change(self, project):
+        index = make_index(project)
+        index.load()
+        (project / "Makefile").write_text(MAKEFILE + '\t@echo "tb3: test4"\n')
+
+        assert index.load()["tb3"] == ["test4"]
+
+    def test_fallback_without_list_all(self, project):
+        (project / "Makefile").write_text(LEGACY_MAKEFILE)
+
+        index = make_index(project).load()
+
+        assert index == {"tb1": ["test1", "test2"], "tb2": ["test3"]}
+
+    def test_no_makefile(self, tmp_path):
+        assert make_index(tmp_path).load() is None
+
+
+class TestMakefileDiscovery:
+    def test_build_system_uses_index(self, project):
+        config = {"makefile_path": str(project), "state_dir": str(project / ".tester")}
+        build_system = MakefileBuildSystem(config)
+
+        with count_make_calls() as mock_run:
+            assert build_system.get_available_testbenches() == ["tb1", "tb2"]
+            assert build_system.get_available_tests("tb1") == ["test1", "test2"]
+            assert build_system.get_available_tests("tb3") == []
+
+        assert mock_run.call_count == 1
@@ -0,0 +1,222 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from build_systems import process
+from build_systems.base import BuildSystemBase
+from tester import runner as runner_module
+from tester.distributed import Coordinator, Worker, _LocalBuilds, build_key, parse_address
+
+
+class HostBuildSystem:
+    """Build system stub standing in for the checkout on one worker host."""
+
+    RUN_ONLY_OPTIONS = BuildSystemBase.RUN_ONLY_OPTIONS
+    get_build_options = BuildSystemBase.get_build_options
+
+    def __init__(self, delay=0.02, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.builds = []
+        self.runs = []
+        self._lock = threading.Lock()
+
+    def needs_build(self, testbench):
+        return True
+
+    def build(self, testbench, options=None):
+        with self._lock:
+            self.builds.append((testbench, options))
+        return True
+
+    def run(self, testbench, test, options=None):
+        assert options.get("prebuilt")
+        with self._lock:
+            self.runs.append((testbench, test))
+        time.sleep(self.delay)
+        return test not in self.failing
+
+    def get_build_fingerprint(self, testbench):
+        return "fp"
+
+
+class RawWorker:
+    """Speaks the worker protocol by hand, to control exactly what the coordinator sees."""
+
+    def __init__(self, address, name="raw"):
+        self.sock = socket.create_connection(address)
+        self.reader = self.sock.makefile("rb")
+        self.send({"type": "hello", "version": 1, "name": name})
+        assert self.receive()["type"] == "welcome"
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+    def receive(self):
+        return json.loads(self.reader.readline())
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def start_workers(coordinator, build_systems, **kwargs):
+    threads = []
+    for i, build_system in enumerate(build_systems):
+        worker = Worker(build_system, coordinator.address, name=f"w{i}", connect_timeout=5, **kwargs)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def test_parse_address():
+    assert parse_address("7420") == ("0.0.0.0", 7420)
+    assert parse_address("farm01:9000") == ("farm01", 9000)
+    assert parse_address(":9000", default_host="localhost") == ("localhost", 9000)
+    with pytest.raises(ValueError):
+        parse_address("farm01")
+
+
+def test_regression_on_several_workers(tmp_path):
+    tests = [("tb1", f"test{i}") for i in range(12)] + [("tb2", f"test{i}") for i in range(6)]
+    hosts = [HostBuildSystem(failing={"test3"}) for _ in range(3)]
+    coordinator = Coordinator("127.0.0.1", 0)
+    threads = start_workers(coordinator, hosts)
+    try:
+        runner = runner_module.TestRunner(HostBuildSystem())
+        runner.run_regression(tests, report_dir=str(tmp_path), coordinator=coordinator)
+    finally:
+        coordinator.close()
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+    assert runner.report.total == 18
+    assert runner.report.counts == {"passed": 16, "failed": 2}
+    # Every test ran exactly once, and every host built each testbench at most once
+    assert sorted(run for host in hosts for run in host.runs) == sorted(tests)
+    for host in hosts:
+        assert len(host.builds) == len(set(tb for tb, _ in host.builds))
+    failed = [result for result in runner.report.tests if result.status == "failed"]
+    assert all("[worker: w" in result.details for result in failed)
+
+
+def test_lost_worker_jobs_are_rescheduled(tmp_path):
+    coordinator = Coordinator("127.0.0.1", 0, heartbeat_timeout=0.3)
+    coordinator.submit(0, "tb1", "test0", {})
+    coordinator.submit(1, "tb1", "test1", {})
+
+    # Takes a job, then falls silent as if its host had died
+    silent = RawWorker(coordinator.address, name="silent")
+    silent.send({"type": "request", "builds": []})
+    assert silent.receive()["job"]["test"] == "test0"
+
+    host = HostBuildSystem()
+    threads = start_workers(coordinator, [host])
+    results = []
+    try:
+        while coordinator.outstanding:
+            result = coordinator.next_result(timeout=5)
+            assert result is not None
+            results.append(result)
+    finally:
+        coordinator.close()
+        silent.close()
+    threads[0].join(5)
+
+    assert sorted(result["job"]["test"] for result in results) == ["test0", "test1"]
+    assert {result["worker"] for result in results} == {"w0"}
+
+
+def test_worker_runs_jobs_after_a_cancel():
+    class CancellableBuildSystem(HostBuildSystem):
+        def run(self, testbench, test, options=None):
+            # Like run_command, refuses to start while cancelled and is killed by a cancel
+            if process.is_cancelled():
+                return False
+            super().run(testbench, test, options)
+            return not process.is_cancelled()
+
+    host = CancellableBuildSystem(delay=0.3)
+    coordinator = Coordinator("127.0.0.1", 0)
+    # The cancel only reaches the busy slot, the idle one must not keep it either
+    threads = start_workers(coordinator, [host], slots=2)
+    try:
+        coordinator.submit(0, "tb1", "test0", {}, build={})
+        deadline = time.monotonic() + 5
+        while not host.runs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        coordinator.cancel()
+        assert process.wait_cancelled(5)
+
+        # The next regression on the same worker is not affected by the cancel,
+        # also on the idle slot that takes a job while the cancelled one still runs
+        for job_id in range(1, 5):
+            coordinator.submit(job_id, "tb1", f"test{job_id}", {}, build={})
+        results = [coordinator.next_result(timeout=5) for _ in range(5)]
+        statuses = {result["job"]["id"]: result["status"] for result in results}
+        assert statuses == {0: "failed", 1: "passed", 2: "passed", 3: "passed", 4: "passed"}
+        assert {result["worker"] for result in results} == {"w0/1", "w0/2"}
+    finally:
+        coordinator.close()
+        process.reset()
+    threads[0].join(5)
+
+
+def test_jobs_with_a_local_build_are_preferred():
+    coordinator = Coordinator("127.0.0.1", 0)
+    coordinator.submit(0, "tb1", "test0", {}, build={"debug": False})
+    coordinator.submit(1, "tb2", "test0", {}, build={"debug": False})
+    coordinator.submit(2, "tb3", "test0", {})
+    try:
+        raw = RawWorker(coordinator.address)
+        raw.send({"type": "request", "builds": [build_key("tb2", {"debug": False})]})
+        assert raw.receive()["job"]["testbench"] == "tb2"
+        # Then a job needing no build, before building something new
+        raw.send({"type": "request", "builds": []})
+        assert raw.receive()["job"]["testbench"] == "tb3"
+        raw.close()
+    finally:
+        coordinator.close()
+
+
+def test_wrong_token_is_rejected():
+    coordinator = Coordinator("127.0.0.1", 0, token="secret")
+    try:
+        with pytest.raises(ConnectionError, match="Invalid token"):
+            Worker(HostBuildSystem(), coordinator.address, token="guess", connect_timeout=1).run()
+    finally:
+        coordinator.close()
+
+
+def test_local_builds_survive_a_restart(tmp_path):
+    path = str(tmp_path / "worker_builds.json")
+    fingerprints = {"tb1": "fp1"}
+    builds = _LocalBuilds(fingerprints.get, path)
+    assert builds.acquire("tb1", "k1", lambda: True)
+    builds.release("tb1")
+
+    assert _LocalBuilds(fingerprints.get, path).keys() == ["k1"]
+    # The testbench was rebuilt by someone else since
+    fingerprints["tb1"] = "fp2"
+    assert _LocalBuilds(fingerprints.get, path).keys() == []
+
+
+def test_local_builds_wait_for_running_tests():
+    builds = _LocalBuilds(lambda testbench: None)
+    assert builds.acquire("tb1", "k1", lambda: True)
+
+    rebuilt = threading.Event()
+    thread = threading.Thread(target=lambda: builds.acquire("tb1", "k2", lambda: rebuilt.set() or True))
+    thread.start()
+    time.sleep(0.1)
+    assert not rebuilt.is_set()
+
+    builds.release("tb1")
+    thread.join(5)
+    assert rebuilt.is_set()
+    assert builds.keys() == ["k2"]
@@ -1,17 +1,20 @@
 import importlib
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
 
 from build_systems.edalize_integration import EdalizeIntegration
+from cli import get_test_runtime_args
 
 
 @pytest.fixture
-def edalize_config():
+def edalize_config(tmp_path):
     return {
-        "work_root": "/tmp/edalize_test",
+        "work_root": str(tmp_path / "edalize_test"),
+        "state_dir": str(tmp_path / ".tester"),
         "tool": "vcs",
         "parameters": {"PARAM1": "value1"},
         "files": [
@@ -151,32 +154,153 @@ def test_build_failure(mock_exists, mock_makedirs, mock_import, edalize_system):
     assert result is False
 
 
-@patch("importlib.import_module")
-@patch("os.makedirs")
-@patch("os.path.exists")
-def test_run_success(mock_exists, mock_makedirs, mock_import, edalize_system):
-    # Setup mock module and class
-    mock_module = MagicMock()
-    mock_class = MagicMock()
-    mock_backend = MagicMock()
+RUN_MAKEFILE = """\
+run:
+\t@echo "running $(EXTRA_OPTIONS)"
+\t@echo "$(EXTRA_OPTIONS)" > result.txt
+"""
 
-    mock_module.Vcs = mock_class
-    mock_class.return_value = mock_backend
-    mock_import.return_value = mock_module
-    mock_exists.return_value = True  # Makefile exists
 
-    # Call method
-    result = edalize_system.run("testbench1", "test1", {"seed": 12345, "verbosity": "high"})
+def write_files(directory, *names):
+    for name in names:
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(name)
 
-    # Verify
-    mock_backend.configure.assert_not_called()
-    mock_backend.run.assert_called_once()
 
-    # Check run options
-    run_options = mock_backend.run.call_args[0][0]
-    assert run_options["ntb_random_seed"] == "12345"
-    assert run_options["UVM_VERBOSITY"] == "UVM_HIGH"
+@pytest.fixture
+def mock_vcs(edalize_system):
+    """Mock Edalize VCS backend whose configure writes a runnable Makefile and whose build compiles a model."""
+    work_dir = os.path.join(edalize_system.work_root, "testbench1")
+    with patch("importlib.import_module") as mock_import:
+        mock_class = mock_import.return_value.Vcs
+
+        def configure():
+            with open(os.path.join(work_dir, "Makefile"), "w") as f:
+                f.write(RUN_MAKEFILE)
+            write_files(work_dir, "testbench1.scr")
+
+        def build():
+            os.makedirs(os.path.join(work_dir, "testbench1.daidir"), exist_ok=True)
+            # Outputs of an earlier simulation in the work directory
+            os.makedirs(os.path.join(work_dir, "simv.vdb"), exist_ok=True)
+            write_files(work_dir, "testbench1", "vcs.log", "ucli.key")
+
+        mock_class.return_value.configure.side_effect = configure
+        mock_class.return_value.build.side_effect = build
+        yield mock_class
+
+
+def test_run_success(edalize_system, mock_vcs):
+    result = edalize_system.run("testbench1", "test1", {"seed": 12345, "verbosity": "high"})
+
     assert result is True
+    mock_vcs.return_value.configure.assert_called_once()
+    mock_vcs.return_value.build.assert_called_once()
+    mock_vcs.return_value.run.assert_not_called()
+
+    # The test ran in its own directory on top of the shared compiled model
+    run_dir = os.path.join(edalize_system.work_root, "testbench1", "runs", "test1.12345")
+    assert sorted(os.listdir(run_dir)) == [
+        "Makefile",
+        "result.txt",
+        "run.log",
+        "testbench1",
+        "testbench1.daidir",
+        "testbench1.scr",
+    ]
+    assert os.path.islink(os.path.join(run_dir, "testbench1"))
+    with open(os.path.join(run_dir, "result.txt")) as f:
+        plusargs = f.read().split()
+    assert plusargs == [
+        "+UVM_TESTNAME=test1",
+        "+PARAM2=test1_value",
+        "+ntb_random_seed=12345",
+        "+UVM_VERBOSITY=UVM_HIGH",
+    ]
+    assert edalize_system.last_result.log_path == os.path.join(run_dir, "run.log")
+    assert "running +UVM_TESTNAME=test1" in edalize_system.last_result.output
+
+
+def test_run_does_not_start_without_a_build(edalize_system, mock_vcs):
+    mock_vcs.return_value.build.side_effect = RuntimeError("compile error")
+
+    assert edalize_system.run("testbench1", "test1") is False
+    assert not os.path.exists(os.path.join(edalize_system.work_root, "testbench1", "runs"))
+
+    # A prebuilt run never compiles, so a testbench that was not built is refused
+    mock_vcs.return_value.build.reset_mock()
+    assert edalize_system.run("testbench1", "test1", {"prebuilt": True}) is False
+    mock_vcs.return_value.build.assert_not_called()
+
+
+def test_runtime_args_are_passed_verbatim(edalize_system, mock_vcs):
+    edalize_system.testbenches["testbench1"]["tests"]["basic_test"] = {
+        "runtime_args": ["+UVM_TESTNAME=basic_test", "+TIMEOUT=1000"],
+        "timeout": 60,
+    }
+
+    runtime_args = get_test_runtime_args(edalize_system.config, "testbench1", "basic_test")
+    assert edalize_system.run("testbench1", "basic_test", {"runtime_args": runtime_args}) is True
+
+    with open(os.path.join(edalize_system.work_root, "testbench1", "runs", "basic_test", "result.txt")) as f:
+        assert f.read().split() == ["+UVM_TESTNAME=basic_test", "+TIMEOUT=1000"]
+
+
+def test_concurrent_runs_use_separate_dirs(edalize_system, mock_vcs):
+    assert edalize_system.build("testbench1") is True
+
+    seeds = list(range(8))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(
+            pool.map(lambda seed: edalize_system.run("testbench1", "test2", {"seed": seed, "prebuilt": True}), seeds)
+        )
+
+    assert all(results)
+    mock_vcs.return_value.configure.assert_called_once()
+    mock_vcs.return_value.build.assert_called_once()
+    for seed in seeds:
+        with open(os.path.join(edalize_system.work_root, "testbench1", "runs", f"test2.{seed}", "result.txt")) as f:
+            assert f"+ntb_random_seed={seed}" in f.read()
+
+
+def test_run_failure_keeps_log_tail(edalize_system, mock_vcs):
+    assert edalize_system.run("testbench1", "test1") is True
+    with open(os.path.join(edalize_system.work_root, "testbench1", "Makefile"), "w") as f:
+        f.write('run:\n\t@echo "UVM_FATAL boom"\n\t@exit 1\n')
+
+    assert edalize_system.run("testbench1", "test1") is False
+    assert "UVM_FATAL boom" in edalize_system.last_result.tail
+
+
+def test_backend_reused_and_configured_once(edalize_system, mock_vcs):
+    assert edalize_system.run("testbench1", "test1") is True
+    assert edalize_system.run("testbench1", "test1", {"seed": 1}) is True
+
+    mock_vcs.assert_called_once()
+    mock_vcs.return_value.configure.assert_called_once()
+
+    # A fresh process with an unchanged EDAM does not configure again either
+    other = EdalizeIntegration(dict(edalize_system.config))
+    assert other.run("testbench1", "test1") is True
+    assert mock_vcs.return_value.configure.call_count == 1
+
+
+def test_edam_change_reconfigures(edalize_system, mock_vcs):
+    edalize_system.run("testbench1", "test1")
+    edalize_system.parameters["PARAM1"] = "changed"
+    edalize_system.run("testbench1", "test1")
+
+    assert mock_vcs.call_count == 2
+    assert mock_vcs.return_value.configure.call_count == 2
+
+
+def test_debug_options_do_not_leak(edalize_system):
+    debug_edam = edalize_system._prepare_edalize_config("testbench1", options={"debug": True})
+    edam = edalize_system._prepare_edalize_config("testbench1")
+
+    assert debug_edam["tool_options"]["vcs"]["debug"] is True
+    assert "debug" not in edam["tool_options"]["vcs"]
+    assert edalize_system._edam_hash(debug_edam) != edalize_system._edam_hash(edam)
 
 
 @patch("shutil.rmtree")
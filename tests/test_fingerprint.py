@@ -0,0 +1,85 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from build_systems.fingerprint import BuildCache, FileHashCache, compute_fingerprint, expand_sources
+
+
+def _age(path, seconds=10):
+    """Backdate a file so it is outside the racy-timestamp window."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def sources(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "include").mkdir()
+    files = {
+        "src/a.sv": "module a; endmodule\n",
+        "src/b.sv": "module b; endmodule\n",
+        "include/defs.svh": "`define X 1\n",
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.write_text(content)
+        _age(path)
+    return tmp_path
+
+
+def test_expand_sources(sources):
+    files = expand_sources(["src/a.sv", "+incdir+include", "src/a.sv", "src/b.sv"], base_dir=str(sources))
+
+    assert files == [
+        os.path.join(str(sources), "src", "a.sv"),
+        os.path.join(str(sources), "include", "defs.svh"),
+        os.path.join(str(sources), "src", "b.sv"),
+    ]
+
+
+def test_hash_cache_skips_unchanged_files(sources):
+    cache = FileHashCache(str(sources / "hashes.json"))
+    path = str(sources / "src" / "a.sv")
+    first = cache.hash_file(path)
+    cache.save()
+
+    reloaded = FileHashCache(str(sources / "hashes.json"))
+    with patch("build_systems.fingerprint.open", create=True, side_effect=AssertionError("file was re-read")):
+        assert reloaded.hash_file(path) == first
+
+
+def test_hash_cache_rehashes_changed_files(sources):
+    cache = FileHashCache()
+    path = sources / "src" / "a.sv"
+    first = cache.hash_file(str(path))
+
+    path.write_text("module a2; endmodule\n")
+    _age(path, 5)
+
+    assert cache.hash_file(str(path)) != first
+    assert cache.hash_file(str(sources / "missing.sv")) is None
+
+
+def test_fingerprint_changes_with_settings_and_content(sources):
+    cache = FileHashCache()
+    files = expand_sources(["src/a.sv", "src/b.sv"], base_dir=str(sources))
+    base = compute_fingerprint({"simulator": "vcs"}, files, cache)
+
+    assert compute_fingerprint({"simulator": "vcs"}, files, cache) == base
+    assert compute_fingerprint({"simulator": "questa"}, files, cache) != base
+
+    (sources / "src" / "b.sv").write_text("module b; wire w; endmodule\n")
+    assert compute_fingerprint({"simulator": "vcs"}, files, cache) != base
+
+
+def test_build_cache_record_and_invalidate(tmp_path):
+    cache = BuildCache(str(tmp_path))
+
+    assert not cache.is_current("tb1", "abc")
+    cache.record("tb1", "abc")
+    assert cache.is_current("tb1", "abc")
+    assert not cache.is_current("tb1", "def")
+    cache.invalidate("tb1")
+    assert not cache.is_current("tb1", "abc")
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from tester.history import DurationHistory
+
+
+def test_record_and_predict():
+    history = DurationHistory(smoothing=0.5)
+    history.record("tb1", "a", 100)
+    history.record("tb1", "a", 200)
+
+    assert history.predict("tb1", "a") == pytest.approx(150)
+
+
+def test_predict_unseen_defaults():
+    history = DurationHistory(default_duration=42)
+    assert history.predict("tb1", "a") == 42
+
+    history.record("tb1", "a", 10)
+    history.record("tb1", "b", 30)
+    history.record("tb2", "c", 1000)
+
+    # Unknown test of a known testbench uses the testbench average
+    assert history.predict("tb1", "new") == pytest.approx(20)
+    # Unknown testbench uses the median of every known test
+    assert history.predict("tb3", "new") == pytest.approx(30)
+
+
+def test_order_longest_first():
+    history = DurationHistory()
+    history.record("tb1", "short", 20)
+    history.record("tb1", "long", 4 * 3600)
+    history.record("tb2", "medium", 600)
+
+    items = [("tb1", "short", {}), ("tb2", "medium", {}), ("tb1", "long", {"seed": 1})]
+
+    assert history.order(items) == [("tb1", "long", {"seed": 1}), ("tb2", "medium", {}), ("tb1", "short", {})]
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "state" / "durations.json"
+    history = DurationHistory(str(path))
+    history.record("tb1", "a", 12.5)
+    history.save()
+
+    assert json.loads(path.read_text()) == {"durations": {"tb1/a": 12.5}}
+    assert DurationHistory(str(path)).predict("tb1", "a") == 12.5
+
+
+def test_load_corrupt_file(tmp_path):
+    path = tmp_path / "durations.json"
+    path.write_text("{not json")
+
+    assert DurationHistory(str(path), default_duration=5).predict("tb1", "a") == 5
+
+
+def test_memory_history_keeps_peaks():
+    from tester.history import MemoryHistory
+
+    history = MemoryHistory(decay=0.5)
+    assert history.predict("tb1", "a") is None
+
+    history.record("tb1", "a", 1000)
+    history.record("tb1", "a", 100)
+    # A smaller peak only lowers the remembered one gradually
+    assert history.predict("tb1", "a") == 500
+    history.record("tb1", "a", 4000)
+    assert history.predict("tb1", "a") == 4000
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from tester.journal import RunJournal, instance_key
+
+ITEMS = [("tb1", "a", {"seed": 1}), ("tb1", "b", {"seed": 1}), ("tb1", "a", {"seed": 1}), ("tb2", "c", {})]
+
+
+def finish(journal, item, status):
+    journal.finish(item[0], item[1], item[2], status, 1.5, details=None if status == "passed" else "boom")
+
+
+def test_instance_key_ignores_options_of_the_tester():
+    assert instance_key("tb1", "a", {"seed": 1, "prebuilt": True, "verbose": True}) == instance_key("tb1", "a", {"seed": 1})
+    assert instance_key("tb1", "a", {"seed": 1}) != instance_key("tb1", "a", {"seed": 2})
+
+
+def test_resume_runs_the_unfinished_tests(tmp_path):
+    journal = RunJournal(str(tmp_path / "journals" / "nightly.jsonl"))
+    journal.start(ITEMS, "run1")
+    journal.dispatch(*ITEMS[0])
+    finish(journal, ITEMS[0], "passed")
+    finish(journal, ITEMS[3], "failed")
+    journal.dispatch(*ITEMS[1])
+    journal.close()
+
+    to_run, results = RunJournal(journal.path).load().remaining()
+
+    # The duplicate of tb1/a still has to run once more
+    assert to_run == [ITEMS[1], ITEMS[2]]
+    assert sorted((r["test"], r["status"]) for r in results) == [("a", "passed"), ("c", "failed")]
+
+
+def test_rerun_failed_keeps_the_passed_results(tmp_path):
+    journal = RunJournal(str(tmp_path / "nightly.jsonl"))
+    journal.start(ITEMS, "run1")
+    for item, status in zip(ITEMS, ["passed", "timeout", "passed", "failed"]):
+        finish(journal, item, status)
+    journal.resume("run2", "failed")
+    finish(journal, ITEMS[1], "passed")
+    journal.close()
+
+    state = RunJournal(journal.path).load()
+    to_run, results = state.remaining(failed=True)
+
+    assert to_run == [ITEMS[3]]
+    assert [r["test"] for r in results] == ["a", "a", "b"]
+    # Only the latest result of each instance counts
+    assert [r["status"] for r in state.results[instance_key(*ITEMS[1])]] == ["passed"]
+
+
+def test_damaged_last_line_is_ignored_and_completed(tmp_path):
+    journal = RunJournal(str(tmp_path / "nightly.jsonl"))
+    journal.start(ITEMS[:2], "run1")
+    finish(journal, ITEMS[0], "passed")
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"event": "finish", "key": ')
+
+    journal.resume("run2", "unfinished")
+    finish(journal, ITEMS[1], "passed")
+    journal.close()
+
+    to_run, results = journal.load().remaining()
+    assert to_run == []
+    assert len(results) == 2
+    events = []
+    with open(journal.path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line)["event"])
+            except ValueError:
+                events.append(None)
+    assert events == ["plan", "finish", None, "resume", "finish"]
+
+
+def test_load_without_journal(tmp_path):
+    journal = RunJournal(str(tmp_path / "missing.jsonl"))
+    assert not journal.exists()
+    with pytest.raises(ValueError):
+        journal.load()
@@ -0,0 +1,44 @@
+import xml.etree.ElementTree as ET
+
+from tester.junit import JUnitWriter
+
+
+def test_report_is_valid_after_every_result(tmp_path):
+    path = str(tmp_path / "junit.xml")
+    writer = JUnitWriter(path, suite_name="nightly")
+
+    root = ET.parse(path).getroot()
+    assert root.tag == "testsuites" and root.get("tests") == "0"
+
+    for i in range(20):
+        writer.add("tb1", f"test{i}", "passed", 0.5)
+        # Readable at any point, as after an interrupted regression
+        suite = ET.parse(path).getroot().find("testsuite")
+        assert suite.get("tests") == str(i + 1)
+        assert len(suite.findall("testcase")) == i + 1
+    writer.close()
+
+    suite = ET.parse(path).getroot().find("testsuite")
+    assert suite.get("name") == "nightly"
+    assert suite.get("time") == "10.000"
+
+
+def test_failures_skips_and_timeouts(tmp_path):
+    path = str(tmp_path / "junit.xml")
+    writer = JUnitWriter(path)
+    tail = "UVM_ERROR @ 10: expected <1> got <2>\n\x1b[0mUVM_FATAL @ 20: stop\n[full log: logs/tb1/t1.5.log]"
+    writer.add("tb1", "t1", "failed", 2.0, tail, name="t1.5")
+    writer.add("tb1", "t2", "skipped", 0.0, "Build of testbench tb1 failed")
+    writer.add("tb1", "t3", "timeout", 60.0, "Aborted: Timed out after 60s")
+    writer.close()
+
+    root = ET.parse(path).getroot()
+    assert (root.get("tests"), root.get("failures"), root.get("skipped")) == ("3", "2", "1")
+    t1, t2, t3 = root.find("testsuite").findall("testcase")
+    assert (t1.get("classname"), t1.get("name")) == ("tb1", "t1.5")
+    failure = t1.find("failure")
+    assert failure.get("message") == "UVM_ERROR @ 10: expected <1> got <2>"
+    assert failure.text.endswith("[full log: logs/tb1/t1.5.log]")
+    assert "?[0mUVM_FATAL @ 20: stop" in failure.text
+    assert t2.find("skipped").get("message") == "Build of testbench tb1 failed"
+    assert t3.find("failure").get("type") == "timeout"
@@ -0,0 +1,116 @@
+import fcntl
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from build_systems import process
+from build_systems.licenses import LicensePool
+
+
+def make_pool(tmp_path, **settings):
+    settings.setdefault("pools", {"vcs": 1, "vcs_cov": 1})
+    settings.setdefault("poll_interval", 0.05)
+    return LicensePool({"licenses": dict(settings, lock_dir=str(tmp_path / "locks"))})
+
+
+def test_features_default_to_the_simulator_pools(tmp_path):
+    pool = make_pool(tmp_path)
+    assert pool.features("tb1", ["build"], simulator="vcs") == ["vcs"]
+    assert pool.features("tb1", ["run"], coverage=True, simulator="vcs") == ["vcs", "vcs_cov"]
+    # Features without a pool are not limited
+    assert pool.features("tb1", ["run"], coverage=True, simulator="xcelium") == []
+
+
+def test_features_from_config(tmp_path):
+    config = {
+        "licenses": {"pools": {"vcs": 2, "vcs_cov": 1, "verdi": 1}, "run": ["vcs"], "coverage": "vcs_cov"},
+        "testbenches": {"tb2": {"licenses": {"run": ["vcs", "verdi"]}}},
+    }
+    pool = LicensePool(config)
+    assert pool.features("tb1", ["build", "run"], simulator="xcelium") == ["vcs"]
+    assert pool.features("tb1", ["run"], coverage=True) == ["vcs", "vcs_cov"]
+    assert pool.features("tb2", ["run"]) == ["vcs", "verdi"]
+
+
+def test_queued_command_waits_for_a_token(tmp_path):
+    pool = make_pool(tmp_path)
+    events = []
+
+    def job(name):
+        with pool.hold(["vcs"]) as held:
+            assert held
+            events.append(f"{name} start")
+            time.sleep(0.2)
+            events.append(f"{name} end")
+
+    threads = [threading.Thread(target=job, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # The second command only started once the first returned its token
+    assert events[1].endswith("end") and events[2].endswith("start")
+    assert len(events) == 4
+
+
+def test_tokens_are_shared_with_other_processes(tmp_path):
+    pool = make_pool(tmp_path, pools={"vcs": 1})
+    os.makedirs(pool.lock_dir)
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import fcntl, sys, time; f = open(sys.argv[1], 'a'); fcntl.flock(f, fcntl.LOCK_EX); "
+            "print('locked', flush=True); time.sleep(0.3)",
+            os.path.join(pool.lock_dir, "vcs.0.lock"),
+        ],
+        stdout=subprocess.PIPE,
+    )
+    assert holder.stdout.readline().strip() == b"locked"
+
+    start = time.monotonic()
+    with pool.hold(["vcs"]) as held:
+        assert held
+        waited = time.monotonic() - start
+        # Held tokens are locked for other processes as well
+        with open(os.path.join(pool.lock_dir, "vcs.0.lock"), "a") as f:
+            with pytest.raises(OSError):
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    holder.wait()
+    holder.stdout.close()
+    assert waited > 0.1
+
+
+def test_all_tokens_or_none(tmp_path):
+    pool = make_pool(tmp_path)
+    with pool.hold(["vcs_cov"]):
+        taken = pool._try_acquire(["vcs", "vcs_cov"])
+        assert taken is None
+        # The vcs token was given back while vcs_cov was missing
+        with pool.hold(["vcs"]) as held:
+            assert held
+
+
+def test_cancel_stops_waiting(tmp_path):
+    pool = make_pool(tmp_path)
+    results = []
+
+    def waiter():
+        with pool.hold(["vcs"]) as held:
+            results.append(held)
+
+    try:
+        with pool.hold(["vcs"]):
+            thread = threading.Thread(target=waiter)
+            thread.start()
+            time.sleep(0.1)
+            process.terminate_all()
+            thread.join(5)
+    finally:
+        process.reset()
+    assert results == [False]
@@ -0,0 +1,47 @@
+from build_systems.log_watch import LogWatcher, create_log_watcher
+
+
+def test_fatal_aborts_immediately():
+    watcher = LogWatcher()
+
+    assert watcher.feed("UVM_INFO @ 0: reporter [TEST] starting") is None
+    assert (
+        watcher.feed("# UVM_FATAL tb.sv(12) @ 100: env [CFG] no vif")
+        == "Fatal message: # UVM_FATAL tb.sv(12) @ 100: env [CFG] no vif"
+    )
+
+
+def test_report_summary_is_ignored():
+    watcher = LogWatcher(max_errors=1)
+
+    assert watcher.feed("UVM_ERROR :    0") is None
+    assert watcher.feed("UVM_FATAL :    0") is None
+    assert watcher.errors == 0
+
+
+def test_error_threshold():
+    watcher = LogWatcher(max_errors=3)
+
+    assert watcher.feed("UVM_ERROR @ 1: scoreboard [MISMATCH] 1") is None
+    assert watcher.feed("UVM_ERROR @ 2: scoreboard [MISMATCH] 2") is None
+    assert (
+        watcher.feed("UVM_ERROR @ 3: scoreboard [MISMATCH] 3")
+        == "Error limit of 3 reached: UVM_ERROR @ 3: scoreboard [MISMATCH] 3"
+    )
+
+
+def test_errors_never_abort_without_threshold():
+    watcher = LogWatcher()
+
+    assert all(watcher.feed("UVM_ERROR @ 1: x") is None for _ in range(100))
+
+
+def test_custom_patterns():
+    watcher = create_log_watcher({"fatal_patterns": [r"^Error-\["], "error_patterns": [], "max_errors": 1})
+
+    assert watcher.feed("UVM_FATAL @ 0: not watched") is None
+    assert watcher.feed("Error-[SIM-FATAL] out of memory").startswith("Fatal message")
+
+
+def test_disabled():
+    assert create_log_watcher({"enabled": False}) is None
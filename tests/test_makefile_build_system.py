@@ -1,9 +1,12 @@
+import shutil
 import subprocess
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from build_systems.makefile import MakefileBuildSystem
+from build_systems.process import CommandError, CommandResult
 
 
 @pytest.fixture
@@ -21,7 +24,7 @@ def test_init(makefile_system, makefile_config):
     assert makefile_system.make_command == makefile_config["make_command"]
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_build_success(mock_run, makefile_system):
     mock_run.return_value = MagicMock(returncode=0)
 
@@ -35,13 +38,9 @@ def test_build_success(mock_run, makefile_system):
     assert result is True
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_build_failure(mock_run, makefile_system):
-    # Create the exception correctly for Python 3.13
-    error = subprocess.CalledProcessError(1, [])
-    error.stdout = b""
-    error.stderr = b"Error"
-    mock_run.side_effect = error
+    mock_run.side_effect = CommandError(CommandResult([], 1, ["Error"]))
 
     result = makefile_system.build("my_testbench")
 
@@ -49,7 +48,7 @@ def test_build_failure(mock_run, makefile_system):
     assert result is False
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_run_success(mock_run, makefile_system):
     mock_run.return_value = MagicMock(returncode=0)
 
@@ -64,7 +63,7 @@ def test_run_success(mock_run, makefile_system):
     assert result is True
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_clean_success(mock_run, makefile_system):
     mock_run.return_value = MagicMock(returncode=0)
 
@@ -117,7 +116,7 @@ def config_with_combined_command():
 
 
 class TestMakefileBuildSystem:
-    @patch("subprocess.run")
+    @patch("build_systems.makefile.run_command")
     def test_run_with_separate_build_command(self, mock_run, config_with_separate_commands):
         """Test run when testbench has separate build command"""
         # Setup
@@ -143,7 +142,7 @@ class TestMakefileBuildSystem:
 
         assert result is True
 
-    @patch("subprocess.run")
+    @patch("build_systems.makefile.run_command")
     def test_run_with_combined_command(self, mock_run, config_with_combined_command):
         """Test run when testbench has only run command"""
         # Setup
@@ -161,14 +160,11 @@ class TestMakefileBuildSystem:
         assert "TEST=basic_test" in cmd_args
         assert result is True
 
-    @patch("subprocess.run")
+    @patch("build_systems.makefile.run_command")
     def test_run_with_build_failure(self, mock_run, config_with_separate_commands):
         """Test run when build fails"""
         # Setup
-        error = subprocess.CalledProcessError(1, [])
-        error.stdout = b"Build failed"
-        error.stderr = b"Error during build"
-        mock_run.side_effect = error
+        mock_run.side_effect = CommandError(CommandResult([], 1, ["Build failed", "Error during build"]))
 
         build_system = MakefileBuildSystem(config_with_separate_commands)
 
@@ -181,7 +177,7 @@ class TestMakefileBuildSystem:
         assert "build_testbench1" in cmd_args  # Check for custom build target
         assert result is False  # Should fail due to build failure
 
-    @patch("subprocess.run")
+    @patch("build_systems.makefile.run_command")
     def test_run_with_runtime_args(self, mock_run, config_with_separate_commands):
         """Test run with runtime arguments"""
         # Setup
@@ -203,7 +199,7 @@ class TestMakefileBuildSystem:
         assert result is True
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_build_with_custom_build_command(mock_run, makefile_config):
     """Test build when testbench has a custom build command"""
     # Setup
@@ -230,7 +226,7 @@ def test_build_with_custom_build_command(mock_run, makefile_config):
     assert result is True
 
 
-@patch("subprocess.run")
+@patch("build_systems.makefile.run_command")
 def test_run_with_custom_run_command(mock_run, makefile_config):
     """Test run when testbench has a custom run command"""
     # Setup
@@ -257,3 +253,197 @@ def test_run_with_custom_run_command(mock_run, makefile_config):
     assert "TEST=test_case" in cmd_args
     assert "DEBUG=1" in cmd_args
     assert result is True
+
+
+@patch("build_systems.makefile.run_command")
+def test_run_prebuilt_skips_build(mock_run, config_with_separate_commands):
+    """Test run does not rebuild a testbench the regression already built"""
+    build_system = MakefileBuildSystem(config_with_separate_commands)
+
+    result = build_system.run("testbench1", "basic_test", {"prebuilt": True, "coverage": True})
+
+    mock_run.assert_called_once()
+    cmd_args = mock_run.call_args[0][0]
+    assert "sim_testbench1" in cmd_args
+    assert "COVERAGE=1" in cmd_args
+    assert not any(arg.startswith("prebuilt") for arg in cmd_args)
+    assert result is True
+
+
+@patch("build_systems.makefile.run_command")
+def test_run_with_coverage_passes_database_path(mock_run, tmp_path):
+    """Test a coverage run writes its database where get_coverage_database finds it"""
+    build_system = MakefileBuildSystem({"makefile_path": str(tmp_path), "simulator": "xcelium"})
+    options = {"seed": 7, "coverage": True}
+
+    build_system.run("tb1", "basic_test", dict(options))
+
+    cmd_args = mock_run.call_args[0][0]
+    coverage_db = str(tmp_path / "sim" / "results" / "tb1" / "basic_test" / "coverage" / "basic_test.7")
+    assert f"COVERAGE_DB={coverage_db}" in cmd_args
+    assert build_system.get_coverage_database("tb1", "basic_test", options) == f"{coverage_db}/tester/run"
+    assert build_system.get_coverage_database("tb1", "basic_test", {"seed": 7}) is None
+
+    build_system.run("tb1", "basic_test", {"seed": 7})
+    assert not any(arg.startswith("COVERAGE_DB=") for arg in mock_run.call_args[0][0])
+
+
+def test_needs_build(config_with_separate_commands, config_with_combined_command):
+    assert MakefileBuildSystem(config_with_separate_commands).needs_build("testbench1") is True
+    assert MakefileBuildSystem(config_with_combined_command).needs_build("testbench2") is False
+
+
+def test_get_build_options(makefile_system):
+    options = {"seed": 1, "runtime_args": ["+A"], "verbosity": "HIGH", "coverage": True, "debug": False}
+
+    assert makefile_system.get_build_options(options) == {"coverage": True, "debug": False}
+
+
+def test_run_streams_output_to_log(tmp_path):
+    """Test a real make run writes its output to a per-test log and keeps the tail"""
+    (tmp_path / "Makefile").write_text("run:\n\t@echo running $(TEST) seed $(SEED)\n\t@exit 1\n")
+    build_system = MakefileBuildSystem(
+        {"makefile_path": str(tmp_path), "log_dir": str(tmp_path / "logs"), "log_tail_lines": 5}
+    )
+
+    result = build_system.run("tb1", "basic_test", {"seed": 7})
+
+    assert result is False
+    log_path = tmp_path / "logs" / "tb1" / "basic_test.7.log"
+    assert "running basic_test seed 7" in log_path.read_text()
+    assert build_system.last_result.log_path == str(log_path)
+    assert "running basic_test seed 7" in build_system.last_result.tail
+
+
+BUILD_MAKEFILE = "build:\n\t@mkdir -p sim/build/$(TESTBENCH)\n\t@echo compiled >> builds.txt\n"
+
+
+@pytest.fixture
+def fingerprinted_project(tmp_path, monkeypatch):
+    """A project with a real Makefile whose build counts how often it compiles"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "top.sv").write_text("module top; endmodule\n")
+    (tmp_path / "Makefile").write_text(BUILD_MAKEFILE)
+    config = {
+        "makefile_path": str(tmp_path),
+        "state_dir": str(tmp_path / ".tester"),
+        "log_dir": str(tmp_path / "logs"),
+        "template_config": {"simulator": "vcs", "src_files": ["src/top.sv"]},
+    }
+    return tmp_path, config
+
+
+def test_build_skipped_when_fingerprint_matches(fingerprinted_project):
+    tmp_path, config = fingerprinted_project
+    build_system = MakefileBuildSystem(config)
+
+    assert build_system.build("tb1") is True
+    assert build_system.build("tb1") is True
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 1
+
+    # Changed build options and changed sources both rebuild
+    assert build_system.build("tb1", {"debug": True}) is True
+    (tmp_path / "src" / "top.sv").write_text("module top; wire w; endmodule\n")
+    assert build_system.build("tb1", {"debug": True}) is True
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 3
+
+
+def test_build_not_skipped_after_clean(fingerprinted_project):
+    tmp_path, config = fingerprinted_project
+    (tmp_path / "Makefile").write_text(BUILD_MAKEFILE + "clean:\n\t@true\n")
+    build_system = MakefileBuildSystem(config)
+
+    build_system.build("tb1")
+    build_system.clean("tb1")
+    build_system.build("tb1")
+
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 2
+
+
+def test_build_not_skipped_when_build_dir_is_gone(fingerprinted_project):
+    tmp_path, config = fingerprinted_project
+    build_system = MakefileBuildSystem(config)
+
+    build_system.build("tb1")
+    shutil.rmtree(str(tmp_path / "sim"))
+    build_system.build("tb1")
+
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 2
+
+    # A custom Makefile tells where it builds
+    (tmp_path / "Makefile").write_text("build:\n\t@mkdir -p out/$(TESTBENCH)\n\t@echo compiled >> builds.txt\n")
+    shutil.rmtree(str(tmp_path / "sim"))
+    build_system = MakefileBuildSystem(dict(config, targets={"tb1": {"build_dir": "out/{testbench}"}}))
+    build_system.build("tb1")
+    build_system.build("tb1")
+
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 3
+
+
+def test_build_without_sources_always_runs(tmp_path):
+    (tmp_path / "Makefile").write_text("build:\n\t@echo compiled >> builds.txt\n")
+    build_system = MakefileBuildSystem(
+        {"makefile_path": str(tmp_path), "state_dir": str(tmp_path / ".tester"), "log_dir": str(tmp_path / "logs")}
+    )
+
+    build_system.build("tb1")
+    build_system.build("tb1")
+
+    assert (tmp_path / "builds.txt").read_text().count("compiled") == 2
+
+
+def test_run_aborts_on_error_threshold(tmp_path):
+    """Test a simulation flooding UVM_ERRORs is killed once the configured limit is hit"""
+    (tmp_path / "Makefile").write_text(
+        'run:\n\t@for i in 1 2 3 4 5; do echo "UVM_ERROR @ $$i: mismatch $$i"; done; sleep 30\n'
+    )
+    build_system = MakefileBuildSystem(
+        {"makefile_path": str(tmp_path), "log_dir": str(tmp_path / "logs"), "log_watch": {"max_errors": 3}}
+    )
+
+    assert build_system.run("tb1", "basic_test") is False
+    assert build_system.last_result.abort_reason == "Error limit of 3 reached: UVM_ERROR @ 3: mismatch 3"
+
+
+def test_run_inactivity_timeout_from_test_config(tmp_path):
+    """Test a hanging simulation is killed after the configured time without output"""
+    (tmp_path / "Makefile").write_text("run:\n\t@echo started; sleep 30\n")
+    build_system = MakefileBuildSystem(
+        {
+            "makefile_path": str(tmp_path),
+            "log_dir": str(tmp_path / "logs"),
+            "test_timeout": 60,
+            "testbenches": {"tb1": {"tests": {"basic_test": {"inactivity_timeout": 0.5}}}},
+        }
+    )
+
+    assert build_system.get_timeouts("tb1", "basic_test") == (60.0, 0.5)
+    assert build_system.get_timeouts("tb1", "basic_test", {"timeout": 5}) == (5.0, 0.5)
+    assert build_system.get_timeouts("tb1", "other_test") == (60.0, None)
+
+    assert build_system.run("tb1", "basic_test") is False
+    assert build_system.last_result.timed_out
+    assert "started" in build_system.last_result.tail
+
+
+def test_runs_wait_for_a_license_token(tmp_path):
+    """Test concurrent simulations take turns when the license pool has a single token"""
+    (tmp_path / "Makefile").write_text("run:\n\t@echo start >> events; sleep 0.3; echo end >> events\n")
+    build_system = MakefileBuildSystem(
+        {
+            "makefile_path": str(tmp_path),
+            "log_dir": str(tmp_path / "logs"),
+            "simulator": "vcs",
+            "licenses": {"pools": {"vcs": 1}, "lock_dir": str(tmp_path / "locks"), "poll_interval": 0.05},
+        }
+    )
+    assert build_system.get_licenses("tb1", "build", "run") == ["vcs"]
+
+    threads = [threading.Thread(target=build_system.run, args=("tb1", f"test{i}")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert (tmp_path / "events").read_text().split() == ["start", "end", "start", "end"]
@@ -1,5 +1,5 @@
 import os
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -84,6 +84,11 @@ class TestUVMTestbenchMakefile:
         assert 'echo "test3"' in content
         assert 'echo "test4"' in content
 
+        # Check for combined listing
+        assert "list-all:" in content
+        assert '@echo "tb1: test1 test2"' in content
+        assert '@echo "tb2: test3 test4"' in content
+
     def test_vcs_settings(self, basic_config):
         template = UVMTestbenchMakefile(basic_config)
         content = template._generate_content()
@@ -94,6 +99,8 @@ class TestUVMTestbenchMakefile:
         assert "-full64 -sverilog -timescale=1ns/1ps -CFLAGS -DVCS" in content
         assert "-debug_access+all" in content
         assert "-cm line+cond+fsm+branch+tgl" in content
+        assert "COVERAGE_DB ?= $(RESULTS_DIR)/coverage/$(TEST).$(SEED)$(COVERAGE_DB_SUFFIX)" in content
+        assert "-cm_dir $(COVERAGE_DB)" in content
 
     def test_questa_specific_settings(self):
         config = {
@@ -116,6 +123,7 @@ class TestUVMTestbenchMakefile:
         assert "VSIM = $(QUESTA_HOME)/bin/vsim" in content
         assert "-debugdb" in content
         assert "+cover=bcestf" in content
+        assert "coverage save -onexit $(abspath $(COVERAGE_DB))" in content
 
     def test_xcelium_specific_settings(self):
         config = {
@@ -154,17 +162,30 @@ class TestMakefileTemplateFactory:
 
 
 class TestMakefileTemplateFileOutput:
-    @patch("os.makedirs")
-    @patch("builtins.open", new_callable=mock_open)
-    def test_generate_with_output_path(self, mock_file, mock_makedirs):
+    def test_generate_with_output_path(self, tmp_path):
         config = {"simulator": "vcs"}
         template = UVMTestbenchMakefile(config)
 
         # Mock _generate_content to return a simple string
         template._generate_content = MagicMock(return_value="Makefile content")
 
-        template.generate("/path/to/Makefile")
+        output_path = tmp_path / "path" / "to" / "Makefile"
+        template.generate(str(output_path))
+
+        assert output_path.read_text() == "Makefile content"
+        assert [p.name for p in output_path.parent.iterdir()] == ["Makefile"]
+
+    def test_generate_unchanged_keeps_mtime(self, tmp_path):
+        template = UVMTestbenchMakefile({"simulator": "vcs"})
+        template._generate_content = MagicMock(return_value="Makefile content")
+        output_path = tmp_path / "Makefile"
+        template.generate(str(output_path))
+        os.utime(output_path, ns=(0, 0))
+
+        template.generate(str(output_path))
+        assert output_path.stat().st_mtime_ns == 0
 
-        mock_makedirs.assert_called_once_with("/path/to", exist_ok=True)
-        mock_file.assert_called_once_with("/path/to/Makefile", "w")
-        mock_file().write.assert_called_once_with("Makefile content")
+        template._generate_content.return_value = "New content"
+        template.generate(str(output_path))
+        assert output_path.read_text() == "New content"
+        assert output_path.stat().st_mtime_ns != 0
@@ -0,0 +1,239 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from build_systems import process
+from build_systems.log_watch import LogWatcher
+
+
+def _live_group_members(pgid):
+    """Return the pids in ``pgid`` that are still running (zombies are ignored)."""
+    members = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid and fields[0] != "Z":
+            members.append(int(entry))
+    return members
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    process.reset()
+    yield
+    process.reset()
+
+
+def test_run_command_success():
+    result = process.run_command(["sh", "-c", "echo hello"])
+
+    assert result.returncode == 0
+    assert result.success
+    assert result.tail == ["hello"]
+
+
+def test_run_command_failure():
+    with pytest.raises(process.CommandError) as exc_info:
+        process.run_command(["sh", "-c", "echo out; echo oops >&2; exit 3"])
+
+    assert exc_info.value.returncode == 3
+    assert exc_info.value.result.tail == ["out", "oops"]
+    assert isinstance(exc_info.value, subprocess.CalledProcessError)
+
+
+def test_run_command_streams_to_log_with_bounded_tail(tmp_path):
+    log_path = tmp_path / "logs" / "sim.log"
+
+    result = process.run_command(
+        ["sh", "-c", "i=0; while [ $i -lt 5000 ]; do echo line$i; i=$((i+1)); done"],
+        log_path=str(log_path),
+        tail_lines=3,
+    )
+
+    assert result.tail == ["line4997", "line4998", "line4999"]
+    assert result.log_path == str(log_path)
+    assert log_path.read_text().count("\n") == 5000
+
+
+def test_run_command_invalid_utf8(tmp_path):
+    log_path = tmp_path / "sim.log"
+
+    result = process.run_command(["printf", "ok\\n\\377\\376bad\\nend"], log_path=str(log_path))
+
+    assert result.tail == ["ok", "\ufffd\ufffdbad", "end"]
+    # The log keeps the raw bytes
+    assert log_path.read_bytes() == b"ok\n\xff\xfebad\nend"
+
+
+def test_pump_output_splits_multibyte_across_chunks(monkeypatch):
+    monkeypatch.setattr(process, "CHUNK_SIZE", 1)
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, "caf\u00e9\nx".encode("utf-8"))
+    os.close(write_fd)
+    tail = process.deque(maxlen=10)
+
+    process._pump_output(read_fd, tail)
+    os.close(read_fd)
+
+    assert list(tail) == ["caf\u00e9", "x"]
+
+
+def test_run_command_no_check():
+    result = process.run_command(["sh", "-c", "exit 2"], check=False)
+
+    assert result.returncode == 2
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="requires /proc")
+def test_terminate_all_kills_process_group():
+    errors = []
+
+    def target():
+        try:
+            # The backgrounded sleep is a grandchild that must be killed as well
+            process.run_command(["sh", "-c", "sleep 30 & sleep 30"])
+        except process.CommandError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    for _ in range(100):
+        if process._active:
+            break
+        time.sleep(0.01)
+    pgid = process._active[0].pid
+
+    assert process.terminate_all(grace_period=2) == 1
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert errors and errors[0].returncode < 0
+    time.sleep(0.1)
+    assert _live_group_members(pgid) == []
+
+
+def test_run_command_refused_after_cancel():
+    process.terminate_all()
+
+    with pytest.raises(process.CommandError):
+        process.run_command(["true"])
+    assert process.is_cancelled()
+
+
+def test_cancel_while_starting_kills_the_new_command(monkeypatch):
+    popen = subprocess.Popen
+
+    def cancelled_during_start(*args, **kwargs):
+        proc = popen(*args, **kwargs)
+        # The cancel lands after the check before the start, before the process is tracked
+        process.terminate_all()
+        return proc
+
+    monkeypatch.setattr(process.subprocess, "Popen", cancelled_during_start)
+    start = time.monotonic()
+    result = process.run_command(["sleep", "30"], check=False)
+
+    assert result.returncode == -signal.SIGKILL
+    assert time.monotonic() - start < 5
+
+
+def test_run_command_watcher_aborts_early(tmp_path):
+    watcher = LogWatcher()
+    start = time.monotonic()
+
+    result = process.run_command(
+        ["sh", "-c", "echo UVM_INFO @ 0: start; echo 'UVM_FATAL @ 5: bad config'; sleep 30 & sleep 30"],
+        check=False,
+        log_path=str(tmp_path / "sim.log"),
+        watcher=watcher,
+    )
+
+    assert time.monotonic() - start < 10
+    assert not result.success
+    assert result.abort_reason == "Fatal message: UVM_FATAL @ 5: bad config"
+    assert "UVM_FATAL @ 5: bad config" in (tmp_path / "sim.log").read_text()
+
+
+def test_run_command_watcher_escalates_to_sigkill():
+    with pytest.raises(process.CommandError) as exc_info:
+        process.run_command(
+            ["sh", "-c", "trap '' TERM; echo UVM_ERROR a; echo UVM_ERROR b; sleep 30"],
+            watcher=LogWatcher(max_errors=2),
+            kill_grace_period=0.2,
+        )
+
+    assert exc_info.value.result.abort_reason == "Error limit of 2 reached: UVM_ERROR b"
+    assert "aborted" in str(exc_info.value)
+
+
+def test_run_command_timeout_kills_process_tree():
+    start = time.monotonic()
+    with pytest.raises(process.CommandError) as exc_info:
+        # make-like shell whose backgrounded sleep is a grandchild holding the output open
+        process.run_command(["sh", "-c", "echo $$; sh -c 'sleep 30 & sleep 30'"], timeout=0.5)
+
+    result = exc_info.value.result
+    assert time.monotonic() - start < 10
+    assert result.timed_out
+    assert result.abort_reason == "Timed out after 0.5s"
+    time.sleep(0.1)
+    assert _live_group_members(int(result.tail[0])) == []
+
+
+def test_run_command_inactivity_timeout():
+    result = process.run_command(
+        ["sh", "-c", "for i in 1 2 3 4 5; do echo $i; sleep 0.1; done; sleep 30"],
+        check=False,
+        inactivity_timeout=0.5,
+    )
+
+    # Regular output keeps the command alive, the silence afterwards does not
+    assert result.tail == ["1", "2", "3", "4", "5"]
+    assert result.timed_out
+    assert result.abort_reason.startswith("No output for 0.5s")
+
+
+def test_run_command_within_timeout():
+    result = process.run_command(["sh", "-c", "echo done"], timeout=10, inactivity_timeout=10)
+
+    assert result.success
+    assert not result.timed_out
+
+
+def test_run_command_measures_resource_usage(tmp_path):
+    script = (
+        "import os, sys\n"
+        "x = bytearray(64 * 1024 * 1024)\n"
+        "with open(sys.argv[1], 'wb') as f:\n"
+        "    f.write(b'1' * 4 * 1024 * 1024)\n"
+        "    os.fsync(f.fileno())\n"
+        "sum(range(10 ** 6))\n"
+    )
+    result = process.run_command([sys.executable, "-c", script, str(tmp_path / "out")])
+
+    usage = result.usage
+    assert set(usage) >= {"cpu_user", "cpu_system", "max_rss"}
+    assert usage["max_rss"] >= 64 * 1024 * 1024
+    assert usage["cpu_user"] + usage["cpu_system"] > 0
+    if "write_bytes" in usage:
+        assert usage["write_bytes"] >= 4 * 1024 * 1024
+
+
+def test_run_command_peak_memory_of_concurrent_children(monkeypatch):
+    monkeypatch.setattr(process._rss_sampler, "interval", 0.05)
+    child = f"{sys.executable} -c 'import time; x = bytearray(64 * 1024 * 1024); time.sleep(1)'"
+
+    result = process.run_command(["sh", "-c", f"{child} & {child}; wait"])
+
+    # wait4 alone only knows the largest single child
+    assert result.usage["max_rss"] >= 120 * 1024 * 1024
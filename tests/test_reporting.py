@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+
+from tester import reporting
+from tester.reporting import get_data_dir
+
+
+def _read_call(path, name):
+    content = open(path).read()
+    prefix = f"testerReport.{name}("
+    assert content.startswith(prefix) and content.endswith(");\n")
+    return content[len(prefix) : -3]
+
+
+def _summary(report_path):
+    return json.loads(_read_call(os.path.join(get_data_dir(report_path), "summary.js"), "summary"))
+
+
+def _shard(report_path, index):
+    args = _read_call(os.path.join(get_data_dir(report_path), f"shard_{index:04d}.js"), "shard")
+    shard_index, rows = args.split(", ", 1)
+    assert int(shard_index) == index
+    return json.loads(rows)
+
+
+def test_generate_writes_shell_and_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporting.TestReport, "SHARD_SIZE", 3)
+    report = reporting.TestReport()
+    for i in range(7):
+        report.add_test_result(f"t{i}", "tb1", "failed" if i == 4 else "passed", 1.5, i, "boom <tail>" if i == 4 else None)
+    report_path = str(tmp_path / "report.html")
+
+    report.generate(report_path)
+
+    html = open(report_path).read()
+    assert '"report_data"' in html
+    assert "{{" not in html and "{%" not in html
+    summary = _summary(report_path)
+    assert summary["running"] is False
+    assert summary["total"] == 7
+    assert summary["counts"] == {"passed": 6, "failed": 1, "skipped": 0, "timeout": 0}
+    assert summary["shards"] == [3, 3, 1]
+    assert _shard(report_path, 1)[1] == ["t4", "tb1", "failed", 1.5, 4, "boom <tail>"]
+
+
+def test_live_report_updates_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporting.TestReport, "SHARD_SIZE", 2)
+    monkeypatch.setattr(reporting.TestReport, "PUBLISH_INTERVAL", 3600)
+    report = reporting.TestReport()
+    report_path = str(tmp_path / "report.html")
+
+    report.start(report_path)
+    assert _summary(report_path)["running"] is True
+    assert _summary(report_path)["shards"] == []
+
+    report.add_test_result("t0", "tb1", "passed", 1.0, 1)
+    # Not due yet: neither the interval passed nor a shard was completed
+    assert _summary(report_path)["total"] == 0
+    report.add_test_result("t1", "tb1", "timeout", 1.0, 2)
+    assert _summary(report_path)["shards"] == [2]
+    assert _summary(report_path)["counts"]["timeout"] == 1
+
+    # Completed shards are not written again
+    shard_file = os.path.join(get_data_dir(report_path), "shard_0000.js")
+    os.utime(shard_file, (0, 0))
+    report.add_test_result("t2", "tb1", "passed", 1.0, 3)
+    report.generate(report_path)
+    assert os.stat(shard_file).st_mtime == 0
+    summary = _summary(report_path)
+    assert (summary["running"], summary["shards"]) == (False, [2, 1])
+
+
+def test_results_are_compact_and_details_spill(monkeypatch):
+    report = reporting.TestReport()
+    long_tail = "UVM_ERROR mismatch\n" * 100
+    report.add_test_result("t0", "tb1", "failed", 2.0, 7, long_tail)
+    report.add_test_result("t1", "tb1", "passed", 1.0, 8, "short")
+
+    failed, passed = report.tests
+    assert not hasattr(failed, "__dict__")
+    assert isinstance(failed._details, reporting._SpilledText)
+    assert failed.details == long_tail
+    assert failed["details"] == long_tail and passed["details"] == "short"
+    assert (passed["name"], passed["seed"], passed["status"]) == ("t1", 8, "passed")
+    with pytest.raises(KeyError):
+        passed["_details"]
+
+
+def test_summary_from_running_counters():
+    report = reporting.TestReport()
+    for i in range(1, 1001):
+        report.add_test_result(f"t{i}", "tb1", "timeout" if i % 100 == 0 else "passed", i / 10.0, i)
+    # The summary never looks at the individual results
+    report.tests = None
+
+    summary = report.summary()
+    assert summary["counts"] == {"passed": 990, "failed": 0, "skipped": 0, "timeout": 10}
+    duration = summary["duration"]
+    assert (duration["count"], duration["min"], duration["max"]) == (1000, 0.1, 100.0)
+    assert duration["total"] == pytest.approx(50050.0)
+    assert duration["p50"] == pytest.approx(50.0, rel=0.01)
+    assert duration["p90"] == pytest.approx(90.0, rel=0.01)
+    assert duration["p99"] == pytest.approx(99.0, rel=0.01)
+
+
+def test_heaviest_tests_per_resource(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporting, "TOP_USERS", 2)
+    report = reporting.TestReport()
+    for i in range(5):
+        usage = {"cpu_user": float(i), "cpu_system": 1.0, "max_rss": (5 - i) * 2**20, "read_bytes": 0, "write_bytes": i % 2}
+        report.add_test_result(f"t{i}", "tb1", "passed", 1.0, i, usage=usage)
+    report.add_test_result("unmeasured", "tb1", "skipped", 0.0, 9)
+    report_path = str(tmp_path / "report.html")
+
+    report.generate(report_path)
+
+    summary = _summary(report_path)
+    assert summary["top"]["cpu"] == [["t4", "tb1", 4, 5.0], ["t3", "tb1", 3, 4.0]]
+    assert summary["top"]["memory"] == [["t0", "tb1", 0, 5 * 2**20], ["t1", "tb1", 1, 4 * 2**20]]
+    assert [entry[0] for entry in summary["top"]["io"]] == ["t3", "t1"]
+    assert summary["usage"]["cpu_user"] == 10.0
+    rows = _shard(report_path, 0)
+    assert rows[0][6:] == [0.0, 1.0, 5 * 2**20, 0, 0]
+    assert len(rows[5]) == 6
@@ -0,0 +1,117 @@
+import datetime
+import sqlite3
+import threading
+
+import pytest
+
+from tester.results_db import ResultsDatabase, parse_since
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = ResultsDatabase(str(tmp_path / "results.db"), batch_size=10)
+    yield database
+    database.close()
+
+
+def test_results_are_batched(tmp_path, db):
+    for i in range(9):
+        db.add("tb1", f"t{i}", "passed")
+    reader = sqlite3.connect(str(tmp_path / "results.db"))
+    assert reader.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+    # The tenth result completes the batch
+    db.add("tb1", "t9", "failed", duration=1.5, seed=7, fingerprint="abc", log_path="t9.log", run_id="r1")
+    assert reader.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 10
+    assert reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reader.close()
+
+
+def test_close_writes_pending_results(tmp_path):
+    path = str(tmp_path / "results.db")
+    db = ResultsDatabase(path)
+    db.add("tb1", "t1", "passed", duration=2.0, seed=3, fingerprint="f1", log_path="logs/t1.3.log", run_id="r1")
+    db.close()
+
+    db = ResultsDatabase(path)
+    (row,) = db.query()
+    db.close()
+    assert row["testbench"] == "tb1" and row["test"] == "t1"
+    assert (row["seed"], row["status"], row["duration"]) == (3, "passed", 2.0)
+    assert (row["fingerprint"], row["log_path"], row["run_id"]) == ("f1", "logs/t1.3.log", "r1")
+    assert row["host"]
+
+
+def test_last_runs_and_failures(db, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("tester.results_db.time.time", lambda: next(clock))
+    for i in range(40):
+        db.add("tb1", "t1", "failed" if i % 10 == 0 else "passed", seed=i)
+    db.add("tb1", "t2", "timeout")
+    db.add("tb2", "t1", "skipped")
+
+    last = db.last_runs("tb1", "t1")
+    assert len(last) == 30
+    assert [row["seed"] for row in last[:3]] == [39, 38, 37]
+
+    failures = db.failures()
+    assert [(row["test"], row["status"]) for row in failures] == [("t2", "timeout")] + [("t1", "failed")] * 4
+    assert [row["seed"] for row in db.failures(since=1015)] == [None, 30, 20]
+    assert db.failures(testbench="tb2") == []
+
+
+def test_usage_is_stored_and_ranked(db):
+    db.add("tb1", "small", "passed", usage={"cpu_user": 1.0, "cpu_system": 0.5, "max_rss": 2**20, "write_bytes": 10})
+    db.add("tb1", "big", "passed", usage={"cpu_user": 0.5, "cpu_system": 0.1, "max_rss": 2**30, "write_bytes": 5})
+    db.add("tb1", "unmeasured", "passed")
+
+    assert [row["test"] for row in db.query(order_by="memory")] == ["big", "small", "unmeasured"]
+    assert [row["test"] for row in db.query(order_by="cpu", limit=1)] == ["small"]
+    (row,) = db.query(test="big")
+    assert (row["max_rss"], row["cpu_user"], row["read_bytes"]) == (2**30, 0.5, None)
+
+
+def test_older_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "results.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE results (id INTEGER PRIMARY KEY, run_id TEXT, finished REAL NOT NULL, testbench TEXT NOT NULL,"
+        " test TEXT NOT NULL, seed INTEGER, status TEXT NOT NULL, duration REAL, fingerprint TEXT, host TEXT, log_path TEXT);"
+        " INSERT INTO results (finished, testbench, test, status) VALUES (1.0, 'tb1', 'old', 'passed');"
+        " PRAGMA user_version = 1;"
+    )
+    conn.close()
+
+    db = ResultsDatabase(path)
+    db.add("tb1", "new", "failed", usage={"max_rss": 42})
+    rows = db.query()
+    db.close()
+    assert [(row["test"], row["max_rss"]) for row in rows] == [("new", 42), ("old", None)]
+
+
+def test_concurrent_adds(db):
+    def worker(n):
+        for i in range(50):
+            db.add(f"tb{n}", f"t{i}", "passed")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(db.query()) == 200
+
+
+def test_parse_since():
+    # A Wednesday
+    now = datetime.datetime(2026, 10, 14, 15, 30)
+
+    assert parse_since("monday", now) == datetime.datetime(2026, 10, 12).timestamp()
+    assert parse_since("Wednesday", now) == datetime.datetime(2026, 10, 14).timestamp()
+    assert parse_since("thursday", now) == datetime.datetime(2026, 10, 8).timestamp()
+    assert parse_since("7d", now) == datetime.datetime(2026, 10, 7, 15, 30).timestamp()
+    assert parse_since("2h", now) == datetime.datetime(2026, 10, 14, 13, 30).timestamp()
+    assert parse_since("2026-10-01 08:00", now) == datetime.datetime(2026, 10, 1, 8).timestamp()
+    with pytest.raises(ValueError):
+        parse_since("last week", now)
@@ -0,0 +1,526 @@
+import os
+import threading
+import time
+import weakref
+from unittest.mock import MagicMock
+
+import pytest
+
+from build_systems import process
+from build_systems.base import BuildSystemBase
+from build_systems.process import CommandResult
+from tester import runner as runner_module
+from tester.history import DurationHistory
+from tester.sweep import Sweep
+
+
+class SlowBuildSystem:
+    """Build system stub that records how many tests run at the same time."""
+
+    RUN_ONLY_OPTIONS = BuildSystemBase.RUN_ONLY_OPTIONS
+    get_build_options = BuildSystemBase.get_build_options
+
+    def __init__(self, delay=0.1, failing=(), built=(), failing_builds=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.built = set(built)
+        self.failing_builds = set(failing_builds)
+        self.running = 0
+        self.max_running = 0
+        self.calls = []
+        self.builds = []
+        self._lock = threading.Lock()
+
+    def needs_build(self, testbench):
+        return testbench in self.built
+
+    def build(self, testbench, options=None):
+        with self._lock:
+            self.builds.append((testbench, options))
+        return testbench not in self.failing_builds
+
+    def run(self, testbench, test, options=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.calls.append((testbench, test, options))
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return test not in self.failing
+
+
+@pytest.fixture
+def tests():
+    return [("tb1", f"test{i}") for i in range(8)]
+
+
+def test_run_test_records_result():
+    build_system = MagicMock()
+    build_system.run.return_value = True
+    runner = runner_module.TestRunner(build_system)
+
+    assert runner.run_test("tb1", "basic_test", seed=5) == "passed"
+
+    build_system.run.assert_called_once_with("tb1", "basic_test", {"seed": 5})
+    result = runner.report.tests[0]
+    assert result["status"] == "passed"
+    assert result["seed"] == 5
+
+
+def test_run_test_exception_is_failure():
+    build_system = MagicMock()
+    build_system.run.side_effect = RuntimeError("boom")
+    runner = runner_module.TestRunner(build_system)
+
+    assert runner.run_test("tb1", "basic_test") == "failed"
+    assert runner.report.tests[0]["details"] == "boom"
+
+
+def test_run_regression_parallel(tmp_path, tests):
+    build_system = SlowBuildSystem(failing={"test3"})
+    runner = runner_module.TestRunner(build_system, parallel=4)
+
+    report_path = runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert build_system.max_running == 4
+    assert len(runner.report.tests) == 8
+    statuses = {t["name"]: t["status"] for t in runner.report.tests}
+    assert statuses["test3"] == "failed"
+    assert sum(1 for s in statuses.values() if s == "passed") == 7
+    assert report_path.startswith(str(tmp_path))
+
+
+def test_run_regression_serial(tmp_path, tests):
+    build_system = SlowBuildSystem(delay=0)
+    runner = runner_module.TestRunner(build_system)
+
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert build_system.max_running == 1
+    assert [c[1] for c in build_system.calls] == [t for _, t in tests]
+
+
+def test_run_regression_per_test_options(tmp_path):
+    build_system = SlowBuildSystem(delay=0)
+    runner = runner_module.TestRunner(build_system)
+
+    runner.run_regression(
+        [("tb1", "a", {"runtime_args": ["+A"]}), ("tb1", "b")], report_dir=str(tmp_path), seed=3, coverage=True
+    )
+
+    options = {c[1]: c[2] for c in build_system.calls}
+    assert options["a"] == {"seed": 3, "coverage": True, "runtime_args": ["+A"]}
+    assert options["b"] == {"seed": 3, "coverage": True}
+
+
+def test_run_regression_keyboard_interrupt(tmp_path, tests):
+    build_system = SlowBuildSystem(delay=0.2)
+    runner = runner_module.TestRunner(build_system, parallel=2)
+
+    def interrupt():
+        time.sleep(0.05)
+        runner.cancel()
+
+    # Cancelling from another thread mimics the Ctrl-C handler
+    threading.Thread(target=interrupt).start()
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert len(runner.report.tests) == 8
+    skipped = [t for t in runner.report.tests if t["status"] == "skipped"]
+    assert len(build_system.calls) < 8
+    assert len(skipped) >= 8 - len(build_system.calls)
+
+
+def test_run_regression_builds_once(tmp_path):
+    build_system = SlowBuildSystem(delay=0, built={"tb1", "tb2"})
+    runner = runner_module.TestRunner(build_system, parallel=4)
+    tests = [("tb1", f"test{i}", {"seed": i}) for i in range(5)] + [("tb2", "a"), ("tb3", "b")]
+
+    runner.run_regression(tests, report_dir=str(tmp_path), coverage=True)
+
+    assert sorted(build_system.builds) == [("tb1", {"coverage": True}), ("tb2", {"coverage": True})]
+    options = {c[1]: c[2] for c in build_system.calls}
+    assert options["test0"] == {"seed": 0, "coverage": True, "prebuilt": True}
+    assert "prebuilt" not in options["b"]
+
+
+def test_run_regression_builds_per_build_options(tmp_path):
+    build_system = SlowBuildSystem(delay=0, built={"tb1"})
+    runner = runner_module.TestRunner(build_system)
+    tests = [("tb1", "a", {"debug": True}), ("tb1", "b", {"debug": False}), ("tb1", "c", {"debug": True})]
+
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert build_system.builds == [("tb1", {"debug": True}), ("tb1", {"debug": False})]
+
+
+class SingleBuildDirBuildSystem(SlowBuildSystem):
+    """Keeps one build per testbench, like the build directory of a Makefile testbench."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.current = {}
+        self.mismatches = []
+
+    def build(self, testbench, options=None):
+        with self._lock:
+            if testbench in self.current and self.current[testbench] is None:
+                self.mismatches.append(("concurrent build", testbench))
+            self.current[testbench] = None
+        time.sleep(0.05)
+        with self._lock:
+            self.current[testbench] = options
+        return super().build(testbench, options)
+
+    def run(self, testbench, test, options=None):
+        if self.current.get(testbench) != self.get_build_options(options):
+            self.mismatches.append((testbench, test))
+        return super().run(testbench, test, options)
+
+
+def test_run_regression_builds_of_one_testbench_take_turns(tmp_path):
+    build_system = SingleBuildDirBuildSystem(delay=0.02, built={"tb1", "tb2"})
+    runner = runner_module.TestRunner(build_system, parallel=4)
+    tests = [
+        ("tb1", "a", {"coverage": True}),
+        ("tb1", "b", {"coverage": False}),
+        ("tb1", "c", {"coverage": True}),
+        ("tb2", "d", {"coverage": False}),
+    ]
+
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert build_system.mismatches == []
+    # tb2 builds alongside the first build of tb1, the second one waits for the tests of the first
+    assert sorted(build_system.builds[:2]) == [("tb1", {"coverage": True}), ("tb2", {"coverage": False})]
+    assert build_system.builds[2:] == [("tb1", {"coverage": False})]
+    assert runner.report.counts == {"passed": 4}
+
+
+def test_run_regression_build_failure_skips_tests(tmp_path):
+    build_system = SlowBuildSystem(delay=0, built={"tb1", "tb2"}, failing_builds={"tb1"})
+    runner = runner_module.TestRunner(build_system, parallel=2)
+    tests = [("tb1", "a"), ("tb1", "b"), ("tb2", "c")]
+
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert [c[:2] for c in build_system.calls] == [("tb2", "c")]
+    statuses = {t["name"]: (t["status"], t["details"]) for t in runner.report.tests}
+    assert statuses["a"] == ("skipped", "Build of testbench tb1 failed")
+    assert statuses["b"][0] == "skipped"
+    assert statuses["c"][0] == "passed"
+
+
+def test_run_regression_longest_first(tmp_path):
+    history = DurationHistory(str(tmp_path / "durations.json"))
+    history.record("tb1", "short", 1)
+    history.record("tb1", "long", 100)
+    build_system = SlowBuildSystem(delay=0)
+    runner = runner_module.TestRunner(build_system, history=history)
+
+    runner.run_regression([("tb1", "short"), ("tb1", "unknown"), ("tb1", "long")], report_dir=str(tmp_path))
+
+    assert [c[1] for c in build_system.calls] == ["long", "unknown", "short"]
+    saved = DurationHistory(str(tmp_path / "durations.json"))
+    assert saved.predict("tb1", "unknown") < 1
+
+
+def test_run_test_failure_details_from_log_tail():
+    build_system = MagicMock()
+    build_system.run.return_value = False
+    build_system.last_result = CommandResult(["make"], 2, ["UVM_ERROR @ 10ns", "make: *** [run] Error 1"], "logs/tb1/a.log")
+    runner = runner_module.TestRunner(build_system)
+
+    runner.run_test("tb1", "a")
+
+    details = runner.report.tests[0]["details"]
+    assert details == "UVM_ERROR @ 10ns\nmake: *** [run] Error 1\n[full log: logs/tb1/a.log]"
+
+
+class SeedFailingBuildSystem(SlowBuildSystem):
+    def run(self, testbench, test, options=None):
+        super().run(testbench, test, options)
+        return options["seed"] % 3 != 0
+
+
+def test_run_sweep_builds_once(tmp_path):
+    build_system = SeedFailingBuildSystem(delay=0.01, built={"tb1"})
+    runner = runner_module.TestRunner(build_system, parallel=4)
+    sweep = Sweep("tb1", "test1", ("range", (1, 12)))
+
+    report_path, failures = runner.run_sweep(sweep, report_dir=str(tmp_path), coverage=True)
+
+    assert os.path.exists(report_path)
+    assert build_system.builds == [("tb1", {"coverage": True})]
+    assert len(build_system.calls) == 12
+    assert all(options["prebuilt"] and options["coverage"] for _, _, options in build_system.calls)
+    assert sorted(options["seed"] for options in failures) == [3, 6, 9, 12]
+    assert sorted(t["seed"] for t in runner.report.tests if t["status"] == "failed") == [3, 6, 9, 12]
+
+
+def test_run_sweep_build_failure_skips_all(tmp_path):
+    build_system = SlowBuildSystem(delay=0, built={"tb1"}, failing_builds={"tb1"})
+    runner = runner_module.TestRunner(build_system)
+
+    _, failures = runner.run_sweep(Sweep("tb1", "test1", ("count", 5)), report_dir=str(tmp_path))
+
+    assert build_system.calls == []
+    assert len(failures) == 5
+    assert {t["status"] for t in runner.report.tests} == {"skipped"}
+
+
+def test_run_sweep_cancel_reports_every_instance_once(tmp_path):
+    build_system = SlowBuildSystem(delay=0.05, built={"tb1"})
+    runner = runner_module.TestRunner(build_system, parallel=2)
+
+    def interrupt():
+        time.sleep(0.08)
+        runner.cancel()
+
+    threading.Thread(target=interrupt).start()
+    _, failures = runner.run_sweep(Sweep("tb1", "test1", ("count", 20)), report_dir=str(tmp_path))
+
+    assert len(runner.report.tests) == 20
+    assert len(build_system.calls) < 20
+    skipped = [t for t in runner.report.tests if t["status"] == "skipped"]
+    assert len(failures) == len(skipped) >= 20 - len(build_system.calls)
+
+
+def test_run_pool_forgets_completed_jobs():
+    class Result:
+        pass
+
+    results = []
+    completed = []
+
+    def job():
+        result = Result()
+        results.append(weakref.ref(result))
+        return result
+
+    runner = runner_module.TestRunner(SlowBuildSystem(delay=0))
+    runner._run_pool(((job, ()) for _ in range(50)), 4, on_result=lambda index, result: completed.append(index))
+
+    assert sorted(completed) == list(range(50))
+    assert all(ref() is None for ref in results)
+
+
+def test_aborted_test_details_lead_with_reason():
+    build_system = MagicMock()
+    build_system.run.return_value = False
+    build_system.last_result = CommandResult(
+        ["make"], -15, ["UVM_FATAL @ 1: boom"], "sim.log", "Fatal message: UVM_FATAL @ 1: boom"
+    )
+    runner = runner_module.TestRunner(build_system)
+
+    assert runner.run_test("tb1", "t1") == "failed"
+    details = runner.report.tests[0]["details"]
+    assert details.startswith("Aborted: Fatal message: UVM_FATAL @ 1: boom\n")
+    assert details.endswith("[full log: sim.log]")
+
+
+def test_timed_out_test_has_timeout_status():
+    build_system = MagicMock()
+    build_system.run.return_value = False
+    build_system.last_result = CommandResult(["make"], -15, ["tick"], "sim.log", "No output for 60s", timed_out=True)
+    runner = runner_module.TestRunner(build_system)
+
+    assert runner.run_test("tb1", "t1") == "timeout"
+    assert runner.report.tests[0]["details"].startswith("Aborted: No output for 60s\n")
+
+
+class HangingBuildSystem(SlowBuildSystem):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    @property
+    def last_result(self):
+        return getattr(self._local, "result", None)
+
+    def simulate(self):
+        return process.run_command(["sh", "-c", "sleep 30 & sleep 30"], check=False)
+
+    def run(self, testbench, test, options=None):
+        with self._lock:
+            self.calls.append((testbench, test, options))
+        self._local.result = self.simulate()
+        return self._local.result.success
+
+
+class LateFailingBuildSystem(HangingBuildSystem):
+    """Tests that fail on their own, just after the regression is cancelled."""
+
+    def simulate(self):
+        process.wait_cancelled(5)
+        return CommandResult(["sim"], 1, ["Error: assertion failed"], "sim.log")
+
+
+def test_run_regression_time_budget(tmp_path, tests):
+    build_system = HangingBuildSystem()
+    runner = runner_module.TestRunner(build_system, parallel=2)
+    start = time.monotonic()
+
+    runner.run_regression(tests, report_dir=str(tmp_path), time_budget=0.2)
+
+    assert time.monotonic() - start < 10
+    statuses = [t["status"] for t in runner.report.tests]
+    assert statuses.count("timeout") == len(build_system.calls) == 2
+    assert statuses.count("skipped") == 6
+    assert all("time budget" in t["details"] for t in runner.report.tests)
+
+
+def test_run_regression_keeps_failures_finished_after_the_time_budget(tmp_path, tests):
+    from tester.journal import RunJournal
+
+    build_system = LateFailingBuildSystem()
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    runner = runner_module.TestRunner(build_system, parallel=2, journal=journal)
+
+    runner.run_regression(tests, report_dir=str(tmp_path), time_budget=0.2)
+    journal.close()
+
+    failed = [t for t in runner.report.tests if t["status"] == "failed"]
+    assert len(failed) == len(build_system.calls) == 2
+    assert not any("time budget" in (t["details"] or "") for t in failed)
+    to_run, kept = journal.load().remaining()
+    assert len(to_run) == 6
+    assert [record["status"] for record in kept] == ["failed", "failed"]
+
+
+def test_run_regression_stores_results(tmp_path):
+    from tester.results_db import ResultsDatabase
+
+    build_system = SlowBuildSystem(delay=0, failing={"t2"})
+    build_system.get_build_fingerprint = lambda testbench: f"fp-{testbench}"
+    db = ResultsDatabase(str(tmp_path / "results.db"))
+    runner = runner_module.TestRunner(build_system, parallel=2, results_db=db)
+
+    runner.run_regression([("tb1", "t1"), ("tb1", "t2")], report_dir=str(tmp_path), seed=5)
+
+    rows = sorted(db.query(), key=lambda row: row["test"])
+    db.close()
+    assert [(row["test"], row["status"], row["seed"]) for row in rows] == [("t1", "passed", 5), ("t2", "failed", 5)]
+    assert {row["fingerprint"] for row in rows} == {"fp-tb1"}
+    assert {row["run_id"] for row in rows} == {runner.run_id}
+
+
+def test_run_regression_streams_junit(tmp_path, tests):
+    import xml.etree.ElementTree as ET
+
+    from tester.junit import JUnitWriter
+
+    build_system = SlowBuildSystem(delay=0.2)
+    junit = JUnitWriter(str(tmp_path / "junit.xml"))
+    runner = runner_module.TestRunner(build_system, parallel=2, junit=junit)
+
+    def interrupt():
+        time.sleep(0.05)
+        runner.cancel()
+
+    threading.Thread(target=interrupt).start()
+    runner.run_regression(tests, report_dir=str(tmp_path), seed=3)
+
+    # Not closed yet, yet complete: every test is in the report, including the cancelled ones
+    suite = ET.parse(str(tmp_path / "junit.xml")).getroot().find("testsuite")
+    cases = suite.findall("testcase")
+    assert len(cases) == 8
+    assert {case.get("name") for case in cases} == {f"test{i}.3" for i in range(8)}
+    assert int(suite.get("skipped")) >= 8 - len(build_system.calls)
+    junit.close()
+
+
+def test_run_test_records_resource_usage():
+    from tester.history import MemoryHistory
+
+    build_system = MagicMock()
+    build_system.run.return_value = True
+    build_system.last_result = CommandResult(["make"], 0, [], "sim.log", usage={"cpu_user": 2.0, "max_rss": 3 * 1024**3})
+    history = MemoryHistory()
+    runner = runner_module.TestRunner(build_system, memory_history=history)
+
+    runner.run_test("tb1", "t1")
+
+    assert history.predict("tb1", "t1") == 3 * 1024**3
+    assert runner.report.tests[0].usage["cpu_user"] == 2.0
+    assert runner.report.summary()["top"]["memory"] == [["t1", "tb1", "random", 3 * 1024**3]]
+
+
+def test_run_regression_skips_tests_not_admitted(tmp_path, tests):
+    from contextlib import contextmanager
+
+    class Cancelled:
+        @contextmanager
+        def admit(self, testbench, test):
+            yield test != "test3"
+
+    build_system = SlowBuildSystem(delay=0)
+    runner = runner_module.TestRunner(build_system, admission=Cancelled())
+
+    runner.run_regression(tests, report_dir=str(tmp_path))
+
+    assert len(build_system.calls) == 7
+    assert [t["name"] for t in runner.report.tests if t["status"] == "skipped"] == ["test3"]
+
+
+def test_run_regression_merges_coverage_of_passing_tests(tmp_path, tests):
+    class CoverageBuildSystem(SlowBuildSystem):
+        def get_coverage_database(self, testbench, test, options):
+            path = tmp_path / "results" / f"{test}.{options['seed']}.vdb"
+            if options.get("coverage"):
+                path.parent.mkdir(exist_ok=True)
+                path.write_text(test)
+            return str(path)
+
+    build_system = CoverageBuildSystem(delay=0, failing={"test3"})
+    merger = MagicMock()
+    merger.finish.return_value = str(tmp_path / "merged.vdb")
+    runner = runner_module.TestRunner(build_system, parallel=2, coverage_merger=merger)
+
+    runner.run_regression(tests, report_dir=str(tmp_path), seed=1, coverage=True)
+
+    added = sorted(call[0][0] for call in merger.add.call_args_list)
+    assert added == sorted(str(tmp_path / "results" / f"{test}.1.vdb") for _, test in tests if test != "test3")
+    merger.finish.assert_called_once_with(os.path.join(str(tmp_path), f"coverage_{runner.run_id}"))
+    assert runner.coverage_path == str(tmp_path / "merged.vdb")
+
+
+def test_run_regression_resumes_from_journal(tmp_path, tests):
+    from tester.journal import RunJournal
+
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    build_system = SlowBuildSystem(delay=0.2, failing={"test0"})
+    runner = runner_module.TestRunner(build_system, parallel=2, journal=journal)
+
+    def interrupt():
+        time.sleep(0.3)
+        runner.cancel()
+
+    threading.Thread(target=interrupt).start()
+    runner.run_regression(tests, report_dir=str(tmp_path), seed=3)
+    journal.close()
+    finished = {t["name"] for t in runner.report.tests if t["status"] != "skipped"}
+    assert 0 < len(finished) < 8
+
+    # A new tester process resumes the regression from its journal
+    build_system = SlowBuildSystem(delay=0, failing={"test0"})
+    runner = runner_module.TestRunner(build_system, journal=RunJournal(journal.path))
+    runner.run_regression([], report_dir=str(tmp_path), resume="unfinished")
+
+    assert sorted(test for _, test, _ in build_system.calls) == sorted(t for _, t in tests if t not in finished)
+    assert all(options["seed"] == 3 for _, _, options in build_system.calls)
+    statuses = {t["name"]: t["status"] for t in runner.report.tests}
+    assert len(runner.report.tests) == 8
+    assert statuses["test0"] == "failed"
+    assert all(statuses[test] == "passed" for test in statuses if test != "test0")
+    runner.journal.close()
+
+    # Rerunning the failures only runs test0 and keeps the other results
+    build_system = SlowBuildSystem(delay=0)
+    runner = runner_module.TestRunner(build_system, journal=RunJournal(journal.path))
+    runner.run_regression([], report_dir=str(tmp_path), resume="failed")
+    runner.journal.close()
+
+    assert [test for _, test, _ in build_system.calls] == ["test0"]
+    assert runner.report.counts == {"passed": 8}
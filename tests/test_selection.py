@@ -0,0 +1,100 @@
+import subprocess
+
+import pytest
+
+from build_systems.makefile import MakefileBuildSystem
+from tester.selection import DependencyMap, git_changed_files, read_dependency_file
+
+TESTS = [("tb1", "a"), ("tb1", "b"), ("tb2", "c")]
+
+
+@pytest.fixture
+def project(tmp_path):
+    for path in ["rtl/dut.sv", "include/defs.svh", "tb1/env.sv", "tb2/env.sv", "stim/a.hex", "Makefile"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    return tmp_path
+
+
+def make_map(project, **selection):
+    config = {
+        "makefile_path": str(project),
+        "template_config": {
+            "src_files": [str(project / "rtl" / "dut.sv")],
+            "includes": [f"+incdir+{project / 'include'}"],
+            "testbenches": {"tb1": {"files": [str(project / "tb1")]}, "tb2": {"files": [str(project / "tb2" / "*.sv")]}},
+        },
+        "testbenches": {"tb1": {"tests": {"a": {"files": ["stim/a.hex"]}}}},
+        "selection": selection,
+    }
+    return DependencyMap(config, MakefileBuildSystem(config), base_dir=str(project))
+
+
+def test_read_dependency_file(tmp_path):
+    (tmp_path / "make.d").write_text("simv: /src/a.sv \\\n  /src/b.svh\nsimv.o:\n")
+    (tmp_path / "list.txt").write_text("# sources\n/src/a.sv\nC:/src/c.sv\n")
+
+    assert read_dependency_file(str(tmp_path / "make.d")) == ["/src/a.sv", "/src/b.svh"]
+    assert read_dependency_file(str(tmp_path / "list.txt")) == ["/src/a.sv", "C:/src/c.sv"]
+    assert read_dependency_file(str(tmp_path / "missing.d")) == []
+
+
+def test_select_by_testbench_and_test_files(project):
+    dependencies = make_map(project)
+
+    # Shared RTL and include directories affect everything
+    assert dependencies.select(TESTS, [str(project / "rtl" / "dut.sv")]) == TESTS
+    assert dependencies.select(TESTS, [str(project / "include" / "new.svh")]) == TESTS
+    # A directory covers the files below it, also deleted ones
+    assert dependencies.select(TESTS, [str(project / "tb1" / "seq" / "gone.sv")]) == [("tb1", "a"), ("tb1", "b")]
+    assert dependencies.select(TESTS, ["tb2/env.sv"]) == [("tb2", "c")]
+    # A test's own files only affect that test
+    assert dependencies.select(TESTS, ["stim/a.hex"]) == [("tb1", "a")]
+    assert dependencies.select(TESTS, ["docs/README.md"]) == []
+
+
+def test_select_run_all(project):
+    dependencies = make_map(project, run_all=["tester.yml", "scripts/*"])
+
+    assert dependencies.select(TESTS, ["scripts/sim.py"]) == TESTS
+    assert dependencies.select(TESTS, ["tester.yml"]) == TESTS
+
+
+def test_select_with_compiler_dependency_files(project):
+    (project / "deps").mkdir()
+    (project / "deps" / "tb2.d").write_text(f"simv: {project / 'ip' / 'fifo.sv'}\n")
+    dependencies = make_map(project, dependency_files="deps/{testbench}.d")
+
+    assert dependencies.select(TESTS, ["ip/fifo.sv"]) == [("tb2", "c")]
+
+
+def test_unknown_dependencies_select_everything(project):
+    class Opaque:
+        def get_dependencies(self, testbench):
+            return None
+
+    dependencies = DependencyMap({}, Opaque(), base_dir=str(project))
+
+    assert dependencies.select(TESTS, ["docs/README.md"]) == TESTS
+
+
+def test_git_changed_files(tmp_path):
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=str(tmp_path), check=True)
+
+    git("init", "-q", "-b", "main")
+    (tmp_path / "a.sv").write_text("a")
+    (tmp_path / "b.sv").write_text("b")
+    git("add", ".")
+    git("commit", "-q", "-m", "base")
+    git("checkout", "-q", "-b", "feature")
+    git("mv", "b.sv", "c.sv")
+    git("commit", "-q", "-m", "rename")
+    (tmp_path / "a.sv").write_text("changed")
+    (tmp_path / "new.sv").write_text("")
+
+    changed = git_changed_files("main", cwd=str(tmp_path))
+
+    assert changed == [str(tmp_path.resolve() / name) for name in ("a.sv", "b.sv", "c.sv", "new.sv")]
+    with pytest.raises(ValueError):
+        git_changed_files("no-such-branch", cwd=str(tmp_path))
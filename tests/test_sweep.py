@@ -0,0 +1,64 @@
+import pytest
+
+from tester.sweep import Sweep, parse_plusarg_axis, parse_seed_spec
+
+
+class TestParsing:
+    @pytest.mark.parametrize(
+        "spec, expected",
+        [
+            ("500", ("count", 500)),
+            ("10:14", ("range", (10, 14))),
+            ("10-14", ("range", (10, 14))),
+            ("3,1,3,7", ("list", [3, 1, 7])),
+        ],
+    )
+    def test_seed_spec(self, spec, expected):
+        assert parse_seed_spec(spec) == expected
+
+    @pytest.mark.parametrize("spec", ["0", "-3", "abc", "9:1", "1,x"])
+    def test_invalid_seed_spec(self, spec):
+        with pytest.raises(ValueError):
+            parse_seed_spec(spec)
+
+    def test_plusarg_axis(self):
+        assert parse_plusarg_axis("+MODE=fast, slow") == ("MODE", ["fast", "slow"])
+
+    @pytest.mark.parametrize("spec", ["MODE", "MODE=", "=1,2"])
+    def test_invalid_plusarg_axis(self, spec):
+        with pytest.raises(ValueError):
+            parse_plusarg_axis(spec)
+
+
+class TestSweep:
+    def test_random_seeds_are_distinct_and_reproducible(self):
+        sweep = Sweep("tb1", "test1", ("count", 200), rng_seed=42)
+
+        seeds = [options["seed"] for _, _, options in sweep]
+        assert len(sweep) == 200
+        assert len(set(seeds)) == 200
+        assert seeds == [options["seed"] for _, _, options in Sweep("tb1", "test1", ("count", 200), rng_seed=42)]
+
+    def test_range_grid(self):
+        sweep = Sweep(
+            "tb1", "test1", ("range", (1, 2)), axes=[("A", ["0", "1"]), ("B", ["x"])], options={"runtime_args": ["+V"]}
+        )
+
+        instances = list(sweep)
+        assert len(sweep) == len(instances) == 4
+        assert instances[1] == ("tb1", "test1", {"seed": 1, "runtime_args": ["+V", "+A=1", "+B=x"], "log_name": "test1.1.1"})
+        assert len({options["log_name"] for _, _, options in instances}) == 4
+
+    def test_random_samples(self):
+        sweep = Sweep("tb1", "test1", ("list", [5]), axes=[("A", ["0", "1", "2"])], samples=10, rng_seed=1)
+
+        instances = list(sweep)
+        assert len(instances) == len(sweep) == 10
+        assert {options["runtime_args"][0] for _, _, options in instances} <= {"+A=0", "+A=1", "+A=2"}
+        assert instances == list(sweep)
+
+    def test_lazy_expansion(self):
+        sweep = Sweep("tb1", "test1", ("range", (1, 10**9)))
+
+        assert len(sweep) == 10**9
+        assert next(iter(sweep))[2]["seed"] == 1